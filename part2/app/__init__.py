@@ -4,9 +4,13 @@ from app.api.v1.users import api as users_ns
 from app.api.v1.amenities import api as amenities_ns
 from app.api.v1.places import api as places_ns
 from app.api.v1.reviews import api as reviews_ns
+from app.services import facade
+from app import instrumentation
+from config import config
 
-def create_app():
+def create_app(config_class=config['default']):
     app = Flask(__name__)
+    app.config.from_object(config_class)
     api = Api(app, version='1.0', title='HBnB API', description='HBnB Application API', doc='/api/v1/')
 
     api.add_namespace(users_ns, path='/api/v1/users')
@@ -14,5 +18,7 @@ def create_app():
     api.add_namespace(places_ns, path='/api/v1/places')
     api.add_namespace(reviews_ns, path='/api/v1/reviews')
 
+    if app.config['METRICS']:
+        instrumentation.install(app, api, facade)
 
     return app
\ No newline at end of file
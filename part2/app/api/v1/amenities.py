@@ -1,5 +1,10 @@
-from flask_restx import Namespace, Resource, fields
+from flask_restx import Namespace, fields
+from app.instrumentation import TimedResource
 from app.services import facade
+from app.api.v1.pagination import pagination_parser, get_page_args, page_response
+from app.api.v1.batch import read_batch, create_batch, batch_response
+from app.api.v1.etags import collection_etag, conditional
+from app.api.v1.serialization import cached_dict, cached_json
 
 api = Namespace('amenities', description='Amenity operations')
 
@@ -9,8 +14,21 @@ amenity_model = api.model('Amenity', {
     'name': fields.String(required=True, description='Name of the amenity')
 })
 
+def _to_response(amenity):
+    return {
+        'id': amenity.id,
+        'name': amenity.name
+    }
+
+# cached on the amenity until it changes (see serialization.py)
+def amenity_dict(amenity):
+    return cached_dict(amenity, 'amenity', _to_response)
+
+def amenity_json(amenity):
+    return cached_json(amenity, 'amenity', _to_response)
+
 @api.route('/')
-class AmenityList(Resource):
+class AmenityList(TimedResource):
     @api.expect(amenity_model)
     @api.response(201, 'Amenity successfully created')
     @api.response(400, 'Invalid input data')
@@ -20,29 +38,53 @@ class AmenityList(Resource):
 
         try:
             new_amenity = facade.create_amenity(amenity_data)
-            return ({
-                'id': new_amenity.id,
-                'name': new_amenity.name
-            }, 201)
+            return amenity_dict(new_amenity), 201
         except ValueError as e:
             return {'error': str(e)}, 400
 
+    @api.expect(pagination_parser)
     @api.response(200, 'List of amenities retrieved successfully')
+    @api.response(304, 'Not modified since the ETag in If-None-Match')
+    @api.response(400, 'Bad pagination parameters')
     def get(self):
-        """Retrieve a list of all amenities"""
+        """Retrieve a list of all amenities, or one page of them with ?limit=&cursor="""
         try:
-            amenities = facade.get_all_amenities()
-            return [
-                {
-                    'id': amenity.id,
-                    'name': amenity.name
-                } for amenity in amenities
-            ], 200
-        except Exception as e:
-            return {"error": "Internal Server Error"}, 500
+            page_args = get_page_args()
+        except ValueError as e:
+            return {'error': str(e)}, 400
+
+        def build():
+            if page_args:
+                amenities, next_cursor = facade.get_amenities_page(*page_args)
+                return page_response(amenities, next_cursor, amenity_json)
+
+            try:
+                amenities = facade.get_all_amenities()
+                return [amenity_dict(amenity) for amenity in amenities], 200
+            except Exception as e:
+                return {"error": "Internal Server Error"}, 500
+
+        return conditional(collection_etag('amenities', facade.get_version('amenities')), build)
+
+
+@api.route('/batch')
+class AmenityBatch(TimedResource):
+    @api.expect([amenity_model])
+    @api.response(201, 'All amenities created')
+    @api.response(207, 'Some amenities created, see errors')
+    @api.response(400, 'No amenities created')
+    def post(self):
+        """Create many amenities from a JSON array, reporting errors per item"""
+        try:
+            items = read_batch()
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        created, errors = create_batch(self.api, items, amenity_model, facade.create_amenities)
+        return batch_response(created, errors)
+
 
 @api.route('/<amenity_id>')
-class AmenityResource(Resource):
+class AmenityResource(TimedResource):
     @api.response(200, 'Amenity details retrieved successfully')
     @api.response(404, 'Amenity not found')
     def get(self, amenity_id):
@@ -50,10 +92,7 @@ class AmenityResource(Resource):
         amenity = facade.get_amenity(amenity_id)
         if not amenity:
             return {'error': 'Amenity not found'}, 404
-        return {
-            'id': amenity.id,
-            'name': amenity.name
-        }, 200
+        return amenity_dict(amenity), 200
     
 
     @api.expect(amenity_model)
@@ -0,0 +1,69 @@
+from flask import request
+from werkzeug.exceptions import HTTPException
+
+from app.instrumentation import timed
+
+# Shared handling for the POST /<resource>/batch endpoints.
+# Items are validated one by one, against the resource's model and then by
+# the facade, so a bad item is reported in "errors" instead of rejecting
+# the whole batch.
+
+MAX_BATCH_SIZE = 1000
+
+
+def read_batch():
+    """
+    Return the JSON array posted as the request body.
+    Raises ValueError if it isn't a non-empty array of at most MAX_BATCH_SIZE items.
+    """
+    items = request.get_json(silent=True)
+    if not isinstance(items, list) or not items:
+        raise ValueError("Expected a non-empty JSON array")
+    if len(items) > MAX_BATCH_SIZE:
+        raise ValueError(f"A batch can hold at most {MAX_BATCH_SIZE} items")
+    return items
+
+
+def validate_batch(api, items, model):
+    """
+    Check each item against `model` the way @api.expect(model, validate=True)
+    checks a single payload. Returns (indexes of the valid items,
+    [{"index": i, "error": message, "errors": {field: message}}, ...])
+    """
+    valid, errors = [], []
+    with timed("validate"):
+        for index, item in enumerate(items):
+            try:
+                model.validate(item, api.refresolver, api.format_checker)
+                valid.append(index)
+            except HTTPException as err:
+                data = getattr(err, "data", {})
+                errors.append({"index": index, "error": data.get("message", "Invalid item"),
+                               "errors": data.get("errors", {})})
+    return valid, errors
+
+
+def create_batch(api, items, model, create):
+    """
+    validate_batch, then create(valid items) -> (created, errors) from the
+    facade; the indexes of both refer to the posted array
+    """
+    valid, errors = validate_batch(api, items, model)
+    created, failed = create([items[index] for index in valid]) if valid else ([], [])
+    created = [(valid[index], obj) for index, obj in created]
+    errors.extend(dict(error, index=valid[error["index"]]) for error in failed)
+    errors.sort(key=lambda error: error["index"])
+    return created, errors
+
+
+def batch_response(created, errors):
+    """
+    201 when every item was created, 207 when only some were, 400 when none were
+    """
+    body = {
+        "created": [{"index": index, "id": obj.id} for index, obj in created],
+        "errors": errors,
+    }
+    if not errors:
+        return body, 201
+    return body, 207 if created else 400
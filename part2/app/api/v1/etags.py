@@ -0,0 +1,54 @@
+from hashlib import sha1
+
+from flask import request, Response
+from werkzeug.http import quote_etag
+
+# Conditional GET support: responses carry an ETag, and a request whose
+# If-None-Match already names it gets an empty 304 without the body being
+# serialized again.
+
+
+def object_etag(obj):
+    """
+    Strong ETag of one model instance, changes whenever updated_at does
+    """
+    return sha1(f"{obj.id}:{obj.updated_at.isoformat()}".encode()).hexdigest()
+
+
+def compound_etag(objs, variant=""):
+    """
+    Strong ETag of a document built from several objects (a place with its
+    reviews, owner...): changes whenever any of them does
+    """
+    digest = sha1(variant.encode())
+    for obj in objs:
+        digest.update(f"{obj.id}:{obj.updated_at.isoformat()};".encode())
+    return digest.hexdigest()
+
+
+def collection_etag(name, version, variant=""):
+    """
+    ETag of a collection response: the repository write counter plus the
+    query string, since ?limit=&cursor= pick different bodies, plus
+    `variant` (the negotiated format) when one URL has several
+    """
+    return sha1(f"{name}:{version}:{request.query_string.decode()}:{variant}".encode()).hexdigest()
+
+
+def conditional(etag, build, vary=None):
+    """
+    304 if the client already holds `etag`, otherwise build() with the ETag header.
+    build() returns (body, status) or a ready Response. `vary` names the
+    request headers the body depends on, sent with the 200 and the 304.
+    """
+    headers = {"ETag": quote_etag(etag)}
+    if vary:
+        headers["Vary"] = vary
+    if request.if_none_match.contains_weak(etag):
+        return Response(status=304, headers=headers)
+    result = build()
+    if isinstance(result, Response):
+        result.headers.update(headers)
+        return result
+    body, status = result
+    return body, status, headers
@@ -0,0 +1,52 @@
+from flask_restx import reqparse
+
+from app.api.v1.serialization import to_json, json_array, json_response
+
+# Shared ?limit=&cursor= handling for the collection endpoints.
+# Without either parameter a collection still returns its full list, so
+# existing clients keep working; with one, the response becomes
+# {"items": [...], "next_cursor": "..."} and each call only touches one page.
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+
+pagination_parser = reqparse.RequestParser()
+pagination_parser.add_argument("limit", type=int, location="args",
+                               help=f"Page size (1-{MAX_LIMIT}, default {DEFAULT_LIMIT})")
+pagination_parser.add_argument("cursor", type=str, location="args",
+                               help="next_cursor from the previous page")
+
+
+def get_page_args(opaque=False):
+    """
+    Return (cursor, limit) from the query string, or None when no page was asked for.
+    Raises ValueError on a malformed cursor or out of range limit. With
+    opaque=True the cursor is passed on as the string it is (a keyset
+    cursor that the facade decodes) instead of a position.
+    """
+    args = pagination_parser.parse_args()
+    if args["limit"] is None and args["cursor"] is None:
+        return None
+
+    limit = DEFAULT_LIMIT if args["limit"] is None else args["limit"]
+    if not 1 <= limit <= MAX_LIMIT:
+        raise ValueError(f"limit must be between 1 and {MAX_LIMIT}")
+
+    cursor = None
+    if args["cursor"] and opaque:
+        cursor = args["cursor"]
+    elif args["cursor"]:
+        if not args["cursor"].isdigit():
+            raise ValueError("Invalid cursor")
+        cursor = int(args["cursor"])
+    return cursor, limit
+
+
+def page_response(objs, next_cursor, encode):
+    """
+    {"items": [...], "next_cursor": ...} response; encode(obj) returns the item's JSON bytes
+    """
+    cursor = None if next_cursor is None else str(next_cursor)
+    body = (b'{"items":' + json_array([encode(obj) for obj in objs])
+            + b',"next_cursor":' + to_json(cursor) + b"}")
+    return json_response(body)
@@ -1,28 +1,71 @@
-from flask_restx import Namespace, Resource, fields
+from flask_restx import Namespace, fields
+from app.instrumentation import TimedResource
+from app.persistence.text_index import TextIndex
 from app.services import facade
+from app.api.v1.pagination import pagination_parser, get_page_args, page_response, DEFAULT_LIMIT, MAX_LIMIT
+from app.api.v1.batch import read_batch, create_batch, batch_response
+from app.api.v1.etags import object_etag, collection_etag, compound_etag, conditional
+from app.api.v1.serialization import (cached_dict, cached_json, json_array, json_response,
+                                       stream_response, stream_mimetype)
+from app.api.v1.amenities import amenity_dict
+from app.api.v1.reviews import review_dict
 
 # So i'm trying something new here, Saw some people do something similar to this, which is a "helper" function
 # which should help to convert a Place model instance to a response dictionary. (allowing us to link reviews if im not wrong)
-def place_to_response(place, expand_reviews=False):
-    data = place.to_dict()   # basic fields from BaseModel
-    if expand_reviews:
+# `related` comes from facade.get_place_relations(place, expand), so every
+# related object is already loaded; each part reuses that object's cached view.
+def place_to_response(place, expand=(), related=None):
+    data = dict(place_dict(place))
+    if "owner" in expand:
+        owner = related["owner"]
+        data["owner"] = _author(owner)
+    if "amenities" in expand:
+        data["amenities"] = [amenity_dict(amenity) for amenity in related["amenities"]]
+    if "reviews" in expand:
+        authors = related["authors"]
         data["reviews"] = [
-            {
-                "id":     r.id,
-                "text":   r.text,
-                "rating": r.rating,
-                "user": {
-                    "id":    r.user.id,
-                    "email": getattr(r.user, "email", None)  # guard if email not on model
-                }
-            } for r in place.reviews
+            dict(review_dict(review), user=_author(authors.get(review.user.id)))
+            for review in related["reviews"]
         ]
     return data
 
+def _author_view(user):
+    return {"id": user.id, "first_name": user.first_name, "last_name": user.last_name}
+
+def _author(user):
+    # a user embedded in a place (its owner, a review's author): like the
+    # reviews endpoints, without the email
+    if user is None:
+        return None
+    return cached_dict(user, "author", _author_view)
+
+def _related_objects(related):
+    objs = []
+    if related.get("owner"):
+        objs.append(related["owner"])
+    objs.extend(related.get("amenities", ()))
+    objs.extend(related.get("reviews", ()))
+    objs.extend(related.get("authors", {}).values())
+    return objs
+
 # Since we added multiple inputs like number_rooms, I created a helper function to exclude any variables with null values from the response, ensuring only meaningful data is displayed.
 def clean_nulls(data: dict) -> dict:
     return {k: v for k, v in data.items() if v is not None}
 
+# The plain place response is cached on the place until it changes (see serialization.py)
+def _place_view(place):
+    return clean_nulls(place.to_dict())
+
+def place_dict(place):
+    return cached_dict(place, "place", _place_view)
+
+def place_json(place):
+    return cached_json(place, "place", _place_view)
+
+def place_json_uncached(place):
+    # for streamed exports: reuse a cached fragment but don't fill the cache with every place
+    return cached_json(place, "place", _place_view, store=False)
+
 api = Namespace("places", description="Place operations")
 
 amenity_id_field = fields.String(description="Amenity id")
@@ -64,8 +107,45 @@ place_update_model = api.model(
 )
 
 
+filter_parser = pagination_parser.copy()
+filter_parser.add_argument("min_price", type=float, location="args", help="Lowest price per night")
+filter_parser.add_argument("max_price", type=float, location="args", help="Highest price per night")
+filter_parser.add_argument("bbox", type=str, location="args",
+                           help="Bounding box as min_lon,min_lat,max_lon,max_lat")
+filter_parser.add_argument("sort", type=str, location="args",
+                           choices=("price", "-price", "created_at", "-created_at"),
+                           help="Order by price or created_at, '-' for descending")
+
+
+def get_filter_args():
+    """
+    Return (min_price, max_price, bbox) from the query string, or None when no filter was asked for.
+    Raises ValueError on a malformed bbox or price range.
+    """
+    args = filter_parser.parse_args()
+    if args["min_price"] is None and args["max_price"] is None and args["bbox"] is None:
+        return None
+
+    if None not in (args["min_price"], args["max_price"]) and args["min_price"] > args["max_price"]:
+        raise ValueError("min_price must not be greater than max_price")
+
+    bbox = None
+    if args["bbox"] is not None:
+        try:
+            bbox = tuple(float(value) for value in args["bbox"].split(","))
+        except ValueError:
+            bbox = ()
+        if len(bbox) != 4:
+            raise ValueError("bbox must be min_lon,min_lat,max_lon,max_lat")
+        _check_coordinates(bbox[1], bbox[0])
+        _check_coordinates(bbox[3], bbox[2])
+        if bbox[1] > bbox[3]:
+            raise ValueError("min_lat must not be greater than max_lat")
+    return args["min_price"], args["max_price"], bbox
+
+
 @api.route("/")
-class PlaceList(Resource):
+class PlaceList(TimedResource):
     @api.expect(place_model, validate=True)
     @api.response(201, "Place created")
     @api.response(400, "Bad input")
@@ -73,30 +153,113 @@ class PlaceList(Resource):
         """Create a new place"""
         try:
             new_place = facade.create_place(api.payload)
-            data = clean_nulls(new_place.to_dict())
-            return data, 201
+            return place_dict(new_place), 201
         except ValueError as err:
             return {"error": str(err)}, 400
 
+    @api.expect(filter_parser)
     @api.response(200, "Success")
+    @api.response(304, "Not modified since the ETag in If-None-Match")
+    @api.response(400, "Bad pagination or filter parameters")
     def get(self):
-        """Return *all* places"""
-        places = facade.get_all_places()
-        cleaned_places = [clean_nulls(p.to_dict()) for p in places]
-        return cleaned_places, 200
+        """Return *all* places (streamed; NDJSON with Accept: application/x-ndjson), one page of them with ?limit=&cursor=, the ones matching ?min_price=&max_price=&bbox=, ordered with ?sort="""
+        sort = filter_parser.parse_args()["sort"]
+        try:
+            filter_args = get_filter_args()
+            # sorted and filtered listings page with keyset cursors
+            page_args = get_page_args(opaque=bool(sort or filter_args))
+        except ValueError as err:
+            return {"error": str(err)}, 400
+
+        def build():
+            if filter_args and page_args and not sort:
+                # a page of filtered places: creation order is the created_at ordering
+                sort_by = "created_at"
+            else:
+                sort_by = sort
+            if sort_by:
+                places, next_cursor = facade.get_places_sorted(
+                    sort_by.lstrip("-"), sort_by.startswith("-"),
+                    *(filter_args or (None, None, None)), *(page_args or (None, None)))
+                if page_args:
+                    return page_response(places, next_cursor, place_json)
+                return json_response(json_array([place_json(place) for place in places]))
+            if filter_args:
+                places = facade.filter_places(*filter_args)
+                return json_response(json_array([place_json(place) for place in places]))
+            if page_args:
+                places, next_cursor = facade.get_places_page(*page_args)
+                return page_response(places, next_cursor, place_json)
+
+            return stream_response(facade.iter_places(), place_json_uncached)
+
+        # the unpaginated listing is JSON or NDJSON depending on Accept
+        try:
+            return conditional(collection_etag("places", facade.get_version("places"), stream_mimetype()),
+                               build, vary="Accept")
+        except ValueError as err:
+            # a bad sort or cursor, found by the facade
+            return {"error": str(err)}, 400
+
+
+@api.route("/batch")
+class PlaceBatch(TimedResource):
+    @api.expect([place_model])
+    @api.response(201, "All places created")
+    @api.response(207, "Some places created, see errors")
+    @api.response(400, "No places created")
+    def post(self):
+        """Create many places from a JSON array, reporting errors per item"""
+        try:
+            items = read_batch()
+        except ValueError as err:
+            return {"error": str(err)}, 400
+        created, errors = create_batch(self.api, items, place_model, facade.create_places)
+        return batch_response(created, errors)
+
+
+expand_parser = api.parser()
+expand_parser.add_argument("expand", type=str, location="args",
+                           help="Related objects to embed, comma separated: reviews, owner, amenities")
+
+
+def get_expand_arg():
+    """
+    The relations named in ?expand=, in a canonical order. Raises ValueError on an unknown one.
+    """
+    value = expand_parser.parse_args()["expand"]
+    if not value:
+        return ()
+    names = {name.strip() for name in value.split(",") if name.strip()}
+    unknown = names - set(facade.PLACE_RELATIONS)
+    if unknown:
+        raise ValueError(f"Cannot expand {', '.join(sorted(unknown))}; "
+                         f"choose from {', '.join(facade.PLACE_RELATIONS)}")
+    return tuple(name for name in facade.PLACE_RELATIONS if name in names)
 
 
 @api.route("/<place_id>")
-class PlaceResource(Resource):
+class PlaceResource(TimedResource):
+    @api.expect(expand_parser)
     @api.response(200, "Found")
+    @api.response(304, "Not modified since the ETag in If-None-Match")
+    @api.response(400, "Unknown relation in expand")
     @api.response(404, "Not found")
     def get(self, place_id):
-        """Get one place by id"""
+        """Get one place by id; ?expand=reviews,owner,amenities embeds those in the same document"""
+        try:
+            expand = get_expand_arg()
+        except ValueError as err:
+            return {"error": str(err)}, 400
         place = facade.get_place(place_id)
         if not place:
             return {"error": "Place not found"}, 404
-        data = clean_nulls(place.to_dict())
-        return data, 200
+        if not expand:
+            return conditional(object_etag(place), lambda: (place_dict(place), 200))
+
+        related = facade.get_place_relations(place, expand)
+        etag = compound_etag([place] + _related_objects(related), ",".join(expand))
+        return conditional(etag, lambda: (place_to_response(place, expand, related), 200))
 
     @api.expect(place_update_model, validate=True)
     @api.response(200, "Updated")
@@ -111,3 +274,70 @@ class PlaceResource(Resource):
             return {"message": "Place updated"}, 200
         except ValueError as err:
             return {"error": str(err)}, 400
+
+
+search_parser = api.parser()
+search_parser.add_argument("lat", type=float, location="args", help="Latitude of the centre point")
+search_parser.add_argument("lon", type=float, location="args", help="Longitude of the centre point")
+search_parser.add_argument("radius_km", type=float, location="args", help="Search radius in km")
+search_parser.add_argument("min_lat", type=float, location="args", help="Bounding box south edge")
+search_parser.add_argument("min_lon", type=float, location="args", help="Bounding box west edge")
+search_parser.add_argument("max_lat", type=float, location="args", help="Bounding box north edge")
+search_parser.add_argument("max_lon", type=float, location="args", help="Bounding box east edge")
+search_parser.add_argument("q", type=str, location="args",
+                           help="Keywords matched against titles, descriptions and reviews; each one "
+                                "also matches words it starts with, up to the first "
+                                f"{TextIndex.MAX_EXPANSIONS} of them alphabetically")
+search_parser.add_argument("limit", type=int, location="args",
+                           help=f"Number of keyword results (1-{MAX_LIMIT}, default {DEFAULT_LIMIT})")
+
+
+def _check_coordinates(lat, lon):
+    if not (-90.0 <= lat <= 90.0):
+        raise ValueError("Latitude must be between -90.0 and 90.0")
+    if not (-180.0 <= lon <= 180.0):
+        raise ValueError("Longitude must be between -180.0 and 180.0")
+
+
+@api.route("/search")
+class PlaceSearch(TimedResource):
+    @api.expect(search_parser)
+    @api.response(200, "Success")
+    @api.response(400, "Bad search parameters")
+    def get(self):
+        """Find places by keywords (q), near a point (lat, lon, radius_km) or inside a box (min_lat, min_lon, max_lat, max_lon)"""
+        args = search_parser.parse_args()
+        box = [args["min_lat"], args["min_lon"], args["max_lat"], args["max_lon"]]
+        try:
+            if args["q"] is not None:
+                if not args["q"].strip():
+                    raise ValueError("q cannot be empty")
+                limit = DEFAULT_LIMIT if args["limit"] is None else args["limit"]
+                if not 1 <= limit <= MAX_LIMIT:
+                    raise ValueError(f"limit must be between 1 and {MAX_LIMIT}")
+                return [
+                    dict(place_dict(place), score=round(score, 3))
+                    for place, score in facade.search_places_text(args["q"], limit)
+                ], 200
+
+            if None not in (args["lat"], args["lon"], args["radius_km"]):
+                _check_coordinates(args["lat"], args["lon"])
+                if args["radius_km"] <= 0:
+                    raise ValueError("radius_km must be a positive number")
+                results = facade.search_places_near(args["lat"], args["lon"], args["radius_km"])
+                return [
+                    dict(place_dict(place), distance_km=round(distance, 3))
+                    for place, distance in results
+                ], 200
+
+            if None not in box:
+                _check_coordinates(box[0], box[1])
+                _check_coordinates(box[2], box[3])
+                if box[0] > box[2]:
+                    raise ValueError("min_lat must not be greater than max_lat")
+                places = facade.search_places_in_box(*box)
+                return json_response(json_array([place_json(place) for place in places]))
+        except ValueError as err:
+            return {"error": str(err)}, 400
+
+        return {"error": "Provide q, lat, lon and radius_km, or min_lat, min_lon, max_lat and max_lon"}, 400
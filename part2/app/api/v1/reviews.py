@@ -1,6 +1,12 @@
 # app/api/reviews.py
-from flask_restx import Namespace, Resource, fields
+from flask_restx import Namespace, fields
+from app.instrumentation import TimedResource
 from app.services import facade
+from app.api.v1.pagination import pagination_parser, get_page_args, page_response
+from app.api.v1.batch import read_batch, create_batch, batch_response
+from app.api.v1.etags import object_etag, collection_etag, conditional
+from app.api.v1.serialization import (cached_dict, cached_json, json_array, json_response,
+                                       stream_response, stream_mimetype)
 
 api = Namespace("reviews", description="Review operations")
 
@@ -31,8 +37,19 @@ def _to_response(review):
         "updated_at": review.updated_at.isoformat()
     }
 
+# cached on the review until it changes (see serialization.py)
+def review_dict(review):
+    return cached_dict(review, "review", _to_response)
+
+def review_json(review):
+    return cached_json(review, "review", _to_response)
+
+def _review_json_uncached(review):
+    # for streamed exports: reuse a cached fragment but don't fill the cache with every review
+    return cached_json(review, "review", _to_response, store=False)
+
 @api.route("/")
-class ReviewList(Resource):
+class ReviewList(TimedResource):
     @api.expect(review_model, validate=True)
     @api.response(201, "Review created")
     @api.response(400, "Bad input")
@@ -43,21 +60,55 @@ class ReviewList(Resource):
         except ValueError as err:
             return {"error": str(err)}, 400
     
+    @api.expect(pagination_parser)
     @api.response(200, "Success")
+    @api.response(304, "Not modified since the ETag in If-None-Match")
+    @api.response(400, "Bad pagination parameters")
     def get(self):
-        """Return *all* reviews"""
-        reviews = facade.get_all_reviews()
-        return [_to_response(r) for r in reviews], 200
+        """Return *all* reviews (streamed; NDJSON with Accept: application/x-ndjson), or one page of them with ?limit=&cursor="""
+        try:
+            page_args = get_page_args()
+        except ValueError as err:
+            return {"error": str(err)}, 400
+
+        def build():
+            if page_args:
+                reviews, next_cursor = facade.get_reviews_page(*page_args)
+                return page_response(reviews, next_cursor, review_json)
+
+            return stream_response(facade.iter_reviews(), _review_json_uncached)
+
+        # the unpaginated listing is JSON or NDJSON depending on Accept
+        return conditional(collection_etag("reviews", facade.get_version("reviews"), stream_mimetype()),
+                           build, vary="Accept")
+
+
+@api.route("/batch")
+class ReviewBatch(TimedResource):
+    @api.expect([review_model])
+    @api.response(201, "All reviews created")
+    @api.response(207, "Some reviews created, see errors")
+    @api.response(400, "No reviews created")
+    def post(self):
+        """Create many reviews from a JSON array, reporting errors per item"""
+        try:
+            items = read_batch()
+        except ValueError as err:
+            return {"error": str(err)}, 400
+        created, errors = create_batch(self.api, items, review_model, facade.create_reviews)
+        return batch_response(created, errors)
+
 
 @api.route("/<review_id>")
-class ReviewResource(Resource):
+class ReviewResource(TimedResource):
     @api.response(200, "Found")
+    @api.response(304, "Not modified since the ETag in If-None-Match")
     @api.response(404, "Not found")
     def get(self, review_id):
         rev = facade.get_review(review_id)
         if not rev:
             return {"error": "Review not found"}, 404
-        return _to_response(rev), 200
+        return conditional(object_etag(rev), lambda: (review_dict(rev), 200))
 
     @api.expect(review_update_model, validate=True)
     @api.response(200, "Updated")
@@ -82,11 +133,11 @@ class ReviewResource(Resource):
 
 
 @api.route("/place/<place_id>")
-class ReviewsByPlace(Resource):
+class ReviewsByPlace(TimedResource):
     @api.response(200, "OK")
     @api.response(404, "Place not found")
     def get(self, place_id):
         reviews = facade.get_reviews_for_place(place_id)
         if reviews is None:
             return {"error": "Place not found"}, 404
-        return [_to_response(r) for r in reviews], 200
+        return json_response(json_array([review_json(r) for r in reviews]))
@@ -0,0 +1,100 @@
+import json
+
+from flask import Response, request, stream_with_context
+
+from app.instrumentation import timed
+
+# Per-object response caching. A representation is built once per
+# updated_at (see BaseModel.serialized), and its encoded JSON is cached
+# too, so list endpoints join ready-made fragments instead of encoding
+# every object again on every request.
+
+
+def to_json(data):
+    return json.dumps(data, separators=(",", ":")).encode()
+
+
+def cached_dict(obj, view, build, store=True):
+    """
+    build(obj) -> dict, cached on the object
+    """
+    with timed("serialize"):
+        return obj.serialized(view, build, store)
+
+
+def cached_json(obj, view, build, store=True):
+    """
+    Encoded JSON of cached_dict(obj, view, build), cached on the object as well
+    """
+    with timed("serialize"):
+        return obj.serialized(view + ".json", lambda o: to_json(cached_dict(o, view, build, store)), store)
+
+
+def json_array(fragments):
+    return b"[" + b",".join(fragments) + b"]"
+
+
+def json_response(body, status=200):
+    """
+    Response for an already encoded JSON body
+    """
+    return Response(body, status=status, mimetype="application/json")
+
+
+# Streaming: the body is produced while it is sent, from an iterator over
+# the repository, so memory stays flat however large the collection is.
+
+NDJSON = "application/x-ndjson"
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def wants_ndjson():
+    """
+    True when the client's Accept header prefers NDJSON over a JSON array
+    """
+    return request.accept_mimetypes.best_match(["application/json", NDJSON]) == NDJSON
+
+
+def stream_mimetype():
+    """
+    The format stream_response will pick for this request; part of the
+    collection's ETag, since both formats share one URL
+    """
+    return NDJSON if wants_ndjson() else "application/json"
+
+
+def _chunked(parts):
+    # group small fragments into bigger writes
+    buffer, size = [], 0
+    for part in parts:
+        buffer.append(part)
+        size += len(part)
+        if size >= STREAM_CHUNK_SIZE:
+            yield b"".join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield b"".join(buffer)
+
+
+def _json_array_parts(objs, encode):
+    yield b"["
+    for i, obj in enumerate(objs):
+        yield b"," + encode(obj) if i else encode(obj)
+    yield b"]"
+
+
+def _ndjson_parts(objs, encode):
+    for obj in objs:
+        yield encode(obj) + b"\n"
+
+
+def stream_response(objs, encode):
+    """
+    Stream objs as a JSON array, or as NDJSON when the client asks for it.
+    encode(obj) returns the object's JSON bytes.
+    """
+    if wants_ndjson():
+        parts, mimetype = _ndjson_parts(objs, encode), NDJSON
+    else:
+        parts, mimetype = _json_array_parts(objs, encode), "application/json"
+    return Response(stream_with_context(_chunked(parts)), mimetype=mimetype, headers={"Vary": "Accept"})
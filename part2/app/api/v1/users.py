@@ -1,8 +1,13 @@
 #!/usr/bin/python3
 
-from flask_restx import Namespace, Resource, fields
+from flask_restx import Namespace, fields
+from app.instrumentation import TimedResource
 from app.services import facade
 from app.models.user import User
+from app.api.v1.pagination import pagination_parser, get_page_args, page_response
+from app.api.v1.batch import read_batch, create_batch, batch_response
+from app.api.v1.etags import object_etag, collection_etag, conditional
+from app.api.v1.serialization import cached_dict, cached_json, json_array, json_response
 
 
 api = Namespace("users", description="User operations")
@@ -13,8 +18,23 @@ user_model = api.model("User", {
     "email": fields.String(required=True, description="Email of the user")
 })
 
+def _to_response(user):
+    return {
+        'id': user.id,
+        'first_name': user.first_name,
+        'last_name': user.last_name,
+        'email': user.email
+    }
+
+# cached on the user until it changes (see serialization.py)
+def user_dict(user):
+    return cached_dict(user, 'user', _to_response)
+
+def user_json(user):
+    return cached_json(user, 'user', _to_response)
+
 @api.route('/')
-class UserList(Resource):
+class UserList(TimedResource):
     @api.expect(user_model, validate=True)
     @api.response(201, "User successfully created")
     @api.response(400, "Email already registered or invalid input data")
@@ -39,34 +59,53 @@ class UserList(Resource):
         except Exception:
             return {"error": "Invalid input data"}, 400
 
+    @api.expect(pagination_parser)
     @api.response(200, 'List of users retrieved successfully')
+    @api.response(304, 'Not modified since the ETag in If-None-Match')
+    @api.response(400, 'Bad pagination parameters')
     def get(self):
-        users = facade.get_all_users()
-        return [
-            {
-                'id': user.id,
-                'first_name': user.first_name,
-                'last_name': user.last_name,
-                'email': user.email
-            }
-            for user in users
-        ], 200
+        try:
+            page_args = get_page_args()
+        except ValueError as e:
+            return {'error': str(e)}, 400
+
+        def build():
+            if page_args:
+                users, next_cursor = facade.get_users_page(*page_args)
+                return page_response(users, next_cursor, user_json)
+
+            users = facade.get_all_users()
+            return json_response(json_array([user_json(user) for user in users]))
+
+        return conditional(collection_etag('users', facade.get_version('users')), build)
+
+
+@api.route('/batch')
+class UserBatch(TimedResource):
+    @api.expect([user_model])
+    @api.response(201, 'All users created')
+    @api.response(207, 'Some users created, see errors')
+    @api.response(400, 'No users created')
+    def post(self):
+        """Create many users from a JSON array, reporting errors per item"""
+        try:
+            items = read_batch()
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        created, errors = create_batch(self.api, items, user_model, facade.create_users)
+        return batch_response(created, errors)
 
 
 @api.route('/<user_id>')
-class UserResource(Resource):
+class UserResource(TimedResource):
     @api.response(200, 'User details retrieved successfully')
+    @api.response(304, 'Not modified since the ETag in If-None-Match')
     @api.response(404, 'User not found')
     def get(self, user_id):
         user = facade.get_user(user_id)
         if not user:
             return {'error': 'User not found'}, 404
-        return {
-            'id': user.id,
-            'first_name': user.first_name,
-            'last_name': user.last_name,
-            'email': user.email
-        }, 200
+        return conditional(object_etag(user), lambda: (user_dict(user), 200))
 
     @api.expect(user_model, validate=True)
     @api.response(200, 'User updated successfully')
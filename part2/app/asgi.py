@@ -0,0 +1,264 @@
+"""
+ASGI serving mode: `uvicorn app.asgi:app` (any ASGI server works)
+"""
+
+
+import asyncio
+import concurrent.futures
+import io
+import re
+import sys
+import threading
+import time
+import traceback
+
+from werkzeug.http import parse_etags, quote_etag
+
+from app import create_app
+from app.instrumentation import recording
+from app.services import facade
+from app.services.async_facade import AsyncHBnBFacade
+from app.api.v1.etags import object_etag
+from app.api.v1.places import place_json
+from app.api.v1.users import user_json
+from app.api.v1.reviews import review_json
+
+
+# GET /api/v1/<collection>/<id> without a query string is answered on the event loop; anything
+# else (and an id that isn't found, so 404s and routes like /search keep
+# their Flask-RESTX behaviour) goes to the WSGI app in a worker thread
+_OBJECT_PATH = re.compile(r"^/api/v1/(places|users|reviews)/([^/]+)$")
+
+# how many response chunks a WSGI worker may run ahead of the client
+_STREAM_BACKLOG = 16
+# how often a worker blocked on a full queue checks whether the client left
+_PUT_POLL_SECONDS = 0.5
+# Flask rule of each natively served read, so /_metrics counts both paths together
+_OBJECT_RULES = {
+    "places": "GET /api/v1/places/<place_id>",
+    "users": "GET /api/v1/users/<user_id>",
+    "reviews": "GET /api/v1/reviews/<review_id>",
+}
+
+
+class _Disconnected(Exception):
+    """Raised in a WSGI worker whose client went away"""
+
+
+class HBnBASGI:
+    """
+    ASGI application in front of the Flask app. Object reads are served
+    natively through AsyncHBnBFacade; every other request runs the
+    existing synchronous handlers unchanged, one worker thread each, so
+    the event loop itself never blocks and idle keep-alive connections
+    cost no thread.
+    """
+
+    def __init__(self, wsgi_app, async_facade, executor=None):
+        # wsgi_app: the Flask app (or any WSGI callable wrapping it)
+        self.wsgi_app = wsgi_app
+        self.facade = async_facade
+        self.executor = executor
+        # request stats of the Flask app, when it has instrumentation on
+        self.metrics = getattr(wsgi_app, "extensions", {}).get("hbnb_metrics")
+        self._readers = {
+            "places": (async_facade.get_place, place_json),
+            "users": (async_facade.get_user, user_json),
+            "reviews": (async_facade.get_review, review_json),
+        }
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            raise ValueError(f"Unsupported ASGI scope type {scope['type']}")
+
+        body = await self._read_body(receive)
+        if scope["method"] in ("GET", "HEAD"):
+            match = _OBJECT_PATH.match(scope["path"])
+            # query options (?expand=) are the WSGI handlers' business
+            if match and not scope.get("query_string") and await self._serve_object(scope, send, *match.groups()):
+                return
+        await self._serve_wsgi(scope, body, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await self.facade.close()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    @staticmethod
+    async def _read_body(receive):
+        chunks = []
+        while True:
+            message = await receive()
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body"):
+                return b"".join(chunks)
+
+    # native object reads
+
+    async def _serve_object(self, scope, send, collection, obj_id):
+        if self.metrics is None:
+            return await self._send_object(scope, send, collection, obj_id)
+        with recording() as recorder:
+            served = await self._send_object(scope, send, collection, obj_id, recorder)
+        if served:
+            elapsed_ms = (time.perf_counter() - recorder.start) * 1000
+            self.metrics.record(_OBJECT_RULES[collection], elapsed_ms, served, recorder)
+        return served
+
+    async def _send_object(self, scope, send, collection, obj_id, recorder=None):
+        """
+        Answer the read and return its status, or False when the object
+        doesn't exist (the WSGI app then answers)
+        """
+        get, encode = self._readers[collection]
+        if recorder is None:
+            obj = await get(obj_id)
+        else:
+            with recorder.phase("facade"):
+                obj = await get(obj_id)
+        if obj is None:
+            return False
+        etag = object_etag(obj)
+        headers = [(b"etag", quote_etag(etag).encode())]
+        if_none_match = _header(scope, b"if-none-match")
+        if if_none_match and parse_etags(if_none_match).contains_weak(etag):
+            await _send_response(send, 304, headers, b"")
+            return 304
+        body = encode(obj) if scope["method"] == "GET" else b""
+        headers.append((b"content-type", b"application/json"))
+        await _send_response(send, 200, headers, body)
+        return 200
+
+    # everything else: the WSGI app in a worker thread
+
+    async def _serve_wsgi(self, scope, body, send):
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(_STREAM_BACKLOG)
+        # set once nobody reads the queue any more (the client went away)
+        cancelled = threading.Event()
+
+        def put(item):
+            # blocks the worker while the client is _STREAM_BACKLOG chunks
+            # behind, and gives up as soon as the response was abandoned
+            if cancelled.is_set():
+                raise _Disconnected()
+            future = asyncio.run_coroutine_threadsafe(queue.put(item), loop)
+            while True:
+                try:
+                    return future.result(_PUT_POLL_SECONDS)
+                except concurrent.futures.TimeoutError:
+                    if cancelled.is_set():
+                        future.cancel()
+                        raise _Disconnected()
+
+        def run():
+            # the whole response is produced on this one thread, so Flask's
+            # request context (and stream_with_context) behave as under WSGI
+            try:
+                try:
+                    def start_response(status, headers, exc_info=None):
+                        put(("start", int(status.split(" ", 1)[0]), headers))
+                    result = self.wsgi_app(_environ(scope, body), start_response)
+                    try:
+                        for chunk in result:
+                            if chunk:
+                                put(("body", chunk))
+                    finally:
+                        if hasattr(result, "close"):
+                            result.close()
+                except _Disconnected:
+                    raise
+                except Exception as err:
+                    put(("error", err))
+                put(("end",))
+            except _Disconnected:
+                # the result was closed above, which ends the request in Flask
+                pass
+
+        worker = loop.run_in_executor(self.executor, run)
+        started = False
+        try:
+            while True:
+                item = await queue.get()
+                if item[0] == "start":
+                    headers = [(name.lower().encode("latin-1"), value.encode("latin-1"))
+                               for name, value in item[2]]
+                    await send({"type": "http.response.start", "status": item[1], "headers": headers})
+                    started = True
+                elif item[0] == "body":
+                    await send({"type": "http.response.body", "body": item[1], "more_body": True})
+                elif item[0] == "error":
+                    traceback.print_exception(item[1], file=sys.stderr)
+                    if not started:
+                        # a complete response; nothing more is sent after it
+                        await _send_response(send, 500, [(b"content-type", b"text/plain")],
+                                             b"Internal Server Error")
+                else:
+                    if started:
+                        await send({"type": "http.response.body", "body": b"", "more_body": False})
+                    break
+        except BaseException:
+            # send failed or this task was cancelled: stop the worker at its next
+            # put instead of leaving it blocked on a queue nobody drains
+            cancelled.set()
+            raise
+        await worker
+
+
+def _header(scope, name):
+    for key, value in scope["headers"]:
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+async def _send_response(send, status, headers, body):
+    await send({"type": "http.response.start", "status": status, "headers": headers})
+    await send({"type": "http.response.body", "body": body})
+
+
+def _environ(scope, body):
+    server = scope.get("server") or ("localhost", 80)
+    client = scope.get("client") or ("", 0)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", ""),
+        "PATH_INFO": scope["path"],
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1]),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "REMOTE_ADDR": client[0],
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": False,
+        "wsgi.run_once": False,
+        "CONTENT_LENGTH": str(len(body)),
+    }
+    for key, value in scope["headers"]:
+        name = key.decode("latin-1").upper().replace("-", "_")
+        value = value.decode("latin-1")
+        if name == "CONTENT_TYPE":
+            environ["CONTENT_TYPE"] = value
+        elif name != "CONTENT_LENGTH":
+            name = f"HTTP_{name}"
+            environ[name] = f"{environ[name]},{value}" if name in environ else value
+    return environ
+
+
+def create_asgi_app(executor=None):
+    return HBnBASGI(create_app(), AsyncHBnBFacade(facade, executor), executor)
+
+
+app = create_asgi_app()
@@ -0,0 +1,315 @@
+"""
+Opt-in request instrumentation (config METRICS): per-endpoint latency
+histograms, each request's time split by phase, repository operation
+counts, and sampled cProfile dumps of slow requests.
+"""
+
+
+import cProfile
+import functools
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+
+from flask import abort, current_app, g, jsonify, request
+from flask_restx import Resource
+from flask_restx.representations import output_json
+
+
+# latency histogram bucket upper bounds, in milliseconds (the last one catches the rest)
+BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, float("inf"))
+PHASES = ("validate", "facade", "repo", "serialize")
+REPOSITORY_METHODS = ("add", "add_many", "get", "get_many", "get_all", "get_page", "update",
+                      "delete", "get_by_attribute", "get_all_by_attribute", "iter_sorted")
+
+# recorder of the request being handled on this thread / task, None outside one
+_current = ContextVar("hbnb_request_recorder", default=None)
+_NOT_RECORDING = nullcontext()
+# one cProfile at a time in the process: profilers don't nest, and since
+# Python 3.12 enabling a second one raises ValueError
+_profiler_lock = threading.Lock()
+
+
+class RequestRecorder:
+    """
+    Time of one request, split by phase. Phases nest (a facade call
+    makes repository calls): time is charged to the innermost phase only,
+    so the phases add up to at most the request's total.
+    """
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.phases = dict.fromkeys(PHASES, 0.0)
+        self.repo_ops = {}
+        self._stack = []
+        self._since = self.start
+
+    @contextmanager
+    def phase(self, name):
+        now = time.perf_counter()
+        if self._stack:
+            self.phases[self._stack[-1]] += now - self._since
+        self._stack.append(name)
+        self._since = now
+        try:
+            yield
+        finally:
+            now = time.perf_counter()
+            self.phases[self._stack.pop()] += now - self._since
+            self._since = now
+
+    def count_repo_op(self, op):
+        self.repo_ops[op] = self.repo_ops.get(op, 0) + 1
+
+
+@contextmanager
+def recording():
+    """
+    Record a request handled outside Flask's hooks: yields its RequestRecorder,
+    current for the block so timed() and the instrumented facade report to it
+    """
+    recorder = RequestRecorder()
+    token = _current.set(recorder)
+    try:
+        yield recorder
+    finally:
+        _current.reset(token)
+
+
+def timed(phase):
+    """
+    Context manager charging its block to `phase` of the current request;
+    a shared no-op when nothing is being recorded
+    """
+    recorder = _current.get()
+    return recorder.phase(phase) if recorder is not None else _NOT_RECORDING
+
+
+class _EndpointStats:
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.buckets = [0] * len(BUCKETS_MS)
+        self.phase_ms = dict.fromkeys(PHASES, 0.0)
+        self.repo_ops = {}
+
+    def record(self, elapsed_ms, status, recorder):
+        self.requests += 1
+        if status >= 500:
+            self.errors += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.buckets[next(i for i, bound in enumerate(BUCKETS_MS) if elapsed_ms <= bound)] += 1
+        for phase, seconds in recorder.phases.items():
+            self.phase_ms[phase] += seconds * 1000
+        for op, count in recorder.repo_ops.items():
+            self.repo_ops[op] = self.repo_ops.get(op, 0) + count
+
+    def to_dict(self):
+        n = self.requests or 1
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "mean_ms": round(self.total_ms / n, 3),
+            "max_ms": round(self.max_ms, 3),
+            "histogram_ms": {("+Inf" if bound == float("inf") else str(bound)): count
+                             for bound, count in zip(BUCKETS_MS, self.buckets)},
+            "mean_phase_ms": {phase: round(ms / n, 3) for phase, ms in self.phase_ms.items()},
+            "mean_repo_ops": {op: round(count / n, 3) for op, count in sorted(self.repo_ops.items())},
+        }
+
+
+class Metrics:
+    """
+    Aggregated stats per endpoint ("GET /api/v1/places/<place_id>"), plus
+    the sampled profiler: with profile_slow_ms set, a `profile_sample_rate`
+    fraction of requests run under cProfile and the ones slower than
+    profile_slow_ms are dumped to profile_dir (open with pstats/snakeviz).
+    """
+
+    def __init__(self, profile_slow_ms=0, profile_sample_rate=0.1, profile_dir="profiles"):
+        self.profile_slow_ms = profile_slow_ms
+        self.profile_sample_rate = profile_sample_rate
+        self.profile_dir = profile_dir
+        self._endpoints = {}
+        self._lock = threading.Lock()
+        # set by install(): undoes its instrument_facade
+        self.release_facade = lambda: None
+
+    def before_request(self):
+        g.hbnb_recorder = recorder = RequestRecorder()
+        g.hbnb_recorder_token = _current.set(recorder)
+        g.hbnb_status = 500
+        g.hbnb_profiler = None
+        if (self.profile_slow_ms and random.random() < self.profile_sample_rate
+                and _profiler_lock.acquire(blocking=False)):
+            # sampled, and no other request is being profiled
+            g.hbnb_profiler = cProfile.Profile()
+            g.hbnb_profiler.enable()
+
+    def after_request(self, response):
+        g.hbnb_status = response.status_code
+        return response
+
+    def teardown_request(self, exc=None):
+        recorder = g.pop("hbnb_recorder", None)
+        if recorder is None:
+            return
+        elapsed_ms = (time.perf_counter() - recorder.start) * 1000
+        try:
+            _current.reset(g.pop("hbnb_recorder_token"))
+        except ValueError:
+            # torn down from another context (e.g. a streamed response closed elsewhere)
+            _current.set(None)
+        rule = request.url_rule.rule if request.url_rule else "<unmatched>"
+        endpoint = f"{request.method} {rule}"
+
+        profiler = g.pop("hbnb_profiler", None)
+        if profiler is not None:
+            profiler.disable()
+            _profiler_lock.release()
+            if elapsed_ms >= self.profile_slow_ms:
+                self._dump(profiler, endpoint, elapsed_ms)
+
+        self.record(endpoint, elapsed_ms, g.get("hbnb_status", 500), recorder)
+
+    def record(self, endpoint, elapsed_ms, status, recorder):
+        """
+        Add one finished request; also used by the ASGI mode for the reads it
+        answers without Flask
+        """
+        with self._lock:
+            stats = self._endpoints.get(endpoint)
+            if stats is None:
+                stats = self._endpoints[endpoint] = _EndpointStats()
+            stats.record(elapsed_ms, status, recorder)
+
+    def _dump(self, profiler, endpoint, elapsed_ms):
+        os.makedirs(self.profile_dir, exist_ok=True)
+        name = "".join(c if c.isalnum() else "_" for c in endpoint).strip("_")
+        profiler.dump_stats(os.path.join(
+            self.profile_dir, f"{time.strftime('%Y%m%d-%H%M%S')}-{name}-{elapsed_ms:.0f}ms.prof"))
+
+    def snapshot(self):
+        with self._lock:
+            return {endpoint: stats.to_dict() for endpoint, stats in sorted(self._endpoints.items())}
+
+    def reset(self):
+        with self._lock:
+            self._endpoints.clear()
+
+
+def _timed_call(phase, method, on_call=None):
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        recorder = _current.get()
+        if recorder is None:
+            return method(*args, **kwargs)
+        if on_call:
+            on_call(recorder)
+        with recorder.phase(phase):
+            return method(*args, **kwargs)
+    return wrapper
+
+
+class TimedResource(Resource):
+    """
+    Base of the API resources: charges payload validation (run by
+    dispatch_request before the handler) to the validate phase
+    """
+
+    def validate_payload(self, func):
+        with timed("validate"):
+            return super().validate_payload(func)
+
+
+# id(facade) -> [facade, users, (obj, attribute) pairs wrapped], see instrument_facade
+_instrumented = {}
+_instrumented_lock = threading.Lock()
+
+
+def instrument_facade(facade):
+    """
+    Charge the facade's public methods and its repositories' operations to
+    the facade and repo phases. Returns a function undoing it: the wrappers
+    are instance attributes, shared by every caller and removed once the
+    last one released them. Outside an instrumented request they only
+    check a context variable.
+    """
+    with _instrumented_lock:
+        entry = _instrumented.get(id(facade))
+        if entry is None:
+            wrapped = []
+            for name in dir(type(facade)):
+                if not name.startswith("_") and callable(getattr(type(facade), name)):
+                    setattr(facade, name, _timed_call("facade", getattr(facade, name)))
+                    wrapped.append((facade, name))
+            for repo in {id(repo): repo for repo in facade._repos.values()}.values():
+                for op in REPOSITORY_METHODS:
+                    method = getattr(repo, op, None)
+                    if method is not None:
+                        setattr(repo, op, _timed_call(
+                            "repo", method, functools.partial(RequestRecorder.count_repo_op, op=op)))
+                        wrapped.append((repo, op))
+            entry = _instrumented[id(facade)] = [facade, 0, wrapped]
+        entry[1] += 1
+
+    def release():
+        with _instrumented_lock:
+            entry[1] -= 1
+            if entry[1] == 0:
+                for obj, name in entry[2]:
+                    delattr(obj, name)
+                del _instrumented[id(facade)]
+    return release
+
+
+def install(app, api, facade):
+    """
+    Turn instrumentation on for `app` (the Flask app and its Flask-RESTX Api)
+    and serve the collected stats at /api/v1/_metrics
+    """
+    metrics = Metrics(app.config.get("PROFILE_SLOW_MS", 0),
+                      app.config.get("PROFILE_SAMPLE_RATE", 0.1),
+                      app.config.get("PROFILE_DIR", "profiles"))
+    app.extensions["hbnb_metrics"] = metrics
+    app.before_request(metrics.before_request)
+    app.after_request(metrics.after_request)
+    app.teardown_request(metrics.teardown_request)
+    # until uninstall(app)
+    metrics.release_facade = instrument_facade(facade)
+
+    # payload validation is timed by TimedResource; dict responses are
+    # encoded by the Api's JSON representation
+    @api.representation("application/json")
+    def timed_output_json(data, code, headers=None):
+        with timed("serialize"):
+            return output_json(data, code, headers)
+
+    def metrics_view():
+        current = current_app.extensions.get("hbnb_metrics")
+        if current is None:
+            abort(404)
+        return jsonify({"endpoints": current.snapshot(), "caches": facade.cache_stats()})
+    app.add_url_rule("/api/v1/_metrics", "hbnb_metrics", metrics_view)
+    return metrics
+
+
+def uninstall(app):
+    """
+    Undo install(): the app stops recording, and the facade is unwrapped
+    once no other app has instrumentation on
+    """
+    metrics = app.extensions.pop("hbnb_metrics", None)
+    if metrics is None:
+        return
+    app.before_request_funcs[None].remove(metrics.before_request)
+    app.after_request_funcs[None].remove(metrics.after_request)
+    app.teardown_request_funcs[None].remove(metrics.teardown_request)
+    metrics.release_facade()
@@ -8,6 +8,9 @@ from app.models.base_model import BaseModel
 
 
 class Amenity(BaseModel):
+    __slots__ = ("name", "description")
+    EDITABLE_FIELDS = ("name", "description")
+
     def __init__(self, name, description=""):
         super().__init__()
 
@@ -16,8 +19,3 @@ class Amenity(BaseModel):
 
         self.name = name
         self.description = description
-
-    # update ammenity attributes from a dict
-    def update(self, data):
-        for key, value in data.items():
-            setattr(self, key, value)
\ No newline at end of file
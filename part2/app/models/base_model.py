@@ -6,26 +6,75 @@ Base model class for common attributes
 
 # unique identifiers model
 import uuid
+# epoch seconds for the stored timestamps
+import time
 # imports datetime class from datetime module to work with dates/times
 from datetime import datetime
 
 
 class BaseModel:
+    # __slots__ instead of a per-instance __dict__: every model declares its
+    # attributes, which keeps each of the (many) resident objects small
+    __slots__ = ("id", "_created", "_updated", "_serialized")
+    # the attributes update() may set; each model lists its own
+    EDITABLE_FIELDS = ()
+
     def __init__(self):
         # 4 is the version of UUID being generated
         # 4 completely randomises numbers
         # creates a new id for each object instance
         self.id = str(uuid.uuid4())
-        # sets created_at attribute to current date and time when the object is created
-        self.created_at = datetime.now()
-        # Sets the updated_at attribute to the current date and time (initially same as created_at)
-        self.updated_at = datetime.now()
+        # timestamps are kept as epoch floats and exposed as datetimes by
+        # the created_at / updated_at properties below
+        now = time.time()
+        # sets created_at to current date and time when the object is created
+        self._created = now
+        # Sets updated_at to the current date and time (initially same as created_at)
+        self._updated = now
+        # (updated_at, {view: representation}) built by serialized()
+        self._serialized = None
+
+    @property
+    def created_at(self):
+        return datetime.fromtimestamp(self._created)
+
+    @created_at.setter
+    def created_at(self, value):
+        self._created = value.timestamp() if isinstance(value, datetime) else float(value)
+
+    @property
+    def updated_at(self):
+        return datetime.fromtimestamp(self._updated)
+
+    @updated_at.setter
+    def updated_at(self, value):
+        self._updated = value.timestamp() if isinstance(value, datetime) else float(value)
 
     def save(self):
         """
         Update the updated_at timestamp whenever the object is modified
         """
-        self.updated_at = datetime.now()
+        self._updated = time.time()
+        # any cached representation is stale now
+        self._serialized = None
+
+    def serialized(self, view, build, store=True):
+        """
+        Return build(self) for the named view, cached until updated_at changes.
+        With store=False a valid cached value is still used but a new one isn't kept.
+        """
+        cache = self._serialized
+        # keyed by updated_at too, since some callers set it directly instead of calling save()
+        if cache is None or cache[0] != self._updated:
+            if not store:
+                return build(self)
+            cache = (self._updated, {})
+            self._serialized = cache
+        if view not in cache[1]:
+            if not store:
+                return build(self)
+            cache[1][view] = build(self)
+        return cache[1][view]
 
     def update(self, data):
         """
@@ -33,8 +82,9 @@ class BaseModel:
         """
         # loops through each key-value pair in data dictionary
         for key, value in data.items():
-            # checks if the object has an attribute with that key name (safety check)
-            if hasattr(self, key):
+            # only editable fields (safety check): ids, timestamps, the
+            # serialization cache and relations can't be set from a payload
+            if key in self.EDITABLE_FIELDS:
                 # sets the attribute to new value if it exists
                 setattr(self, key, value)
                 # updates the updated_at timestamp
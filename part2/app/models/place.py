@@ -8,6 +8,9 @@ from app.models.base_model import BaseModel
 
 
 class Place(BaseModel):
+    __slots__ = ("title", "description", "price", "latitude", "longitude", "owner",
+                 "reviews", "amenities", "rating_count", "rating_sum", "rating_histogram")
+
     def __init__(self, title, description, price, latitude, longitude, owner):
         super().__init__()
 
@@ -28,10 +31,15 @@ class Place(BaseModel):
         self.latitude = latitude
         self.longitude = longitude
         self.owner = owner
-        # List to store related reviews
-        self.reviews = []
+        # Related reviews keyed by id: O(1) removal, iterates in creation order
+        self.reviews = {}
         # List to store related amenties
         self.amenities = []
+        # Running rating aggregates, kept in step with self.reviews
+        self.rating_count = 0
+        self.rating_sum = 0
+        # rating_histogram[0] counts 1-star reviews ... rating_histogram[4] counts 5-star
+        self.rating_histogram = [0, 0, 0, 0, 0]
 
         def update(self, data: dict):
             if "title" in data:
@@ -59,31 +67,39 @@ class Place(BaseModel):
                     raise ValueError("Owner (User) is required")
                 self.owner = data["owner"]
 
+    # what update() may change: the relations as objects (owner, amenities)
+    EDITABLE_FIELDS = ("title", "description", "price", "latitude", "longitude", "owner", "amenities")
+
     def update(self, data: dict):
+        # everything is checked before anything is set, so a rejected update
+        # leaves the place unchanged
         if "title" in data:
             if not data["title"] or len(data["title"]) > 100:
                 raise ValueError("Title is required and must be less than 100 characters")
-            self.title = data["title"]
         
         if "price" in data:
             if data["price"] < 0:
                 raise ValueError("Price must be a positive number")
-            self.price = data["price"]
 
         if "latitude" in data:
             if not (-90.0 <= data["latitude"] <= 90.0):
                 raise ValueError("Latitude must be between -90.0 and 90.0")
-            self.latitude = data["latitude"]
 
         if "longitude" in data:
             if not (-180.0 <= data["longitude"] <= 180.0):
                 raise ValueError("Longitude must be between -180.0 and 180.0")
-            self.longitude = data["longitude"]
 
         if "owner" in data:
             if not data["owner"]:
                 raise ValueError("Owner (User) is required")
-            self.owner = data["owner"]
+
+        changed = False
+        for field in self.EDITABLE_FIELDS:
+            if field in data:
+                setattr(self, field, data[field])
+                changed = True
+        if changed:
+            self.save()
 
     def to_dict(self):
         return {
@@ -95,13 +111,56 @@ class Place(BaseModel):
             "longitude": self.longitude,
             "owner_id": self.owner.id if self.owner else None,
             "amenity_ids": [amenity.id for amenity in self.amenities],
+            "rating_count": self.rating_count,
+            "average_rating": self.average_rating,
+            "rating_histogram": list(self.rating_histogram),
         }
 
+    @property
+    def average_rating(self):
+        """
+        Mean star rating rounded to 2 places, None until the first review
+        """
+        if not self.rating_count:
+            return None
+        return round(self.rating_sum / self.rating_count, 2)
+
     def add_review(self, review):
         """
         Add review to place
         """
-        self.reviews.append(review)
+        self.reviews[review.id] = review
+        self.rating_count += 1
+        self.rating_sum += review.rating
+        self.rating_histogram[review.rating - 1] += 1
+
+    def remove_review(self, review):
+        """
+        Remove a review from place
+        """
+        if self.reviews.pop(review.id, None) is None:
+            return
+        self.rating_count -= 1
+        self.rating_sum -= review.rating
+        self.rating_histogram[review.rating - 1] -= 1
+
+    def add_ratings(self, histogram):
+        """
+        Count ratings of reviews that aren't in self.reviews yet, given as
+        a rating_histogram
+        """
+        for stars, count in enumerate(histogram, 1):
+            self.rating_count += count
+            self.rating_sum += stars * count
+            self.rating_histogram[stars - 1] += count
+
+    def change_rating(self, old_rating, new_rating):
+        """
+        Move one review's rating from old_rating to new_rating
+        """
+        self.rating_sum += new_rating - old_rating
+        self.rating_histogram[old_rating - 1] -= 1
+        self.rating_histogram[new_rating - 1] += 1
 
     def add_amentiy(self, amenity):
         """
@@ -8,6 +8,9 @@ from app.models.base_model import BaseModel
 
 
 class Review(BaseModel):
+    __slots__ = ("text", "rating", "place", "user")
+    EDITABLE_FIELDS = ("text", "rating")
+
     def __init__(self, text, rating, place, user):
         super().__init__()
 
@@ -9,6 +9,10 @@ from app.models.base_model import BaseModel
 
 
 class User(BaseModel):
+    __slots__ = ("first_name", "last_name", "email", "password", "is_admin", "reviews")
+    # what an update (PUT /users/<id>) may change
+    EDITABLE_FIELDS = ("first_name", "last_name", "email")
+
     # remove =None for password once proper authentication is added
     def __init__(self, first_name, last_name, email, password=None, is_admin=False):
         # Calls the parent class (BaseModel) constructor first, which sets up the id, created_at, and updated_at attributes
@@ -30,6 +34,20 @@ class User(BaseModel):
         self.email = email
         self.password = password
         self.is_admin = is_admin
+        # Reviews written by this user keyed by id, in creation order
+        self.reviews = {}
+
+    def add_review(self, review):
+        """
+        Record a review written by this user
+        """
+        self.reviews[review.id] = review
+
+    def remove_review(self, review):
+        """
+        Forget a review written by this user
+        """
+        self.reviews.pop(review.id, None)
 
     def _is_valid_email(self, email):
         return re.match(r"[^@]+@[^@]+\.[^@]+", email)
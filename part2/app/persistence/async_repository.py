@@ -0,0 +1,116 @@
+"""
+Asynchronous repository interface, for the ASGI serving mode
+"""
+
+
+import asyncio
+import contextvars
+import functools
+from abc import ABC, abstractmethod
+
+
+class AsyncRepository(ABC):
+    """
+    Awaitable counterpart of Repository. Index declarations (add_index,
+    add_sorted_index) are setup-time and stay on the synchronous repository.
+    """
+
+    @abstractmethod
+    async def add(self, obj):
+        pass
+
+    @abstractmethod
+    async def add_many(self, objs):
+        pass
+
+    @abstractmethod
+    async def get(self, obj_id):
+        pass
+
+    @abstractmethod
+    async def get_many(self, obj_ids):
+        pass
+
+    @abstractmethod
+    async def get_all(self):
+        pass
+
+    @abstractmethod
+    async def get_page(self, cursor=None, limit=20):
+        pass
+
+    @abstractmethod
+    async def update(self, obj_id, data):
+        pass
+
+    @abstractmethod
+    async def delete(self, obj_id):
+        pass
+
+    @abstractmethod
+    async def get_by_attribute(self, attr_name, attr_value):
+        pass
+
+    @abstractmethod
+    async def get_all_by_attribute(self, attr_name, attr_value):
+        pass
+
+    @abstractmethod
+    async def get_version(self):
+        pass
+
+
+class ThreadedAsyncRepository(AsyncRepository):
+    """
+    AsyncRepository over a synchronous one. With offload=True each call
+    runs in `executor` (the loop's default pool when None), so a blocking
+    store (SQLite) never stalls the event loop; with offload=False calls
+    run inline, which is cheaper for in-memory repositories whose
+    operations never wait on I/O.
+    """
+
+    def __init__(self, repo, offload=True, executor=None):
+        self.repo = repo
+        self.offload = offload
+        self.executor = executor
+
+    async def _run(self, method, *args):
+        if not self.offload:
+            return method(*args)
+        loop = asyncio.get_running_loop()
+        # the caller's context goes along, so request instrumentation sees the call
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(self.executor, functools.partial(context.run, method, *args))
+
+    async def add(self, obj):
+        return await self._run(self.repo.add, obj)
+
+    async def add_many(self, objs):
+        return await self._run(self.repo.add_many, objs)
+
+    async def get(self, obj_id):
+        return await self._run(self.repo.get, obj_id)
+
+    async def get_many(self, obj_ids):
+        return await self._run(self.repo.get_many, obj_ids)
+
+    async def get_all(self):
+        return await self._run(self.repo.get_all)
+
+    async def get_page(self, cursor=None, limit=20):
+        return await self._run(self.repo.get_page, cursor, limit)
+
+    async def update(self, obj_id, data):
+        return await self._run(self.repo.update, obj_id, data)
+
+    async def delete(self, obj_id):
+        return await self._run(self.repo.delete, obj_id)
+
+    async def get_by_attribute(self, attr_name, attr_value):
+        return await self._run(self.repo.get_by_attribute, attr_name, attr_value)
+
+    async def get_all_by_attribute(self, attr_name, attr_value):
+        return await self._run(self.repo.get_all_by_attribute, attr_name, attr_value)
+
+    async def get_version(self):
+        return await self._run(self.repo.get_version)
@@ -0,0 +1,214 @@
+"""
+Read-through cache in front of any Repository
+"""
+
+
+import threading
+import time
+from collections import OrderedDict
+
+from app.persistence.repository import Repository
+
+
+class CachedRepository(Repository):
+    """
+    Wraps a Repository and keeps the most recently read objects: get(),
+    get_many() and get_by_attribute() are answered from the cache when
+    they can, everything else goes straight to the wrapped repository.
+
+    - bounded: at most max_size entries, least recently used evicted first
+    - ttl (seconds, optional): entries older than that are read again
+    - write-through: update() and delete() go to the repository, then drop
+      every entry of that object (by id and by attribute)
+    - hits / misses / evictions counters, see stats()
+
+    Only found objects are cached; a miss for an unknown id always asks
+    the repository, so objects added since are seen at once.
+    Backend-specific methods (replay, snapshot...) pass through.
+    """
+
+    def __init__(self, repo, max_size=1024, ttl=None, clock=time.monotonic):
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self.repo = repo
+        self.max_size = max_size
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        # key -> (obj, expiry or None), oldest use first; keys are ("id", obj_id)
+        # and ("attr", attr_name, value)
+        self._entries = OrderedDict()
+        # obj_id -> the attribute keys caching it, so a write can drop them
+        self._attr_keys = {}
+        # bumped by every write: a read that started before one doesn't store
+        # what it read, which may be the object the write just deleted
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __getattr__(self, name):
+        return getattr(self.repo, name)
+
+    # cache bookkeeping, callers hold _lock
+
+    def _lookup(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        obj, expiry = entry
+        if expiry is not None and expiry <= self._clock():
+            self._discard(key)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return obj
+
+    def _store(self, key, obj, generation):
+        if generation != self._generation:
+            return
+        expiry = None if self.ttl is None else self._clock() + self.ttl
+        self._entries[key] = (obj, expiry)
+        self._entries.move_to_end(key)
+        if key[0] == "attr":
+            self._attr_keys.setdefault(obj.id, set()).add(key)
+        while len(self._entries) > self.max_size:
+            oldest = next(iter(self._entries))
+            self._discard(oldest)
+            self.evictions += 1
+
+    def _discard(self, key):
+        obj, _ = self._entries.pop(key)
+        if key[0] == "attr":
+            keys = self._attr_keys.get(obj.id)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._attr_keys[obj.id]
+
+    def _invalidate(self, obj_id):
+        self._generation += 1
+        self._entries.pop(("id", obj_id), None)
+        for key in self._attr_keys.pop(obj_id, ()):
+            self._entries.pop(key, None)
+
+    def invalidate(self, obj_id=None):
+        """
+        Drop one object from the cache, or everything when obj_id is None
+        """
+        with self._lock:
+            if obj_id is not None:
+                self._invalidate(obj_id)
+                return
+            self._generation += 1
+            self._entries.clear()
+            self._attr_keys.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            }
+
+    # reads
+
+    def get(self, obj_id):
+        key = ("id", obj_id)
+        with self._lock:
+            obj = self._lookup(key)
+            generation = self._generation
+        if obj is not None:
+            return obj
+        obj = self.repo.get(obj_id)
+        if obj is not None:
+            with self._lock:
+                self._store(key, obj, generation)
+        return obj
+
+    def get_many(self, obj_ids):
+        found, pending = {}, []
+        with self._lock:
+            for obj_id in dict.fromkeys(obj_ids):
+                obj = self._lookup(("id", obj_id))
+                if obj is not None:
+                    found[obj_id] = obj
+                else:
+                    pending.append(obj_id)
+            generation = self._generation
+        if pending:
+            loaded = self.repo.get_many(pending)
+            with self._lock:
+                for obj_id, obj in loaded.items():
+                    self._store(("id", obj_id), obj, generation)
+            found.update(loaded)
+        return found
+
+    def get_by_attribute(self, attr_name, attr_value):
+        key = ("attr", attr_name, attr_value)
+        with self._lock:
+            obj = self._lookup(key)
+            generation = self._generation
+        if obj is not None:
+            return obj
+        obj = self.repo.get_by_attribute(attr_name, attr_value)
+        if obj is not None:
+            with self._lock:
+                self._store(key, obj, generation)
+        return obj
+
+    def get_all(self):
+        return self.repo.get_all()
+
+    def get_page(self, cursor=None, limit=20):
+        return self.repo.get_page(cursor, limit)
+
+    def get_all_by_attribute(self, attr_name, attr_value):
+        return self.repo.get_all_by_attribute(attr_name, attr_value)
+
+    def iter_sorted(self, attr_name, low=None, high=None, reverse=False, after=None, with_keys=False):
+        return self.repo.iter_sorted(attr_name, low, high, reverse, after, with_keys)
+
+    def get_version(self):
+        return self.repo.get_version()
+
+    # writes
+
+    def add(self, obj):
+        self.repo.add(obj)
+
+    def add_many(self, objs):
+        self.repo.add_many(objs)
+
+    def update(self, obj_id, data):
+        try:
+            return self.repo.update(obj_id, data)
+        finally:
+            # also when the update was rejected: the object may have been loaded
+            # or changed before the repository refused it
+            with self._lock:
+                self._invalidate(obj_id)
+
+    def delete(self, obj_id):
+        try:
+            return self.repo.delete(obj_id)
+        finally:
+            with self._lock:
+                self._invalidate(obj_id)
+
+    def add_index(self, attr_name, unique=False, key=None):
+        self.repo.add_index(attr_name, unique=unique, key=key)
+
+    def add_sorted_index(self, attr_name):
+        self.repo.add_sorted_index(attr_name)
+
+    def close(self):
+        self.repo.close()
@@ -0,0 +1,104 @@
+"""
+Column-oriented mirror of the place repository for vectorized filtering
+"""
+
+
+import logging
+
+try:
+    import numpy as np
+except ImportError:
+    # listed in requirements.txt; without it the facade still works but
+    # filter_places scans every place object
+    np = None
+    logging.getLogger(__name__).warning(
+        "numpy is not installed: filter_places falls back to scanning every place")
+
+
+class PlaceColumns:
+    """
+    Keeps price, coordinates and rating aggregates of every place in NumPy
+    arrays (one row per place, plus an id <-> row map), so a filter is a
+    handful of vectorized comparisons instead of a Python loop over objects.
+    Rows are appended in creation order; removed rows are only masked out
+    and are dropped the next time the arrays grow.
+    """
+
+    COLUMNS = ("price", "latitude", "longitude", "average_rating", "rating_count")
+
+    def __init__(self, capacity=1024):
+        if np is None:
+            raise RuntimeError("PlaceColumns needs numpy installed")
+        self._ids = []
+        self._rows = {}
+        self._size = 0
+        self._alive = np.zeros(capacity, dtype=bool)
+        self._data = {name: np.zeros(capacity, dtype=np.float64) for name in self.COLUMNS}
+
+    def __len__(self):
+        return len(self._rows)
+
+    def _grow(self):
+        # drop dead rows first; only really grow if that doesn't free enough space
+        live = np.flatnonzero(self._alive[:self._size])
+        capacity = len(self._alive)
+        if len(live) * 2 > capacity:
+            capacity *= 2
+        alive = np.zeros(capacity, dtype=bool)
+        alive[:len(live)] = True
+        for name in self.COLUMNS:
+            column = np.zeros(capacity, dtype=np.float64)
+            column[:len(live)] = self._data[name][live]
+            self._data[name] = column
+        self._ids = [self._ids[row] for row in live]
+        self._rows = {obj_id: row for row, obj_id in enumerate(self._ids)}
+        self._alive = alive
+        self._size = len(live)
+
+    def upsert(self, place):
+        """
+        Insert the place or refresh its row
+        """
+        row = self._rows.get(place.id)
+        if row is None:
+            if self._size == len(self._alive):
+                self._grow()
+            row = self._size
+            self._size += 1
+            self._ids.append(place.id)
+            self._rows[place.id] = row
+            self._alive[row] = True
+        self._data["price"][row] = place.price
+        self._data["latitude"][row] = place.latitude
+        self._data["longitude"][row] = place.longitude
+        average = place.average_rating
+        self._data["average_rating"][row] = np.nan if average is None else average
+        self._data["rating_count"][row] = place.rating_count
+
+    def remove(self, obj_id):
+        row = self._rows.pop(obj_id, None)
+        if row is not None:
+            self._alive[row] = False
+
+    def filter(self, min_price=None, max_price=None, bbox=None):
+        """
+        Ids of places matching every given predicate, in creation order.
+        bbox is (min_lon, min_lat, max_lon, max_lat); min_lon > max_lon crosses the antimeridian.
+        """
+        n = self._size
+        mask = self._alive[:n].copy()
+        price = self._data["price"][:n]
+        if min_price is not None:
+            mask &= price >= min_price
+        if max_price is not None:
+            mask &= price <= max_price
+        if bbox is not None:
+            min_lon, min_lat, max_lon, max_lat = bbox
+            lat = self._data["latitude"][:n]
+            lon = self._data["longitude"][:n]
+            mask &= (lat >= min_lat) & (lat <= max_lat)
+            if min_lon <= max_lon:
+                mask &= (lon >= min_lon) & (lon <= max_lon)
+            else:
+                mask &= (lon >= min_lon) | (lon <= max_lon)
+        return [self._ids[row] for row in np.flatnonzero(mask)]
@@ -0,0 +1,238 @@
+"""
+Append-only write-ahead log with snapshots, for InMemoryRepository
+"""
+
+
+import atexit
+import json
+import os
+import re
+import threading
+import time
+
+from app.persistence.mmap_snapshot import MmapSnapshot, write_snapshot
+
+
+class _Flusher:
+    """
+    The one background thread flushing every open Journal, each at its own
+    flush_interval. It runs while there is a journal to flush.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # journal -> monotonic time of its next flush
+        self._due = {}
+        self._thread = None
+
+    def add(self, journal):
+        with self._lock:
+            self._due[journal] = time.monotonic() + journal.flush_interval
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="journal-flusher", daemon=True)
+                self._thread.start()
+
+    def remove(self, journal):
+        with self._lock:
+            self._due.pop(journal, None)
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if not self._due:
+                    self._thread = None
+                    return
+                now = time.monotonic()
+                ready = [journal for journal, due in self._due.items() if due <= now]
+                for journal in ready:
+                    self._due[journal] = now + journal.flush_interval
+                wait = min(self._due.values()) - now
+            for journal in ready:
+                journal._tick()
+            if wait > 0:
+                time.sleep(wait)
+
+
+_flusher = _Flusher()
+
+
+class Journal:
+    """
+    Durable history of one table, kept in `directory` as
+
+        <table>.<gen>.log    one JSON line per write since snapshot <gen>
+        <table>.<gen>.snap   every record at the moment log <gen> was started,
+                             in the mmap format of mmap_snapshot.py
+
+    Writes are appended to a memory buffer (group commit); a background
+    thread, shared by all journals, writes the buffer out and fsyncs it
+    every `flush_interval` seconds, so a write costs a JSON encode and a
+    list append, and a crash loses at most the last interval. sync() forces
+    the buffer to disk.
+
+    A put entry holds the full record (ModelSchema.to_record), so replaying
+    an entry twice is harmless. That lets snapshots be taken while writes
+    continue: rotate() starts a new log under the repository's write lock,
+    and the snapshot of that moment is written afterwards. Startup reads
+    the newest complete snapshot plus the logs from its generation on.
+    Once `snapshot_every` entries went to the current log, the flush
+    thread asks the repository for a snapshot, run on a thread of its own
+    so the other journals keep being flushed meanwhile.
+    """
+
+    def __init__(self, directory, schema, flush_interval=0.005, snapshot_every=10000):
+        self.directory = directory
+        self.schema = schema
+        self.flush_interval = flush_interval
+        self.snapshot_every = snapshot_every
+        os.makedirs(directory, exist_ok=True)
+
+        # pending encoded lines; swapped out whole by the flusher
+        self._buffer = []
+        self._buffer_lock = threading.Lock()
+        # serializes file writes, fsyncs and rotation
+        self._io_lock = threading.Lock()
+        self._entries = 0
+        self._snapshot_source = None
+        self._snapshot_thread = None
+
+        generations = self._generations()
+        self._generation = max(generations) if generations else 0
+        self._file = open(self._path(self._generation, "log"), "ab")
+
+        self._closed = False
+        _flusher.add(self)
+        atexit.register(self.close)
+
+    # files
+
+    def _path(self, generation, kind):
+        return os.path.join(self.directory, f"{self.schema.table}.{generation}.{kind}")
+
+    def _generations(self, kind=None):
+        pattern = re.compile(rf"{re.escape(self.schema.table)}\.(\d+)\.(log|snap)$")
+        found = set()
+        for name in os.listdir(self.directory):
+            match = pattern.match(name)
+            if match and kind in (None, match.group(2)):
+                found.add(int(match.group(1)))
+        return sorted(found)
+
+    def _read_lines(self, path):
+        with open(path, "rb") as file:
+            for line in file:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    # a torn last line from a crash mid-write; nothing after it was acknowledged
+                    return
+
+    def open_snapshot(self):
+        """
+        The newest snapshot as an MmapSnapshot, or None
+        """
+        snapshots = self._generations("snap")
+        return MmapSnapshot(self._path(snapshots[-1], "snap")) if snapshots else None
+
+    def log_entries(self):
+        """
+        ("put", record) / ("delete", obj_id) of every log written since the
+        newest snapshot, to replay on top of it
+        """
+        snapshots = self._generations("snap")
+        start = snapshots[-1] if snapshots else 0
+        for generation in self._generations("log"):
+            if generation >= start:
+                for entry in self._read_lines(self._path(generation, "log")):
+                    if "delete" in entry:
+                        yield "delete", entry["delete"]
+                    else:
+                        yield "put", entry["put"]
+
+    # writes
+
+    def _append(self, entry):
+        line = json.dumps(entry, separators=(",", ":")).encode() + b"\n"
+        with self._buffer_lock:
+            self._buffer.append(line)
+
+    def append_put(self, obj):
+        self._append({"put": self.schema.to_record(obj)})
+
+    def append_delete(self, obj_id):
+        self._append({"delete": obj_id})
+
+    def sync(self):
+        """
+        Write out and fsync everything appended so far
+        """
+        with self._io_lock:
+            self._flush()
+
+    def _flush(self):
+        # callers hold _io_lock
+        with self._buffer_lock:
+            lines, self._buffer = self._buffer, []
+        if lines:
+            self._file.write(b"".join(lines))
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._entries += len(lines)
+
+    def _tick(self):
+        # run by the flusher thread
+        with self._io_lock:
+            if self._closed:
+                return
+            self._flush()
+            running = self._snapshot_thread is not None and self._snapshot_thread.is_alive()
+            if self._snapshot_source and self._entries >= self.snapshot_every and not running:
+                self._snapshot_thread = threading.Thread(
+                    target=self._snapshot_source, name=f"journal-{self.schema.table}-snapshot", daemon=True)
+                self._snapshot_thread.start()
+
+    # snapshots
+
+    def on_snapshot_due(self, callback):
+        """
+        callback() is run from the flush thread when the log has grown by
+        snapshot_every entries; it should take a snapshot
+        """
+        self._snapshot_source = callback
+
+    def rotate(self):
+        """
+        Start a new log and return its generation. Call with the table's
+        writes blocked, then snapshot the table as it is at that moment.
+        """
+        with self._io_lock:
+            self._flush()
+            self._file.close()
+            self._generation += 1
+            self._file = open(self._path(self._generation, "log"), "ab")
+            self._entries = 0
+            return self._generation
+
+    def write_snapshot(self, generation, objs):
+        """
+        Write the snapshot for `generation` and drop the files it replaces
+        """
+        write_snapshot(self._path(generation, "snap"), self.schema, objs)
+        for kind in ("snap", "log"):
+            for older in self._generations(kind):
+                if older < generation:
+                    os.remove(self._path(older, kind))
+
+    def close(self):
+        _flusher.remove(self)
+        snapshot = self._snapshot_thread
+        if snapshot is not None:
+            # a snapshot in progress rotates the log: let it finish first
+            snapshot.join()
+        with self._io_lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._flush()
+            self._file.close()
+        atexit.unregister(self.close)
@@ -0,0 +1,166 @@
+"""
+Binary table snapshot, read through mmap without loading it
+"""
+
+
+import json
+import mmap
+import os
+import struct
+from datetime import datetime
+
+
+MAGIC = b"HBNBSNP1"
+# magic, row count, column count, length of the column name list
+HEADER = struct.Struct("<8sIII")
+# one value: type tag + 8 bytes (integer, float bits or heap offset)
+SLOT = struct.Struct("<Bq")
+HEAP_LENGTH = struct.Struct("<I")
+FLOAT_BITS = struct.Struct("<d")
+
+NONE, INT, FLOAT, STR, JSON, BOOL = range(6)
+
+
+def _columns(schema):
+    return ("id", "created_at", "updated_at") + schema.columns
+
+
+def _record(schema, obj):
+    if isinstance(obj, SnapshotRow):
+        # never materialized: copy its record over as it is
+        return obj.record()
+    record = schema.to_record(obj)
+    # epoch floats, as the models store them
+    record["created_at"] = obj._created
+    record["updated_at"] = obj._updated
+    return record
+
+
+def write_snapshot(path, schema, objs):
+    """
+    Write objs to path, atomically (temporary file + rename).
+
+    Layout: header, column names (JSON), one fixed-width row of SLOTs per
+    object in the given order, then the heap holding every string (and
+    JSON-encoded list) as <length><utf-8 bytes>.
+    """
+    columns = _columns(schema)
+    names = json.dumps(columns).encode()
+    rows = bytearray()
+    heap = bytearray()
+    count = 0
+    for obj in objs:
+        record = _record(schema, obj)
+        count += 1
+        for column in columns:
+            value = record[column]
+            if value is None:
+                tag, payload = NONE, 0
+            elif isinstance(value, bool):
+                tag, payload = BOOL, int(value)
+            elif isinstance(value, int):
+                tag, payload = INT, value
+            elif isinstance(value, float):
+                tag, payload = FLOAT, struct.unpack("<q", FLOAT_BITS.pack(value))[0]
+            else:
+                tag = STR if isinstance(value, str) else JSON
+                data = (value if tag == STR else json.dumps(value)).encode()
+                payload = len(heap)
+                heap += HEAP_LENGTH.pack(len(data)) + data
+            rows += SLOT.pack(tag, payload)
+
+    with open(path + ".tmp", "wb") as file:
+        file.write(HEADER.pack(MAGIC, count, len(columns), len(names)))
+        file.write(names)
+        file.write(rows)
+        file.write(heap)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(path + ".tmp", path)
+
+
+class MmapSnapshot:
+    """
+    Read-only view of a snapshot file. Opening it only maps the file and
+    reads the header; values are decoded from the mapped pages when asked
+    for, so pages the process never touches are never read.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as file:
+            # an empty file can't be mapped; a snapshot always has a header
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self._count, n_columns, names_length = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not an HBnB snapshot")
+        start = HEADER.size
+        self.columns = tuple(json.loads(self._map[start:start + names_length]))
+        self._column_index = {column: i for i, column in enumerate(self.columns)}
+        self._row_width = SLOT.size * n_columns
+        self._rows_start = start + names_length
+        self._heap_start = self._rows_start + self._row_width * self._count
+
+    def __len__(self):
+        return self._count
+
+    def close(self):
+        self._map.close()
+
+    def _decode(self, offset):
+        tag, payload = SLOT.unpack_from(self._map, offset)
+        if tag == NONE:
+            return None
+        if tag == INT:
+            return payload
+        if tag == BOOL:
+            return bool(payload)
+        if tag == FLOAT:
+            return FLOAT_BITS.unpack(struct.pack("<q", payload))[0]
+        start = self._heap_start + payload
+        (length,) = HEAP_LENGTH.unpack_from(self._map, start)
+        text = self._map[start + HEAP_LENGTH.size:start + HEAP_LENGTH.size + length].decode()
+        return text if tag == STR else json.loads(text)
+
+    def value(self, row, column):
+        return self._decode(self._rows_start + row * self._row_width
+                            + SLOT.size * self._column_index[column])
+
+    def record(self, row):
+        """
+        Every column of one row, as a ModelSchema record
+        """
+        base = self._rows_start + row * self._row_width
+        return {column: self._decode(base + SLOT.size * i) for i, column in enumerate(self.columns)}
+
+    def rows(self):
+        """
+        A SnapshotRow for every row, in the order the objects were written
+        """
+        return (SnapshotRow(self, row) for row in range(self._count))
+
+
+class SnapshotRow:
+    """
+    Placeholder for an object still in the snapshot. Its id is decoded up
+    front; other attributes are read from the mapping on access, which is
+    enough for repository indexes to file it without building the object.
+    """
+
+    __slots__ = ("snapshot", "row", "id")
+
+    def __init__(self, snapshot, row):
+        self.snapshot = snapshot
+        self.row = row
+        self.id = snapshot.value(row, "id")
+
+    def __getattr__(self, name):
+        if name not in self.snapshot._column_index:
+            raise AttributeError(name)
+        value = self.snapshot.value(self.row, name)
+        if name in ("created_at", "updated_at"):
+            return datetime.fromtimestamp(value)
+        return value
+
+    def record(self):
+        return self.snapshot.record(self.row)
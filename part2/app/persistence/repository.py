@@ -1,18 +1,47 @@
+import threading
 from abc import ABC, abstractmethod
+from bisect import bisect_left, bisect_right
+
+from app.persistence.locks import RWLock
+from app.persistence.mmap_snapshot import SnapshotRow
+
+
+# deleted slots of the insertion order are dropped once they are more than
+# this fraction of it (and at least _COMPACT_MIN of them)
+_COMPACT_FRACTION = 0.5
+_COMPACT_MIN = 64
+
+
+class DuplicateKeyError(ValueError):
+    """Raised when a write would put two objects under the same unique index key"""
+    pass
+
 
 class Repository(ABC):
     @abstractmethod
     def add(self, obj):
         pass
 
+    @abstractmethod
+    def add_many(self, objs):
+        pass
+
     @abstractmethod
     def get(self, obj_id):
         pass
 
+    @abstractmethod
+    def get_many(self, obj_ids):
+        pass
+
     @abstractmethod
     def get_all(self):
         pass
 
+    @abstractmethod
+    def get_page(self, cursor=None, limit=20):
+        pass
+
     @abstractmethod
     def update(self, obj_id, data):
         pass
@@ -25,30 +54,513 @@ class Repository(ABC):
     def get_by_attribute(self, attr_name, attr_value):
         pass
 
+    @abstractmethod
+    def get_all_by_attribute(self, attr_name, attr_value):
+        pass
+
+    @abstractmethod
+    def add_index(self, attr_name, unique=False, key=None):
+        pass
+
+    @abstractmethod
+    def add_sorted_index(self, attr_name):
+        pass
+
+    @abstractmethod
+    def iter_sorted(self, attr_name, low=None, high=None, reverse=False, after=None, with_keys=False):
+        """
+        Objects with low <= attr <= high (either bound optional), lazily, in
+        attr order; ties are in insertion order, or its reverse with
+        reverse=True. Needs add_sorted_index(attr_name).
+
+        Each object's key is (attr value, insertion position); with_keys
+        yields (key, obj) pairs, and passing a key as `after` resumes the
+        walk right past it, even if objects were added or removed since.
+        """
+        pass
+
+    @abstractmethod
+    def get_version(self):
+        """
+        Counter bumped by every write, so callers can tell when a collection changed
+        """
+        pass
+
+
+class _AttributeIndex:
+    """
+    Hash index over one attribute: normalised value -> object id(s)
+    """
+
+    def __init__(self, attr_name, unique=False, key=None):
+        self.attr_name = attr_name
+        self.unique = unique
+        self.key = key or (lambda value: value)
+        # key -> obj_id for unique indexes, key -> {obj_id: None} (ordered set) otherwise
+        self._entries = {}
+        # obj_id -> key it is filed under, so an entry can be moved even when
+        # the object was already changed in place before the repository saw it
+        self._keys = {}
+
+    def key_of(self, obj):
+        return self.key(getattr(obj, self.attr_name))
+
+    def ids_for(self, value):
+        key = self.key(value)
+        if self.unique:
+            obj_id = self._entries.get(key)
+            return [] if obj_id is None else [obj_id]
+        return list(self._entries.get(key, ()))
+
+    def check(self, value, obj_id, storage):
+        """
+        Raise DuplicateKeyError if another stored object already owns this key
+        """
+        if not self.unique:
+            return
+        owner = self._entries.get(self.key(value))
+        if owner is not None and owner != obj_id and owner in storage:
+            raise DuplicateKeyError(
+                f"An object with {self.attr_name} '{value}' already exists")
+
+    def insert(self, obj):
+        key = self.key_of(obj)
+        if self.unique:
+            self._entries[key] = obj.id
+        else:
+            self._entries.setdefault(key, {})[obj.id] = None
+        self._keys[obj.id] = key
+
+    def remove(self, obj_id):
+        if obj_id not in self._keys:
+            return
+        key = self._keys.pop(obj_id)
+        if self.unique:
+            if self._entries.get(key) == obj_id:
+                del self._entries[key]
+        else:
+            ids = self._entries.get(key)
+            if ids is not None:
+                ids.pop(obj_id, None)
+                if not ids:
+                    del self._entries[key]
+
+    def reindex(self, obj):
+        if self._keys.get(obj.id) != self.key_of(obj):
+            self.remove(obj.id)
+            self.insert(obj)
+
+
+class _SortedIndex:
+    """
+    Ordered index over one attribute: a sorted list of (value, position)
+    entries, position being the object's slot in the repository's insertion
+    order (unique, so it also breaks ties). Lookups are a bisect; a range
+    is then read straight off the list.
+    """
+
+    def __init__(self, attr_name):
+        self.attr_name = attr_name
+        self._entries = []
+        # obj_id -> entry, to find the entry again after the object changed
+        self._keys = {}
+
+    def insert(self, obj, position):
+        entry = (getattr(obj, self.attr_name), position)
+        self._entries.insert(bisect_left(self._entries, entry), entry)
+        self._keys[obj.id] = entry
+
+    def remove(self, obj_id):
+        entry = self._keys.pop(obj_id, None)
+        if entry is not None:
+            at = bisect_left(self._entries, entry)
+            if at < len(self._entries) and self._entries[at] == entry:
+                del self._entries[at]
+
+    def reindex(self, obj, position):
+        if self._keys.get(obj.id) != (getattr(obj, self.attr_name), position):
+            self.remove(obj.id)
+            self.insert(obj, position)
+
+    def chunk(self, low=None, high=None, reverse=False, after=None, size=256):
+        """
+        Up to `size` entries of the range, continuing past entry `after`.
+        Resuming from an entry rather than a list offset keeps a walk
+        correct when entries are inserted or removed between chunks.
+        """
+        entries = self._entries
+        start = 0 if low is None else bisect_left(entries, (low,))
+        stop = len(entries) if high is None else bisect_right(entries, (high, float("inf")))
+        if reverse:
+            if after is not None:
+                stop = min(stop, bisect_left(entries, after))
+            return entries[max(start, stop - size):stop][::-1]
+        if after is not None:
+            start = max(start, bisect_right(entries, after))
+        return entries[start:min(stop, start + size)]
+
 
 class InMemoryRepository(Repository):
-    def __init__(self):
+    """
+    Safe to share between request threads: writes take the write side of
+    an RWLock, reads that walk the indexes take the read side, and get()
+    is a single dict lookup. get_all() hands out an immutable snapshot of
+    the table, rebuilt only after a write, so it never blocks on a lock.
+
+    With a Journal every add/update/delete is also logged, and replay()
+    rebuilds the table from the journal at startup. Objects coming from
+    the journal's snapshot stay SnapshotRows (views into the mapped file)
+    in _storage until something reads them; see _live. on_load(obj) is
+    called with each object built from such a row, before it is stored.
+    """
+
+    def __init__(self, journal=None, on_load=None):
+        self._journal = journal
+        self._on_load = on_load
+        self._snapshot_lock = threading.Lock()
+        if journal is not None:
+            journal.on_snapshot_due(self.snapshot)
+        # set by replay(): SnapshotRows may be stored, resolve() builds their relations
+        self._lazy = False
+        self._resolve = None
+        # the MmapSnapshot the stored SnapshotRows read from
+        self._mapped = None
+        self._materialize_lock = threading.Lock()
+        self._lock = RWLock()
+        # tuple of every stored object, None once a write made it stale
+        self._snapshot = None
         self._storage = {}
+        # attr_name -> _AttributeIndex
+        self._indexes = {}
+        # attr_name -> _SortedIndex
+        self._sorted = {}
+        # ids in insertion order and the position of each (ascending, never
+        # renumbered, so a cursor stays valid across deletes). Deleted ids
+        # become None and are dropped in bulk, see _compact
+        self._order = []
+        self._slots = []
+        self._next_position = 0
+        self._deleted = 0
+        self._positions = {}
+        # bumped on every write, see get_version
+        self._version = 0
+
+    def add_index(self, attr_name, unique=False, key=None):
+        """
+        Declare a secondary index so get_by_attribute on attr_name is a hash lookup.
+        `key` normalises values before they are indexed and looked up
+        (e.g. str.lower for case-insensitive matching).
+        """
+        with self._lock.write():
+            index = _AttributeIndex(attr_name, unique=unique, key=key)
+            for obj in self._storage.values():
+                index.check(getattr(obj, attr_name), obj.id, self._storage)
+                index.insert(obj)
+            self._indexes[attr_name] = index
+
+    def add_sorted_index(self, attr_name):
+        """
+        Keep objects ordered by attr_name so iter_sorted reads a range
+        in O(log N + k) instead of sorting the table
+        """
+        with self._lock.write():
+            index = _SortedIndex(attr_name)
+            for obj in self._storage.values():
+                index.insert(obj, self._positions[obj.id])
+            self._sorted[attr_name] = index
 
     def add(self, obj):
+        with self._lock.write():
+            for index in self._indexes.values():
+                index.check(getattr(obj, index.attr_name), obj.id, self._storage)
+            self._insert(obj)
+
+    def add_many(self, objs):
+        """
+        Add every object or none of them: unique keys are checked against
+        storage and within the batch before anything is inserted
+        """
+        with self._lock.write():
+            for index in self._indexes.values():
+                if not index.unique:
+                    continue
+                seen = set()
+                for obj in objs:
+                    value = getattr(obj, index.attr_name)
+                    index.check(value, obj.id, self._storage)
+                    key = index.key(value)
+                    if key in seen:
+                        raise DuplicateKeyError(
+                            f"An object with {index.attr_name} '{value}' already exists")
+                    seen.add(key)
+            for obj in objs:
+                self._insert(obj)
+
+    def _insert(self, obj):
+        # callers hold the write lock
+        if self._journal is not None:
+            self._journal.append_put(obj)
+        self._apply(obj)
+
+    def _apply(self, obj):
+        self._version += 1
+        self._snapshot = None
         self._storage[obj.id] = obj
+        if obj.id not in self._positions:
+            self._positions[obj.id] = self._next_position
+            self._slots.append(self._next_position)
+            self._order.append(obj.id)
+            self._next_position += 1
+        for index in self._indexes.values():
+            index.insert(obj)
+        for index in self._sorted.values():
+            index.reindex(obj, self._positions[obj.id])
 
     def get(self, obj_id):
-        return self._storage.get(obj_id)
+        # one dict lookup is atomic, no lock needed
+        return self._live(self._storage.get(obj_id))
+
+    def get_many(self, obj_ids):
+        """
+        Resolve several ids at once: {obj_id: obj} for the ids that exist
+        """
+        found = {}
+        for obj_id in obj_ids:
+            obj = self._live(self._storage.get(obj_id))
+            if obj is not None:
+                found[obj_id] = obj
+        return found
 
     def get_all(self):
-        return list(self._storage.values())
+        snapshot = self._snapshot
+        # the length check catches _storage being cleared directly
+        if snapshot is None or len(snapshot) != len(self._storage):
+            with self._lock.read():
+                snapshot = self._snapshot = tuple(self._storage.values())
+        if self._lazy:
+            return [self._live(obj) for obj in snapshot]
+        return list(snapshot)
+
+    def get_page(self, cursor=None, limit=20):
+        """
+        Return up to `limit` objects in insertion order starting at `cursor`,
+        plus the cursor of the next page (None on the last page).
+        Cost is the page size, not the table size.
+        """
+        with self._lock.read():
+            at = bisect_left(self._slots, cursor or 0)
+            page = []
+            while at < len(self._order) and len(page) < limit:
+                obj_id = self._order[at]
+                at += 1
+                # skip deleted slots and ids cleared out of storage directly
+                obj = self._live(self._storage.get(obj_id)) if obj_id is not None else None
+                if obj is not None:
+                    page.append(obj)
+            # step over dead slots so the last page doesn't hand out a cursor to nothing
+            while at < len(self._order) and self._order[at] not in self._storage:
+                at += 1
+            next_cursor = self._slots[at] if at < len(self._order) else None
+        return page, next_cursor
 
     def update(self, obj_id, data):
-        obj = self.get(obj_id)
-        if obj:
-            obj.update(data)
+        with self._lock.write():
+            obj = self.get(obj_id)
+            if obj:
+                # unique keys are checked before the object is touched so a
+                # rejected update leaves it unchanged
+                for attr_name, value in data.items():
+                    if attr_name in self._indexes:
+                        self._indexes[attr_name].check(value, obj_id, self._storage)
+                try:
+                    obj.update(data)
+                finally:
+                    # also when a setter rejects a value partway: what was
+                    # applied is journaled and indexed, so nothing goes stale
+                    if self._journal is not None:
+                        self._journal.append_put(obj)
+                    self._version += 1
+                    self._snapshot = None
+                    for index in self._indexes.values():
+                        index.reindex(obj)
+                    for index in self._sorted.values():
+                        index.reindex(obj, self._positions[obj_id])
 
     def delete(self, obj_id):
-        if obj_id in self._storage:
+        with self._lock.write():
+            if obj_id in self._storage:
+                if self._journal is not None:
+                    self._journal.append_delete(obj_id)
+                self._remove(obj_id)
+
+    def _remove(self, obj_id):
+        # callers hold the write lock; the materialize lock keeps a concurrent
+        # _materialize from putting the object back
+        with self._materialize_lock:
             del self._storage[obj_id]
+        self._version += 1
+        self._snapshot = None
+        self._order[bisect_left(self._slots, self._positions.pop(obj_id))] = None
+        self._deleted += 1
+        if self._deleted >= max(_COMPACT_MIN, len(self._order) * _COMPACT_FRACTION):
+            self._compact()
+        for index in self._indexes.values():
+            index.remove(obj_id)
+        for index in self._sorted.values():
+            index.remove(obj_id)
+
+    def _compact(self):
+        # callers hold the write lock. Live ids keep their positions, so
+        # cursors and sorted index entries stay valid
+        live = [at for at, obj_id in enumerate(self._order) if obj_id is not None]
+        self._order = [self._order[at] for at in live]
+        self._slots = [self._slots[at] for at in live]
+        self._deleted = 0
+
+    # journal
+
+    def replay(self, resolve):
+        """
+        Rebuild the table from the journal: newest snapshot, then the log.
+        resolve(table, obj_id) returns related objects, so tables must be
+        replayed after the tables they reference.
+
+        Snapshot rows are stored as SnapshotRows: only their ids and indexed
+        attributes are read now, objects are built on first access.
+        """
+        self._require_journal("replay")
+        schema = self._journal.schema
+        self._resolve = resolve
+        snapshot = self._journal.open_snapshot()
+        with self._lock.write():
+            if snapshot is not None:
+                self._lazy = True
+                self._mapped = snapshot
+                for row in snapshot.rows():
+                    self._apply(row)
+            for op, value in self._journal.log_entries():
+                if op == "delete":
+                    if value in self._storage:
+                        self._remove(value)
+                    continue
+                obj = schema.from_record(value, resolve)
+                if obj.id in self._storage:
+                    # a later state of the same object: unhook the old one first
+                    for index in self._indexes.values():
+                        index.remove(obj.id)
+                self._apply(obj)
+
+    def _require_journal(self, operation):
+        if self._journal is None:
+            raise RuntimeError(f"Cannot {operation}: this repository has no journal "
+                               f"(create it with InMemoryRepository(journal=Journal(...)))")
+
+    def _live(self, obj):
+        # a stored value as a model object: SnapshotRows are built on first use
+        if obj.__class__ is SnapshotRow:
+            return self._materialize(obj)
+        return obj
+
+    def _materialize(self, row):
+        with self._materialize_lock:
+            current = self._storage.get(row.id)
+            if current is not row:
+                # built by another thread meanwhile, or deleted
+                if current.__class__ is not SnapshotRow:
+                    return current
+                # moved to a newer snapshot (see _remap): build from there
+                row = current
+            obj = self._journal.schema.from_record(row.record(), self._resolve)
+            if self._on_load is not None:
+                self._on_load(obj)
+            self._storage[row.id] = obj
+            return obj
+
+    def scan(self):
+        """
+        Every stored value as it is: SnapshotRows are not built, so startup
+        code can read their columns off the mapping
+        """
+        with self._lock.read():
+            return list(self._storage.values())
+
+    def snapshot(self):
+        """
+        Write a compact snapshot of the table so startup no longer replays
+        the log written before it. Writes are blocked only while the log is
+        rotated and the table is listed, not while the snapshot is written.
+        """
+        self._require_journal("snapshot")
+        with self._snapshot_lock:
+            with self._lock.write():
+                generation = self._journal.rotate()
+                objs = tuple(self._storage.values())
+            self._journal.write_snapshot(generation, objs)
+            self._remap(objs)
+
+    def _remap(self, objs):
+        # the rows still unbuilt move to the snapshot just written (objs, in
+        # that order), so the superseded file can be unmapped
+        old = self._mapped
+        if old is None:
+            return
+        new = self._journal.open_snapshot()
+        with self._lock.write(), self._materialize_lock:
+            for row, obj in enumerate(objs):
+                if obj.__class__ is SnapshotRow and self._storage.get(obj.id) is obj:
+                    self._storage[obj.id] = SnapshotRow(new, row)
+            self._snapshot = None
+            self._mapped = new
+        old.close()
+
+    def close(self):
+        """
+        Flush and close the journal, if there is one
+        """
+        if self._journal is not None:
+            self._journal.close()
+        if self._mapped is not None:
+            self._mapped.close()
+
+    def iter_sorted(self, attr_name, low=None, high=None, reverse=False, after=None, with_keys=False):
+        # the read lock is only held while a chunk is copied, never across a yield
+        index = self._sorted[attr_name]
+        while True:
+            with self._lock.read():
+                entries = index.chunk(low, high, reverse, after)
+                # as in get_page, skip objects cleared out of storage directly
+                objs = [self._storage.get(self._order[bisect_left(self._slots, position)])
+                        for _, position in entries]
+            if not entries:
+                return
+            for entry, obj in zip(entries, objs):
+                if obj is not None:
+                    yield (entry, self._live(obj)) if with_keys else self._live(obj)
+            after = entries[-1]
+
+    def get_version(self):
+        return self._version
 
     def get_by_attribute(self, attr_name, attr_value):
-        return next((obj for obj in self._storage.values() if getattr(obj, attr_name) == attr_value), None)
-    
- 
\ No newline at end of file
+        with self._lock.read():
+            if attr_name in self._indexes:
+                return next(iter(self._lookup(attr_name, attr_value)), None)
+            objs = map(self._live, list(self._storage.values()))
+            return next((obj for obj in objs if getattr(obj, attr_name) == attr_value), None)
+
+    def get_all_by_attribute(self, attr_name, attr_value):
+        with self._lock.read():
+            if attr_name in self._indexes:
+                return self._lookup(attr_name, attr_value)
+            objs = map(self._live, list(self._storage.values()))
+            return [obj for obj in objs if getattr(obj, attr_name) == attr_value]
+
+    def _lookup(self, attr_name, attr_value):
+        # ids can outlive their objects if _storage is cleared directly, so
+        # only ids still present in storage are returned
+        objs = []
+        for obj_id in self._indexes[attr_name].ids_for(attr_value):
+            obj = self._live(self._storage.get(obj_id))
+            if obj is not None:
+                objs.append(obj)
+        return objs
@@ -0,0 +1,106 @@
+"""
+Flat record layout of each model, used by the persistent repositories
+"""
+
+
+from datetime import datetime
+
+from app.models.user import User
+from app.models.place import Place
+from app.models.review import Review
+from app.models.amenity import Amenity
+
+
+class ModelSchema:
+    """
+    Describes how a model maps to a flat record of plain values.
+
+    fields:          constructor arguments stored as they are
+    references:      attribute -> (column, table) for a single related object,
+                     also passed to the constructor
+    reference_lists: attribute -> (column, table) for a list of related objects
+    converters:      field -> callable applied to the stored value on load
+    Derived state (Place.reviews, rating aggregates, User.reviews) is not
+    stored; it is rebuilt as reviews are loaded.
+    """
+
+    def __init__(self, table, model, fields, references=None, reference_lists=None, converters=None):
+        self.table = table
+        self.model = model
+        self.fields = tuple(fields)
+        self.references = references or {}
+        self.reference_lists = reference_lists or {}
+        self.converters = converters or {}
+
+    @property
+    def columns(self):
+        """
+        Every record column apart from id and the timestamps
+        """
+        return (self.fields
+                + tuple(column for column, _ in self.references.values())
+                + tuple(column for column, _ in self.reference_lists.values()))
+
+    def to_record(self, obj):
+        record = {
+            "id": obj.id,
+            "created_at": obj.created_at.isoformat(),
+            "updated_at": obj.updated_at.isoformat(),
+        }
+        for field in self.fields:
+            record[field] = getattr(obj, field)
+        for attr, (column, _) in self.references.items():
+            related = getattr(obj, attr)
+            record[column] = related.id if related else None
+        for attr, (column, _) in self.reference_lists.items():
+            record[column] = [related.id for related in getattr(obj, attr)]
+        return record
+
+    def from_record(self, record, resolve):
+        """
+        Rebuild a model instance. resolve(table, obj_id) returns the related object.
+        """
+        kwargs = {}
+        for field in self.fields:
+            value = record[field]
+            if value is not None and field in self.converters:
+                value = self.converters[field](value)
+            kwargs[field] = value
+        for attr, (column, table) in self.references.items():
+            kwargs[attr] = resolve(table, record[column]) if record[column] else None
+
+        obj = self.model(**kwargs)
+        for attr, (column, table) in self.reference_lists.items():
+            related = (resolve(table, obj_id) for obj_id in record[column] or [])
+            setattr(obj, attr, [r for r in related if r is not None])
+        obj.id = record["id"]
+        # ISO strings from to_record, or epoch floats from a binary snapshot
+        for attr in ("created_at", "updated_at"):
+            value = record[attr]
+            setattr(obj, attr, datetime.fromisoformat(value) if isinstance(value, str) else value)
+        return obj
+
+
+USER_SCHEMA = ModelSchema(
+    "users", User,
+    fields=("first_name", "last_name", "email", "password", "is_admin"),
+    converters={"is_admin": bool},
+)
+
+AMENITY_SCHEMA = ModelSchema(
+    "amenities", Amenity,
+    fields=("name", "description"),
+)
+
+PLACE_SCHEMA = ModelSchema(
+    "places", Place,
+    fields=("title", "description", "price", "latitude", "longitude"),
+    references={"owner": ("owner_id", "users")},
+    reference_lists={"amenities": ("amenity_ids", "amenities")},
+)
+
+REVIEW_SCHEMA = ModelSchema(
+    "reviews", Review,
+    fields=("text", "rating"),
+    references={"place": ("place_id", "places"), "user": ("user_id", "users")},
+)
@@ -0,0 +1,127 @@
+"""
+Fixed-size lat/lon grid for "what is near here" queries
+"""
+
+
+import math
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """
+    Great-circle distance between two points in kilometres
+    """
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+class GeoGridIndex:
+    """
+    Buckets object ids into cells of `cell_size` degrees so a query only
+    visits the cells its area overlaps instead of every point.
+    Longitude wraps around the antimeridian.
+    """
+
+    def __init__(self, cell_size=0.5):
+        self.cell_size = cell_size
+        self._columns = int(math.ceil(360.0 / cell_size))
+        self._rows = int(math.ceil(180.0 / cell_size))
+        # (row, col) -> {obj_id: (lat, lon)}
+        self._cells = {}
+        # obj_id -> (lat, lon, cell)
+        self._points = {}
+
+    def __len__(self):
+        return len(self._points)
+
+    def _row(self, lat):
+        return min(int((lat + 90.0) // self.cell_size), self._rows - 1)
+
+    def _col(self, lon):
+        return min(int((lon + 180.0) // self.cell_size), self._columns - 1)
+
+    def add(self, obj_id, lat, lon):
+        cell = (self._row(lat), self._col(lon))
+        self._cells.setdefault(cell, {})[obj_id] = (lat, lon)
+        self._points[obj_id] = (lat, lon, cell)
+
+    def remove(self, obj_id):
+        point = self._points.pop(obj_id, None)
+        if point is None:
+            return
+        cell = point[2]
+        bucket = self._cells[cell]
+        del bucket[obj_id]
+        if not bucket:
+            del self._cells[cell]
+
+    def update(self, obj_id, lat, lon):
+        point = self._points.get(obj_id)
+        if point is not None and point[:2] == (lat, lon):
+            return
+        self.remove(obj_id)
+        self.add(obj_id, lat, lon)
+
+    def _column_ranges(self, min_lon, max_lon):
+        first, last = self._col(min_lon), self._col(max_lon)
+        if min_lon <= max_lon:
+            return [range(first, last + 1)]
+        # box crosses the antimeridian
+        return [range(first, self._columns), range(0, last + 1)]
+
+    def _candidates(self, min_lat, min_lon, max_lat, max_lon):
+        for row in range(self._row(min_lat), self._row(max_lat) + 1):
+            for cols in self._column_ranges(min_lon, max_lon):
+                for col in cols:
+                    bucket = self._cells.get((row, col))
+                    if bucket:
+                        yield from bucket.items()
+
+    def within_bbox(self, min_lat, min_lon, max_lat, max_lon):
+        """
+        Ids inside the box. min_lon > max_lon means the box crosses the antimeridian.
+        """
+        crosses = min_lon > max_lon
+        ids = []
+        for obj_id, (lat, lon) in self._candidates(min_lat, min_lon, max_lat, max_lon):
+            if not (min_lat <= lat <= max_lat):
+                continue
+            if crosses:
+                inside = lon >= min_lon or lon <= max_lon
+            else:
+                inside = min_lon <= lon <= max_lon
+            if inside:
+                ids.append(obj_id)
+        return ids
+
+    def within_radius(self, lat, lon, radius_km):
+        """
+        (obj_id, distance_km) pairs within radius_km of the point, nearest first
+        """
+        angular = radius_km / EARTH_RADIUS_KM
+        dlat = math.degrees(angular)
+        min_lat, max_lat = max(-90.0, lat - dlat), min(90.0, lat + dlat)
+
+        # bounding box of the circle; near a pole (or for huge radii) it spans every longitude
+        if min_lat <= -90.0 or max_lat >= 90.0 or angular >= math.pi / 2:
+            min_lon, max_lon = -180.0, 180.0
+        else:
+            ratio = math.sin(angular) / math.cos(math.radians(lat))
+            dlon = 180.0 if ratio >= 1 else math.degrees(math.asin(ratio))
+            if dlon >= 180.0:
+                min_lon, max_lon = -180.0, 180.0
+            else:
+                min_lon = (lon - dlon + 180.0) % 360.0 - 180.0
+                max_lon = (lon + dlon + 180.0) % 360.0 - 180.0
+
+        hits = []
+        for obj_id, (plat, plon) in self._candidates(min_lat, min_lon, max_lat, max_lon):
+            distance = haversine_km(lat, lon, plat, plon)
+            if distance <= radius_km:
+                hits.append((obj_id, distance))
+        hits.sort(key=lambda hit: hit[1])
+        return hits
@@ -0,0 +1,382 @@
+"""
+SQLite-backed repository
+"""
+
+
+import copy
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:
+    # not on Windows: the one-process-per-file rule is then not enforced
+    fcntl = None
+
+from app.persistence.repository import Repository, DuplicateKeyError
+
+
+class SQLiteRepository(Repository):
+    """
+    Stores one model per table, described by a ModelSchema.
+
+    - WAL journal so readers never block the writer
+    - one connection per thread, opened lazily and reused (the pool)
+    - SQL text is built once here, so sqlite3's per-connection statement
+      cache keeps every query prepared
+    - add_index() becomes a real (UNIQUE) INDEX on a computed key column
+
+    Loaded objects are kept in an identity map so relations between objects
+    (place.owner, review.place, ...) always point at the same instance
+    inside one process. `on_load` is called once per object read back from
+    the database, which is where derived relations are rebuilt.
+    `database` must be a file path: ":memory:" would give every thread its
+    own empty database.
+
+    One process owns a database file. The identity map, and the relations
+    and search indexes built from it, are never refreshed from writes made
+    by another process, so a second process opening the same file is
+    refused. To serve from several processes use app/prefork.py, whose
+    workers go through the owner's facade.
+    """
+
+    def __init__(self, database, schema, resolve, on_load=None):
+        self.database = database
+        self.schema = schema
+        self._resolve = resolve
+        self._on_load = on_load
+        self._local = threading.local()
+        # every thread's connection, so close() reaches them all
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        # attr_name -> (key column, key function, unique)
+        self._indexes = {}
+        # obj_id -> object, for everything this process has loaded or written
+        self._identity = {}
+        _claim(database)
+        self._claimed = True
+
+        table = schema.table
+        columns = ("id", "created_at", "updated_at") + schema.columns
+        self._columns = columns
+        self._list_columns = {column for column, _ in schema.reference_lists.values()}
+
+        conn = self._connection()
+        with conn:
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} ("
+                "seq INTEGER PRIMARY KEY AUTOINCREMENT, "
+                "id TEXT NOT NULL UNIQUE, "
+                + ", ".join(columns[1:]) + ")")
+            # one write counter per table, kept in the file so it survives restarts
+            conn.execute("CREATE TABLE IF NOT EXISTS hbnb_versions "
+                         "(tbl TEXT PRIMARY KEY, version INTEGER NOT NULL)")
+            conn.execute("INSERT OR IGNORE INTO hbnb_versions (tbl, version) VALUES (?, 0)", (table,))
+        self._sql_bump = "UPDATE hbnb_versions SET version = version + 1 WHERE tbl = ?"
+        self._sql_version = "SELECT version FROM hbnb_versions WHERE tbl = ?"
+        self._sql_select = f"SELECT seq, {', '.join(columns)} FROM {table}"
+        self._sql_get = self._sql_select + " WHERE id = ?"
+        self._sql_all = self._sql_select + " ORDER BY seq"
+        self._sql_page = self._sql_select + " WHERE seq >= ? ORDER BY seq LIMIT ?"
+        self._sql_delete = f"DELETE FROM {table} WHERE id = ?"
+        self._build_write_sql()
+
+    # connections
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.database, check_same_thread=False, cached_statements=256)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=5000")
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    def close(self):
+        """
+        Close the connections of every thread, and give up this repository's
+        share of the claim on the database (see _claim)
+        """
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+            claimed, self._claimed = self._claimed, False
+        for conn in connections:
+            conn.close()
+        if claimed:
+            _release(self.database)
+
+    def _build_write_sql(self):
+        table = self.schema.table
+        columns = self._columns + tuple(column for column, _, _ in self._indexes.values())
+        self._write_columns = columns
+        self._sql_insert = (f"INSERT INTO {table} ({', '.join(columns)}) "
+                            f"VALUES ({', '.join('?' for _ in columns)})")
+        self._sql_update = (f"UPDATE {table} SET {', '.join(c + ' = ?' for c in columns[1:])} "
+                            "WHERE id = ?")
+
+    # records
+
+    def _row_values(self, obj):
+        record = self.schema.to_record(obj)
+        for column in self._list_columns:
+            record[column] = json.dumps(record[column])
+        for attr_name, (column, key, _) in self._indexes.items():
+            value = getattr(obj, attr_name)
+            record[column] = None if value is None else key(value)
+        return [record[column] for column in self._write_columns]
+
+    def _materialize(self, row):
+        obj = self._identity.get(row["id"])
+        if obj is not None:
+            return obj
+        record = dict(row)
+        for column in self._list_columns:
+            record[column] = json.loads(record[column]) if record[column] else []
+        obj = self.schema.from_record(record, self._resolve)
+        # two threads may load the same row at once; the first one stored wins
+        # and only that thread runs on_load
+        existing = self._identity.setdefault(obj.id, obj)
+        if existing is not obj:
+            return existing
+        if self._on_load:
+            self._on_load(obj)
+        return obj
+
+    def _write(self, sql, params):
+        conn = self._connection()
+        try:
+            with conn:
+                conn.execute(sql, params)
+                conn.execute(self._sql_bump, (self.schema.table,))
+        except sqlite3.IntegrityError as err:
+            raise DuplicateKeyError(str(err))
+
+    # Repository interface
+
+    def add_index(self, attr_name, unique=False, key=None):
+        """
+        Index attr_name through a `<attr>_key` column holding key(value)
+        """
+        key = key or (lambda value: value)
+        column = f"{attr_name}_key"
+        conn = self._connection()
+        existing = {row["name"] for row in conn.execute(f"PRAGMA table_info({self.schema.table})")}
+        with conn:
+            if column not in existing:
+                conn.execute(f"ALTER TABLE {self.schema.table} ADD COLUMN {column}")
+                for row in conn.execute(f"SELECT id, {attr_name} FROM {self.schema.table}").fetchall():
+                    if row[attr_name] is not None:
+                        conn.execute(f"UPDATE {self.schema.table} SET {column} = ? WHERE id = ?",
+                                     (key(row[attr_name]), row["id"]))
+            try:
+                conn.execute(f"CREATE {'UNIQUE ' if unique else ''}INDEX IF NOT EXISTS "
+                             f"{self.schema.table}_{column} ON {self.schema.table} ({column})")
+            except sqlite3.IntegrityError as err:
+                raise DuplicateKeyError(str(err))
+        self._indexes[attr_name] = (column, key, unique)
+        self._build_write_sql()
+
+    def add_sorted_index(self, attr_name):
+        """
+        A plain INDEX on the attribute's column; SQLite walks it in order
+        """
+        if attr_name not in self._columns:
+            raise ValueError(f"'{attr_name}' is not a column of {self.schema.table}")
+        with self._connection() as conn:
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {self.schema.table}_{attr_name}_sorted "
+                         f"ON {self.schema.table} ({attr_name}, seq)")
+
+    def iter_sorted(self, attr_name, low=None, high=None, reverse=False, after=None, with_keys=False,
+                    batch_size=500):
+        """
+        Keys are (attr value, seq); `after` becomes a row value comparison
+        that SQLite answers with a seek in the (attr, seq) index
+        """
+        if attr_name not in self._columns:
+            raise ValueError(f"'{attr_name}' is not a column of {self.schema.table}")
+        # timestamps are stored as ISO strings, which sort like the datetimes
+        sql_value = lambda value: value.isoformat() if isinstance(value, datetime) else value
+        conditions, params = [], []
+        for op, bound in ((">=", low), ("<=", high)):
+            if bound is not None:
+                conditions.append(f"{attr_name} {op} ?")
+                params.append(sql_value(bound))
+        if after is not None:
+            conditions.append(f"({attr_name}, seq) {'<' if reverse else '>'} (?, ?)")
+            params.extend((sql_value(after[0]), after[1]))
+        direction = "DESC" if reverse else "ASC"
+        sql = self._sql_select
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += f" ORDER BY {attr_name} {direction}, seq {direction}"
+        rows = self._connection().execute(sql, params)
+        while True:
+            batch = rows.fetchmany(batch_size)
+            if not batch:
+                return
+            for row in batch:
+                obj = self._materialize(row)
+                yield ((getattr(obj, attr_name), row["seq"]), obj) if with_keys else obj
+
+    def add(self, obj):
+        self._write(self._sql_insert, self._row_values(obj))
+        self._identity[obj.id] = obj
+
+    def add_many(self, objs):
+        """
+        Insert all objects in one transaction; nothing is written if any fails
+        """
+        conn = self._connection()
+        try:
+            with conn:
+                conn.executemany(self._sql_insert, [self._row_values(obj) for obj in objs])
+                conn.execute(self._sql_bump, (self.schema.table,))
+        except sqlite3.IntegrityError as err:
+            raise DuplicateKeyError(str(err))
+        for obj in objs:
+            self._identity[obj.id] = obj
+
+    def get(self, obj_id):
+        obj = self._identity.get(obj_id)
+        if obj is not None:
+            return obj
+        row = self._connection().execute(self._sql_get, (obj_id,)).fetchone()
+        return self._materialize(row) if row else None
+
+    def get_many(self, obj_ids):
+        """
+        {obj_id: obj} for the ids that exist; ids not loaded yet are fetched
+        with one IN (...) query per chunk instead of one query per id
+        """
+        found, pending = {}, []
+        for obj_id in dict.fromkeys(obj_ids):
+            obj = self._identity.get(obj_id)
+            if obj is not None:
+                found[obj_id] = obj
+            else:
+                pending.append(obj_id)
+        conn = self._connection()
+        # stay well below SQLite's limit on bound parameters
+        for start in range(0, len(pending), 500):
+            chunk = pending[start:start + 500]
+            sql = f"{self._sql_select} WHERE id IN ({', '.join('?' for _ in chunk)})"
+            for row in conn.execute(sql, chunk).fetchall():
+                found[row["id"]] = self._materialize(row)
+        return found
+
+    def get_all(self):
+        rows = self._connection().execute(self._sql_all).fetchall()
+        return [self._materialize(row) for row in rows]
+
+    def get_page(self, cursor=None, limit=20):
+        """
+        Same contract as InMemoryRepository.get_page; the cursor is the seq
+        (rowid) of the first object of the page
+        """
+        rows = self._connection().execute(self._sql_page, (cursor or 0, limit + 1)).fetchall()
+        next_cursor = rows[limit]["seq"] if len(rows) > limit else None
+        return [self._materialize(row) for row in rows[:limit]], next_cursor
+
+    def update(self, obj_id, data):
+        obj = self.get(obj_id)
+        if obj:
+            # unique keys are checked before the object is touched so a
+            # rejected update leaves it unchanged
+            conn = self._connection()
+            for attr_name, value in data.items():
+                if attr_name in self._indexes and value is not None:
+                    column, key, unique = self._indexes[attr_name]
+                    if unique and conn.execute(
+                            f"SELECT 1 FROM {self.schema.table} WHERE {column} = ? AND id != ?",
+                            (key(value), obj_id)).fetchone():
+                        raise DuplicateKeyError(
+                            f"An object with {attr_name} '{value}' already exists")
+            # write the updated row first and change the object only once it
+            # is stored, so a failed write leaves memory and the file in step
+            updated = copy.copy(obj)
+            updated.update(data)
+            values = self._row_values(updated)
+            self._write(self._sql_update, values[1:] + [obj_id])
+            for cls in type(obj).__mro__:
+                for name in getattr(cls, "__slots__", ()):
+                    if hasattr(updated, name):
+                        setattr(obj, name, getattr(updated, name))
+
+    def delete(self, obj_id):
+        self._write(self._sql_delete, (obj_id,))
+        self._identity.pop(obj_id, None)
+
+    def get_version(self):
+        return self._connection().execute(self._sql_version, (self.schema.table,)).fetchone()[0]
+
+    def get_by_attribute(self, attr_name, attr_value):
+        return next(iter(self._query_attribute(attr_name, attr_value, limit=1)), None)
+
+    def get_all_by_attribute(self, attr_name, attr_value):
+        return self._query_attribute(attr_name, attr_value)
+
+    def _query_attribute(self, attr_name, attr_value, limit=None):
+        if attr_name in self._indexes:
+            column, key, _ = self._indexes[attr_name]
+            attr_value = key(attr_value)
+        elif attr_name in self.schema.fields:
+            column = attr_name
+        else:
+            # not a stored column, fall back to comparing loaded objects
+            matches = [obj for obj in self.get_all() if getattr(obj, attr_name) == attr_value]
+            return matches[:limit] if limit else matches
+        sql = f"{self._sql_select} WHERE {column} = ? ORDER BY seq"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        rows = self._connection().execute(sql, (attr_value,)).fetchall()
+        return [self._materialize(row) for row in rows]
+
+
+# database path -> [lock file held by this process, repositories using it], see _claim
+_claimed = {}
+_claim_lock = threading.Lock()
+
+
+def _claim(database):
+    """
+    Take an exclusive lock next to the database file until every repository
+    of this process using it released it (_release); raises RuntimeError
+    when another process holds it
+    """
+    if fcntl is None:
+        return
+    path = os.path.realpath(database)
+    with _claim_lock:
+        if path in _claimed:
+            _claimed[path][1] += 1
+            return
+        lock_file = open(path + ".lock", "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            raise RuntimeError(f"{database} is already used by another process; "
+                               "serve it from one process (see app/prefork.py)")
+        _claimed[path] = [lock_file, 1]
+
+
+def _release(database):
+    if fcntl is None:
+        return
+    path = os.path.realpath(database)
+    with _claim_lock:
+        entry = _claimed.get(path)
+        if entry is None:
+            return
+        entry[1] -= 1
+        if entry[1] == 0:
+            del _claimed[path]
+            # closing the file drops the lock
+            entry[0].close()
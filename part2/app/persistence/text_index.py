@@ -0,0 +1,124 @@
+"""
+In-process inverted index for keyword search
+"""
+
+
+import hashlib
+import math
+import re
+from bisect import bisect_left, insort
+
+
+_TOKEN = re.compile(r"\w+")
+
+
+def tokenize(text):
+    """
+    Lower-cased word tokens of text
+    """
+    return _TOKEN.findall(text.lower()) if text else []
+
+
+def _digest(text):
+    # identifies the indexed text without keeping a copy of it
+    return hashlib.blake2b(text.encode(), digest_size=16).digest()
+
+
+class TextIndex:
+    """
+    term -> {doc_id: term frequency} postings plus document lengths, scored
+    with BM25. Query terms also match every indexed term they are a prefix
+    of ("cot" finds "cottage"), through a sorted vocabulary: the first
+    MAX_EXPANSIONS of them in alphabetical order, so a very short prefix
+    ("c") only matches part of what starts with it.
+
+    Documents are (re)indexed with add(); unchanged text is detected and
+    skipped, so callers can call it after any change of the owning object.
+    """
+
+    K1 = 1.2
+    B = 0.75
+    # upper bound on the indexed terms one query term expands to
+    MAX_EXPANSIONS = 50
+
+    def __init__(self):
+        self._postings = {}
+        # sorted list of every term, for prefix lookups
+        self._vocabulary = []
+        # doc_id -> (digest of the indexed text, {term: frequency}, length)
+        self._docs = {}
+        self._total_length = 0
+
+    def __len__(self):
+        return len(self._docs)
+
+    def add(self, doc_id, text):
+        """
+        Index text under doc_id, replacing what was indexed for it before
+        """
+        digest = _digest(text)
+        entry = self._docs.get(doc_id)
+        if entry is not None and entry[0] == digest:
+            return
+        self.remove(doc_id)
+        tokens = tokenize(text)
+        frequencies = {}
+        for token in tokens:
+            frequencies[token] = frequencies.get(token, 0) + 1
+        for term, frequency in frequencies.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = {}
+                insort(self._vocabulary, term)
+            postings[doc_id] = frequency
+        self._docs[doc_id] = (digest, frequencies, len(tokens))
+        self._total_length += len(tokens)
+
+    def remove(self, doc_id):
+        entry = self._docs.pop(doc_id, None)
+        if entry is None:
+            return
+        _, frequencies, length = entry
+        self._total_length -= length
+        for term in frequencies:
+            postings = self._postings[term]
+            del postings[doc_id]
+            if not postings:
+                del self._postings[term]
+                del self._vocabulary[bisect_left(self._vocabulary, term)]
+
+    def _expand(self, token, prefix):
+        if not prefix:
+            return [token] if token in self._postings else []
+        terms = []
+        at = bisect_left(self._vocabulary, token)
+        while (at < len(self._vocabulary) and len(terms) < self.MAX_EXPANSIONS
+               and self._vocabulary[at].startswith(token)):
+            terms.append(self._vocabulary[at])
+            at += 1
+        return terms
+
+    def search(self, query, prefix=True):
+        """
+        {doc_id: BM25 score} of every document matching at least one query
+        term. A query term scores through the best of the terms it expands to.
+        """
+        n_docs = len(self._docs)
+        if not n_docs:
+            return {}
+        average_length = self._total_length / n_docs or 1
+        scores = {}
+        for token in dict.fromkeys(tokenize(query)):
+            best = {}
+            for term in self._expand(token, prefix):
+                postings = self._postings[term]
+                idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc_id, frequency in postings.items():
+                    length = self._docs[doc_id][2]
+                    score = idf * frequency * (self.K1 + 1) / (
+                        frequency + self.K1 * (1 - self.B + self.B * length / average_length))
+                    if score > best.get(doc_id, 0):
+                        best[doc_id] = score
+            for doc_id, score in best.items():
+                scores[doc_id] = scores.get(doc_id, 0) + score
+        return scores
@@ -0,0 +1,132 @@
+"""
+Multi-process serving mode: python -m app.prefork --workers 4 --port 5000
+
+This process owns the data: it builds the facade from the config (any
+repository) and serves it over a local socket (FacadeServer). The N
+worker processes share one listening HTTP socket, each running the Flask
+app on a threaded WSGI server, with a RemoteFacade as app.services.facade.
+
+HTTP parsing, routing, validation and serialization (most of a request's
+time) run in parallel across the workers; facade calls go to the owner,
+batched per worker, and since only the owner touches the data every
+write is seen by every later read, whichever worker serves it. A worker
+that dies is replaced by a new one.
+"""
+
+
+import argparse
+import multiprocessing
+import multiprocessing.connection
+import os
+import shutil
+import signal
+import socket
+import sys
+import tempfile
+import time
+
+from app.services import facade
+from app.services.remote_facade import FacadeServer
+
+
+# a worker that exits sooner than this after starting is crashing at startup:
+# replacing it again would only spin, so the server stops instead
+_MIN_UPTIME_SECONDS = 1.0
+
+
+def _worker(sock, host, port):
+    # runs in a fresh (spawned) interpreter which inherited HBNB_FACADE_ADDRESS,
+    # so importing the app gives it a RemoteFacade
+    from werkzeug.serving import make_server
+    from app import create_app
+
+    server = make_server(host, port, create_app(), threaded=True, fd=sock.fileno())
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+def serve(host="127.0.0.1", port=5000, workers=None, ready=None):
+    """
+    Serve the API with `workers` processes (default: one per CPU) until
+    interrupted, replacing any worker that dies. ready(address) is called
+    once the workers are started.
+    """
+    workers = workers or os.cpu_count() or 1
+    sock = socket.create_server((host, port), backlog=1024)
+
+    authkey = os.urandom(32)
+    address = os.path.join(tempfile.mkdtemp(prefix="hbnb-"), "facade.sock")
+    server = FacadeServer(facade, address, authkey)
+    server.start()
+    os.environ["HBNB_FACADE_ADDRESS"] = address
+    os.environ["HBNB_FACADE_AUTHKEY"] = authkey.hex()
+
+    # spawn, not fork: the workers must import the app afresh, after the
+    # environment above is set, and not inherit the owner's facade threads
+    context = multiprocessing.get_context("spawn")
+
+    def start_worker():
+        process = context.Process(target=_worker, args=(sock, host, sock.getsockname()[1]), daemon=True)
+        process.start()
+        started[process.sentinel] = (process, time.monotonic())
+
+    started = {}
+    for _ in range(workers):
+        start_worker()
+    if ready:
+        ready(sock.getsockname())
+
+    stopping = []
+
+    def stop(*_):
+        stopping.append(True)
+        _terminate([process for process, _ in started.values()])
+    signal.signal(signal.SIGTERM, stop)
+    try:
+        while started and not stopping:
+            for sentinel in multiprocessing.connection.wait(list(started)):
+                process, since = started.pop(sentinel)
+                process.join()
+                if stopping:
+                    continue
+                if time.monotonic() - since < _MIN_UPTIME_SECONDS:
+                    print(f"Worker {process.pid} exited with code {process.exitcode} right after "
+                          f"starting; stopping", file=sys.stderr)
+                    stop()
+                    break
+                print(f"Worker {process.pid} exited with code {process.exitcode}; starting a new one",
+                      file=sys.stderr)
+                start_worker()
+    except KeyboardInterrupt:
+        stop()
+    finally:
+        server.close()
+        sock.close()
+        facade.close()
+        # closing the listener already removed the socket file
+        shutil.rmtree(os.path.dirname(address), ignore_errors=True)
+
+
+def _terminate(processes):
+    for process in processes:
+        if process.is_alive():
+            process.terminate()
+    for process in processes:
+        process.join(5)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the HBnB API with several worker processes")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5000)
+    parser.add_argument("--workers", type=int, help="worker processes (default: one per CPU)")
+    args = parser.parse_args(argv)
+    serve(args.host, args.port, args.workers,
+          ready=lambda address: print(f"Serving on http://{address[0]}:{address[1]} "
+                                      f"with {args.workers or os.cpu_count()} workers"))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,11 @@
 from app.services.facade import HBnBFacade
+from config import config
 
-facade = HBnBFacade()
\ No newline at end of file
+_config = config['default']
+if _config.FACADE_ADDRESS:
+    from app.services.remote_facade import RemoteFacade
+    facade = RemoteFacade(_config.FACADE_ADDRESS, bytes.fromhex(_config.FACADE_AUTHKEY),
+                          _config.FACADE_CONNECTIONS)
+else:
+    facade = HBnBFacade(repository=_config.REPOSITORY, database=_config.DATABASE,
+                        cache=_config.CACHE)
@@ -0,0 +1,83 @@
+import asyncio
+import contextvars
+import functools
+
+from app.persistence.async_repository import ThreadedAsyncRepository
+
+
+class AsyncHBnBFacade:
+    """
+    asyncio front of an HBnBFacade, sharing its repositories and indexes.
+
+    Single-object and page reads go straight through AsyncRepositories.
+    Every other facade method (creates, updates, searches...) has an async
+    variant of the same name that runs the synchronous method, offloaded
+    to `executor` when the backend blocks on I/O (sqlite by default).
+    """
+
+    def __init__(self, facade, executor=None, offload=None):
+        self.facade = facade
+        self.executor = executor
+        self.offload = facade.repository == "sqlite" if offload is None else offload
+
+        def wrap(repo):
+            return ThreadedAsyncRepository(repo, offload=self.offload, executor=executor)
+        self.user_repo = wrap(facade.user_repo)
+        self.amenity_repo = wrap(facade.amenity_repo)
+        self.place_repo = wrap(facade.place_repo)
+        self.review_repo = wrap(facade.review_repo)
+
+    async def _run(self, method, *args, **kwargs):
+        if not self.offload:
+            return method(*args, **kwargs)
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(
+            self.executor, functools.partial(context.run, method, *args, **kwargs))
+
+    async def get_user(self, user_id):
+        return await self.user_repo.get(user_id)
+
+    async def get_users_page(self, cursor=None, limit=20):
+        return await self.user_repo.get_page(cursor, limit)
+
+    async def get_amenity(self, amenity_id):
+        return await self.amenity_repo.get(amenity_id)
+
+    async def get_amenities_page(self, cursor=None, limit=20):
+        return await self.amenity_repo.get_page(cursor, limit)
+
+    async def get_place(self, place_id):
+        return await self.place_repo.get(place_id)
+
+    async def get_places_page(self, cursor=None, limit=20):
+        return await self.place_repo.get_page(cursor, limit)
+
+    async def get_review(self, review_id):
+        return await self.review_repo.get(review_id)
+
+    async def get_reviews_page(self, cursor=None, limit=20):
+        return await self.review_repo.get_page(cursor, limit)
+
+
+def _offloaded(name):
+    async def method(self, *args, **kwargs):
+        return await self._run(getattr(self.facade, name), *args, **kwargs)
+    method.__name__ = name
+    method.__doc__ = f"Async variant of HBnBFacade.{name}"
+    return method
+
+
+# facade methods that combine several repository calls and in-process
+# indexes: they keep running synchronously, off the event loop
+for _name in (
+        "create_user", "create_users", "update_user", "get_user_by_email", "get_all_users",
+        "create_amenity", "create_amenities", "get_amenities", "get_amenity_by_name",
+        "get_all_amenities", "update_amenity",
+        "create_place", "create_places", "get_all_places", "update_place", "filter_places",
+        "get_place_relations",
+        "get_places_sorted", "search_places_near", "search_places_in_box", "search_places_text",
+        "create_review", "create_reviews", "get_all_reviews", "get_reviews_for_place",
+        "get_reviews_by_user",
+        "update_review", "delete_review", "get_version", "cache_stats", "close"):
+    setattr(AsyncHBnBFacade, _name, _offloaded(_name))
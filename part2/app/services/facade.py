@@ -1,26 +1,305 @@
-from app.persistence.repository import InMemoryRepository
+from app.persistence.repository import InMemoryRepository, DuplicateKeyError
+from app.persistence.cached_repository import CachedRepository
+from app.persistence.spatial_index import GeoGridIndex
+from app.persistence.columnar import PlaceColumns, np
+from app.persistence.text_index import TextIndex
+from app.persistence.locks import RWLock, StripedLock
+from app.persistence.journal import Journal
+from app.persistence.mmap_snapshot import SnapshotRow
+from app.persistence.sqlite_repository import SQLiteRepository
+from app.persistence.schema import USER_SCHEMA, PLACE_SCHEMA, REVIEW_SCHEMA, AMENITY_SCHEMA
+from base64 import urlsafe_b64decode, urlsafe_b64encode
 from datetime import datetime    
+from itertools import islice
+import binascii
+import json
 from app.models.user import User
 from app.models.place import Place
 from app.models.review import Review
 from app.models.amenity import Amenity
 
+def normalize_email(email):
+    # emails are unique regardless of case or surrounding spaces
+    return email.strip().lower()
+
+
+class _UnbuiltPlace:
+    """
+    A place still in the journal snapshot, with the rating aggregates of its
+    snapshot reviews: enough for the search indexes, without building it
+    """
+
+    __slots__ = ("row", "rating_count", "rating_sum")
+
+    def __init__(self, row, histogram):
+        self.row = row
+        self.rating_count = sum(histogram)
+        self.rating_sum = sum(stars * count for stars, count in enumerate(histogram, 1))
+
+    average_rating = Place.average_rating
+
+    def __getattr__(self, name):
+        return getattr(self.row, name)
+
+
 class HBnBFacade:
-    def __init__(self):
-        self.user_repo = InMemoryRepository()
-        self.place_repo = InMemoryRepository()
-        self.review_repo = InMemoryRepository()
-        self.amenity_repo = InMemoryRepository()
+    def __init__(self, repository="memory", database=None, cache=None):
+        """
+        repository: "memory" (default), "sqlite", in which case `database`
+        is the path of the SQLite file, or "journal": in memory, with every
+        write logged to the directory `database` and replayed at startup
+
+        cache: table name -> CachedRepository options, e.g.
+        {"places": {"max_size": 10000, "ttl": 30}, "users": {}}; those
+        repositories get a read-through cache in front of them
+        """
+        if repository not in ("memory", "sqlite", "journal"):
+            raise ValueError(f"Unknown repository type '{repository}'")
+        self.repository = repository
+        self.database = database
+        self.cache = cache or {}
+        unknown = set(self.cache) - {"users", "amenities", "places", "reviews"}
+        if unknown:
+            raise ValueError(f"Cannot cache unknown table(s) {', '.join(sorted(unknown))}")
+        # table name -> repository, used to resolve relations when loading
+        self._repos = {}
+        # request threads share this facade: relation updates on one place or
+        # user (reviews, rating aggregates) are serialized per object id, and
+        # the search indexes below take one readers-writer lock
+        self._relation_locks = StripedLock()
+        self._search_lock = RWLock()
+        # journal only: relations of the reviews still in the snapshot, not
+        # built at startup. place_id -> ids of its reviews not in place.reviews
+        # yet (see _place_reviews), the same per user_id for user.reviews
+        # (see _user_reviews), and place_id -> rating histogram of those
+        # reviews, added to the place when it is built (see _load_place)
+        self._unattached_reviews = {}
+        self._unattached_user_reviews = {}
+        self._snapshot_ratings = {}
+
+        journal = repository == "journal"
+        self.user_repo = self._make_repo(USER_SCHEMA)
+        self.amenity_repo = self._make_repo(AMENITY_SCHEMA)
+        self.place_repo = self._make_repo(PLACE_SCHEMA,
+                                          on_load=self._load_place if journal else self._index_place)
+        # a review built from the journal snapshot needs nothing: its place
+        # has it counted already, and the place and its author list it on
+        # demand (_place_reviews, _user_reviews)
+        self.review_repo = self._make_repo(REVIEW_SCHEMA,
+                                           on_load=None if journal else self._attach_review)
+
+        # one user per email; the index also enforces it on create and update
+        self.user_repo.add_index('email', unique=True, key=normalize_email)
+        # amenity names are looked up on every create, keep them hashed
+        self.amenity_repo.add_index('name', unique=True)
+        # orderings offered by get_places_sorted
+        self.place_repo.add_sorted_index('price')
+        self.place_repo.add_sorted_index('created_at')
+
+        # place coordinates, kept next to place_repo for map searches
+        self.place_locations = GeoGridIndex()
+        # price / location / rating columns for vectorized filters, only when numpy is installed
+        self.place_columns = PlaceColumns() if np is not None else None
+        # keyword search: place title + description, and review text
+        self.place_text = TextIndex()
+        self.review_text = TextIndex()
+
+        if repository == "sqlite":
+            # loading every place and review rebuilds the in-process indexes
+            # and relations (place.reviews, rating aggregates, user.reviews)
+            self.review_repo.get_all()
+            for place in self.place_repo.get_all():
+                self._index_place(place)
+        elif repository == "journal":
+            # referenced tables first, so relations resolve to the final objects
+            for repo in (self.user_repo, self.amenity_repo, self.place_repo, self.review_repo):
+                repo.replay(self._resolve)
+            self._index_journal()
+
+    def _index_journal(self):
+        # Objects still in the snapshot stay unbuilt: the search indexes and
+        # rating aggregates are filled from the columns of the mapped rows.
+        # Only what the log replayed was built, and is attached as usual.
+        for review in self.review_repo.scan():
+            if review.__class__ is SnapshotRow:
+                self._unattached_reviews.setdefault(review.place_id, []).append(review.id)
+                self._unattached_user_reviews.setdefault(review.user_id, []).append(review.id)
+                self._snapshot_ratings.setdefault(review.place_id, [0, 0, 0, 0, 0])[review.rating - 1] += 1
+                self.review_text.add(review.id, review.text)
+            else:
+                self._attach_review(review)
+        for place in self.place_repo.scan():
+            if place.__class__ is SnapshotRow:
+                place = _UnbuiltPlace(place, self._snapshot_ratings.get(place.id, ()))
+            else:
+                # built while the log was replayed, before the ratings were known
+                self._load_place(place)
+            self._index_place(place)
+
+    def _load_place(self, place):
+        # a place built from the journal snapshot (or during its replay)
+        histogram = self._snapshot_ratings.pop(place.id, None)
+        if histogram:
+            place.add_ratings(histogram)
+
+    def _place_reviews(self, place):
+        """
+        place.reviews, after adding its reviews still unbuilt in the journal
+        snapshot (in front: they are older than the rest)
+        """
+        return self._attach_unattached(place, self._unattached_reviews)
+
+    def _user_reviews(self, user):
+        """
+        user.reviews, completed the same way as _place_reviews
+        """
+        return self._attach_unattached(user, self._unattached_user_reviews)
+
+    def _attach_unattached(self, obj, unattached):
+        pending = unattached.get(obj.id)
+        if pending:
+            # built outside the relation lock: taking it while the review
+            # table's build lock is held could deadlock
+            built = self.review_repo.get_many(pending)
+            with self._relation_locks(obj.id):
+                # whoever gets here first attaches them
+                if unattached.pop(obj.id, None) is not None:
+                    reviews = {review_id: built[review_id] for review_id in pending if review_id in built}
+                    reviews.update(obj.reviews)
+                    obj.reviews = reviews
+        return obj.reviews
+
+    def _make_repo(self, schema, on_load=None):
+        if self.repository == "sqlite":
+            repo = SQLiteRepository(self.database, schema, self._resolve, on_load=on_load)
+        elif self.repository == "journal":
+            repo = InMemoryRepository(journal=Journal(self.database, schema), on_load=on_load)
+        else:
+            repo = InMemoryRepository()
+        if schema.table in self.cache:
+            repo = CachedRepository(repo, **self.cache[schema.table])
+        self._repos[schema.table] = repo
+        return repo
+
+    def close(self):
+        """
+        Flush and release the storage behind the repositories
+        """
+        for repo in self._repos.values():
+            repo.close()
+
+    def cache_stats(self):
+        """
+        Counters of each cached repository, by table name
+        """
+        return {table: repo.stats() for table, repo in self._repos.items()
+                if isinstance(repo, CachedRepository)}
+
+    def _resolve(self, table, obj_id):
+        return self._repos[table].get(obj_id)
+
+    def _index_place(self, place):
+        # called after every change of a place; each index skips work it doesn't need
+        with self._search_lock.write():
+            self.place_locations.update(place.id, place.latitude, place.longitude)
+            if self.place_columns is not None:
+                self.place_columns.upsert(place)
+            self.place_text.add(place.id, f"{place.title}\n{place.description or ''}")
+
+    def _attach_review(self, review):
+        with self._relation_locks(review.place.id):
+            review.place.add_review(review)
+        with self._relation_locks(review.user.id):
+            review.user.add_review(review)
+        with self._search_lock.write():
+            self.review_text.add(review.id, review.text)
+
+    def _review_added(self, review):
+        self._attach_review(review)
+        self._touch_place(review.place)
+
+    def _touch_place(self, place):
+        # a place's rating aggregates are part of its representation, so a
+        # review change counts as a change of the place (updated_at / ETag)
+        place.save()
+        self.place_repo.update(place.id, {})
+        self._index_place(place)
+
+    def _iter_repo(self, repo, batch_size):
+        # walks the repository a page at a time, so only one page is held at once
+        # and writes made while iterating can't break the walk
+        cursor = None
+        while True:
+            page, cursor = repo.get_page(cursor, batch_size)
+            yield from page
+            if cursor is None:
+                return
+
+    def get_version(self, collection):
+        """
+        Write counter of one collection ("users", "places", "reviews", "amenities")
+        """
+        return self._repos[collection].get_version()
+
+    def _create_many(self, repo, items, build, after_add=None, duplicate_error="Already exists"):
+        """
+        Build every item, report the ones that fail, and insert the rest with one add_many.
+        Returns ([(index, obj), ...] created, [{"index": i, "error": message}, ...]).
+        """
+        built, errors = [], []
+        for index, data in enumerate(items):
+            try:
+                if not isinstance(data, dict):
+                    raise ValueError("Each item must be a JSON object")
+                # builders may normalise fields in place, keep the caller's dict intact
+                built.append((index, build(dict(data))))
+            except KeyError as err:
+                errors.append({"index": index, "error": f"Missing required field: {err}"})
+            except (ValueError, TypeError) as err:
+                errors.append({"index": index, "error": str(err)})
+
+        created = []
+        try:
+            repo.add_many([obj for _, obj in built])
+            created = built
+        except DuplicateKeyError:
+            # something collides (with stored data or within the batch);
+            # fall back to one by one to find out which items
+            for index, obj in built:
+                try:
+                    repo.add(obj)
+                    created.append((index, obj))
+                except DuplicateKeyError:
+                    errors.append({"index": index, "error": duplicate_error})
+
+        for _, obj in created:
+            if after_add:
+                after_add(obj)
+        errors.sort(key=lambda error: error["index"])
+        return created, errors
 
     # USER FACADE
     # takes a dictionary of user data
     def create_user(self, user_data):
-        # using dictionary unpacking (**)
-        user_data["email"] = user_data["email"].strip().lower()
-        user = User(**user_data)
-        self.user_repo.add(user)
+        user = self._build_user(user_data)
+        try:
+            self.user_repo.add(user)
+        except DuplicateKeyError:
+            raise ValueError("Email already registered")
         return user
 
+    def _build_user(self, user_data):
+        # using dictionary unpacking (**)
+        user_data["email"] = normalize_email(user_data["email"])
+        return User(**user_data)
+
+    def create_users(self, users_data):
+        """
+        Batch version of create_user: returns ((index, user) pairs created, per-item errors)
+        """
+        return self._create_many(self.user_repo, users_data, self._build_user,
+                                 duplicate_error="Email already registered")
+
     # takes user id and returns the user object (or None if not found)
     def get_user(self, user_id):
         return (self.user_repo.get(user_id))
@@ -31,8 +310,13 @@ class HBnBFacade:
         # if user doesn't exist, returns None to indicate failure
         if not user:
             return None
-        # if user exists, calls repo to update with new data
-        self.user_repo.update(user_id, data)
+        # if user exists, calls repo to update with new data; anything but the
+        # editable fields (the reviews relation, password...) is ignored
+        data = {key: value for key, value in data.items() if key in User.EDITABLE_FIELDS}
+        try:
+            self.user_repo.update(user_id, data)
+        except DuplicateKeyError:
+            raise ValueError("Email already registered")
         # fetches and returns the updated user (to ensure we have the latest data with updated timestamps)
         return self.user_repo.get(user_id)
 
@@ -42,39 +326,58 @@ class HBnBFacade:
         if not email or not email.strip():
             return (None)
 
-        # search through all users manually
-        all_users = self.user_repo.get_all()
-        for user in all_users:
-            # email strip lower - removes spaces and converts to lowercase
-            # user email lower - converts stored email to lowercase
-            # compares them for equality
-            if user.email.lower() == email.strip().lower():
-                return (user)
+        # the email index normalises both sides, so this is a single hash lookup
         # returns matching user or none
-        return (None)
+        return self.user_repo.get_by_attribute('email', email)
 
     # returns list of all users
     def get_all_users(self):
         return self.user_repo.get_all()
 
+    # returns one page of users and the cursor of the next one
+    def get_users_page(self, cursor=None, limit=20):
+        return self.user_repo.get_page(cursor, limit)
+
     # Placeholder method for fetching a place by ID
     def get_place(self, place_id):
         # Logic will be implemented in later tasks
         pass
 
     def create_amenity(self, amenity_data):
-       name = amenity_data.get('name')
-       if not name:
-           raise ValueError("Missing required field: 'name'")
-       
-       existing = self.get_amenity_by_name(name)
+       existing = self.get_amenity_by_name(amenity_data.get('name'))
        if existing:
            raise ValueError('Amenity already exists')
        # Create amenity instance from dict, add it to repo and return created amenity
-       amenity = Amenity(**amenity_data)
+       amenity = self._build_amenity(amenity_data)
        self.amenity_repo.add(amenity)
        return amenity
 
+    def get_amenities(self, amenity_ids):
+        """
+        Resolve amenity ids in one repository call, keeping their order.
+        Raises ValueError naming every id that doesn't exist.
+        """
+        found = self.amenity_repo.get_many(amenity_ids)
+        missing = [aid for aid in amenity_ids if aid not in found]
+        if len(missing) == 1:
+            raise ValueError(f"Amenity id '{missing[0]}' does not exist")
+        if missing:
+            raise ValueError("Amenity ids " + ", ".join(f"'{aid}'" for aid in missing) + " do not exist")
+        return [found[aid] for aid in amenity_ids]
+
+    def _build_amenity(self, amenity_data):
+        name = amenity_data.get('name')
+        if not name:
+            raise ValueError("Missing required field: 'name'")
+        return Amenity(**amenity_data)
+
+    def create_amenities(self, amenities_data):
+        """
+        Batch version of create_amenity: returns ((index, amenity) pairs created, per-item errors)
+        """
+        return self._create_many(self.amenity_repo, amenities_data, self._build_amenity,
+                                 duplicate_error="Amenity already exists")
+
     def get_amenity(self, amenity_id):
         return self.amenity_repo.get(amenity_id)
     
@@ -84,6 +387,9 @@ class HBnBFacade:
  
     def get_all_amenities(self):
         return self.amenity_repo.get_all()
+
+    def get_amenities_page(self, cursor=None, limit=20):
+        return self.amenity_repo.get_page(cursor, limit)
     
     def update_amenity(self, amenity_id, amenity_data):
         amenity = self.amenity_repo.get(amenity_id)
@@ -94,17 +400,25 @@ class HBnBFacade:
         return amenity
     
     def create_place(self, place_data: dict):
+        new_place = self._build_place(place_data)
+        self.place_repo.add(new_place)
+        self._index_place(new_place)
+        return new_place
+
+    def create_places(self, places_data):
+        """
+        Batch version of create_place: returns ((index, place) pairs created, per-item errors)
+        """
+        return self._create_many(self.place_repo, places_data, self._build_place,
+                                 after_add=self._index_place)
+
+    def _build_place(self, place_data: dict):
         owner = self.get_user(place_data.get("owner_id"))
         if not owner:
             raise ValueError("owner_id does not correspond to an existing user")
 
-        amenities = []
-        for aid in place_data.get("amenity_ids", []):
-            amenity = self.get_amenity(aid)
-            if not amenity:
-                raise ValueError(f"Amenity id '{aid}' does not exist")
-            amenities.append(amenity)
-            
+        amenities = self.get_amenities(place_data.get("amenity_ids", []))
+
         new_place = Place(
             title       = place_data["title"],
             description = place_data.get("description", ""),
@@ -114,7 +428,6 @@ class HBnBFacade:
             owner       = owner
         )
         new_place.amenities = amenities
-        self.place_repo.add(new_place)
         return new_place
         
     def get_place(self, place_id):
@@ -123,6 +436,15 @@ class HBnBFacade:
     def get_all_places(self):
         return self.place_repo.get_all()
 
+    def iter_places(self, batch_size=500):
+        """
+        Every place, in creation order, fetched lazily batch by batch
+        """
+        return self._iter_repo(self.place_repo, batch_size)
+
+    def get_places_page(self, cursor=None, limit=20):
+        return self.place_repo.get_page(cursor, limit)
+
     def update_place(self, place_id, data: dict):
         """
         Partial update. Unknown keys are ignored.
@@ -131,29 +453,168 @@ class HBnBFacade:
         if not place:
             return None
 
+        # collected and written through the repository, which applies them
+        # to the place (Place.update) only once they are stored
+        changes = {}
         if "owner_id" in data:
             owner = self.get_user(data["owner_id"])
             if not owner:
                 raise ValueError("owner_id does not correspond to an existing user")
-            place.owner = owner
+            changes["owner"] = owner
 
         if "amenity_ids" in data:
-            amenities = []
-            for aid in data["amenity_ids"]:
-                amenity = self.get_amenity(aid)
-                if not amenity:
-                    raise ValueError(f"Amenity id '{aid}' does not exist")
-                amenities.append(amenity)
-            place.amenities = amenities
+            changes["amenities"] = self.get_amenities(data["amenity_ids"])
 
         for field in ["title", "description", "price", "latitude", "longitude"]:
             if field in data:
-                setattr(place, field, data[field])
+                changes[field] = data[field]
 
-        place.updated_at = datetime.utcnow()
-        self.place_repo.update(place_id, data)
+        self.place_repo.update(place_id, changes)
+        self._index_place(place)
         return place
+
+    def filter_places(self, min_price=None, max_price=None, bbox=None):
+        """
+        Places with min_price <= price <= max_price inside bbox
+        (min_lon, min_lat, max_lon, max_lat), in creation order.
+        Every argument is optional.
+        """
+        if self.place_columns is not None:
+            places = []
+            with self._search_lock.read():
+                place_ids = self.place_columns.filter(min_price, max_price, bbox)
+            for place_id in place_ids:
+                place = self.place_repo.get(place_id)
+                if place:
+                    places.append(place)
+            return places
+
+        # no numpy: same predicates, one place at a time
+        return [place for place in self.place_repo.get_all()
+                if self._place_matches(place, min_price, max_price, bbox)]
+
+    @staticmethod
+    def _place_matches(place, min_price=None, max_price=None, bbox=None):
+        if min_price is not None and place.price < min_price:
+            return False
+        if max_price is not None and place.price > max_price:
+            return False
+        if bbox is not None:
+            min_lon, min_lat, max_lon, max_lat = bbox
+            if not (min_lat <= place.latitude <= max_lat):
+                return False
+            if min_lon <= max_lon:
+                return min_lon <= place.longitude <= max_lon
+            return place.longitude >= min_lon or place.longitude <= max_lon
+        return True
+
+    def get_places_sorted(self, sort="price", descending=False, min_price=None, max_price=None,
+                          bbox=None, cursor=None, limit=None):
+        """
+        Places ordered by `sort` ("price" or "created_at") and filtered like
+        filter_places; ties are in creation order, reversed with descending.
+        Returns (places, next_cursor); the cursor is an opaque string naming
+        the last place returned (its sort value and insertion position), so
+        the next page seeks straight past it and stays right when places are
+        added or removed in between. Without a limit every match is returned
+        with next_cursor None. Raises ValueError on a malformed cursor.
+
+        Sorting by price reads only the requested price range off the
+        sorted index: O(log N + limit) when there is no bbox.
+        """
+        if sort not in ("price", "created_at"):
+            raise ValueError(f"Cannot sort places by '{sort}'")
+        after = self._decode_sort_cursor(sort, cursor) if cursor else None
+        if sort == "price":
+            places = self.place_repo.iter_sorted("price", min_price, max_price, descending, after, True)
+            min_price = max_price = None
+        else:
+            places = self.place_repo.iter_sorted("created_at", reverse=descending, after=after, with_keys=True)
+        if min_price is not None or max_price is not None or bbox is not None:
+            places = ((key, place) for key, place in places
+                      if self._place_matches(place, min_price, max_price, bbox))
+
+        if limit is None:
+            return [place for _, place in places], None
+        page = list(islice(places, limit + 1))
+        next_cursor = self._encode_sort_cursor(page[limit - 1][0]) if len(page) > limit else None
+        return [place for _, place in page[:limit]], next_cursor
+
+    @staticmethod
+    def _encode_sort_cursor(key):
+        value, position = key
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        return urlsafe_b64encode(json.dumps([value, position]).encode()).decode().rstrip("=")
+
+    @staticmethod
+    def _decode_sort_cursor(sort, cursor):
+        try:
+            value, position = json.loads(urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+            if sort == "created_at":
+                value = datetime.fromisoformat(value)
+            elif isinstance(value, bool) or not isinstance(value, (int, float)):
+                raise ValueError()
+            if isinstance(position, bool) or not isinstance(position, int):
+                raise ValueError()
+        except (ValueError, TypeError, binascii.Error):
+            raise ValueError("Invalid cursor")
+        return value, position
+
+    def search_places_near(self, latitude, longitude, radius_km):
+        """
+        Places within radius_km of the point as (place, distance_km), nearest first
+        """
+        with self._search_lock.read():
+            matches = self.place_locations.within_radius(latitude, longitude, radius_km)
+        results = []
+        for place_id, distance in matches:
+            place = self.place_repo.get(place_id)
+            if place:
+                results.append((place, distance))
+        return results
+
+    def search_places_in_box(self, min_lat, min_lon, max_lat, max_lon):
+        """
+        Places inside the bounding box (min_lon > max_lon crosses the antimeridian)
+        """
+        with self._search_lock.read():
+            place_ids = self.place_locations.within_bbox(min_lat, min_lon, max_lat, max_lon)
+        places = []
+        for place_id in place_ids:
+            place = self.place_repo.get(place_id)
+            if place:
+                places.append(place)
+        return places
     
+    # a matching review counts for its place, at half the weight of the place's own text
+    REVIEW_MATCH_WEIGHT = 0.5
+
+    def search_places_text(self, query, limit=20):
+        """
+        Places matching the keywords in their title, description or reviews,
+        as (place, score), best first
+        """
+        with self._search_lock.read():
+            scores = self.place_text.search(query)
+            review_scores = self.review_text.search(query)
+        best_reviews = {}
+        for review_id, score in review_scores.items():
+            review = self.review_repo.get(review_id)
+            if review and score > best_reviews.get(review.place.id, 0):
+                best_reviews[review.place.id] = score
+        for place_id, score in best_reviews.items():
+            scores[place_id] = scores.get(place_id, 0) + self.REVIEW_MATCH_WEIGHT * score
+
+        results = []
+        for place_id, score in sorted(scores.items(), key=lambda item: item[1], reverse=True):
+            place = self.place_repo.get(place_id)
+            if place:
+                results.append((place, score))
+                if len(results) == limit:
+                    break
+        return results
+
     # REVIEW FACADE
 
     def get_review(self, review_id):
@@ -162,10 +623,55 @@ class HBnBFacade:
     def get_all_reviews(self):
         return self.review_repo.get_all()
 
+    def iter_reviews(self, batch_size=500):
+        """
+        Every review, in creation order, fetched lazily batch by batch
+        """
+        return self._iter_repo(self.review_repo, batch_size)
+
+    def get_reviews_page(self, cursor=None, limit=20):
+        return self.review_repo.get_page(cursor, limit)
+
 
     def get_reviews_for_place(self, place_id):
         place = self.get_place(place_id)
-        return place.reviews if place else None
+        return list(self._place_reviews(place).values()) if place else None
+
+    def get_reviews_by_user(self, user_id):
+        user = self.get_user(user_id)
+        return list(self._user_reviews(user).values()) if user else None
+
+    # relations get_place_relations can resolve
+    PLACE_RELATIONS = ("owner", "amenities", "reviews")
+
+    def get_place_relations(self, place, expand):
+        """
+        The objects related to `place` named in `expand` (some of "owner",
+        "amenities", "reviews"), resolved in one batched pass: a single
+        get_many per table, however many reviews the place has. Returns a
+        dict with those keys, plus "authors" ({user_id: user}) with reviews.
+        Related objects that no longer exist are left out (owner: None).
+        """
+        unknown = set(expand) - set(self.PLACE_RELATIONS)
+        if unknown:
+            raise ValueError(f"Cannot expand {', '.join(sorted(unknown))}")
+        reviews = list(self._place_reviews(place).values()) if "reviews" in expand else []
+        user_ids = [review.user.id for review in reviews]
+        if "owner" in expand and place.owner:
+            user_ids.append(place.owner.id)
+        users = self.user_repo.get_many(user_ids) if user_ids else {}
+
+        related = {}
+        if "owner" in expand:
+            related["owner"] = users.get(place.owner.id) if place.owner else None
+        if "amenities" in expand:
+            found = self.amenity_repo.get_many([amenity.id for amenity in place.amenities])
+            related["amenities"] = [found[amenity.id] for amenity in place.amenities
+                                    if amenity.id in found]
+        if "reviews" in expand:
+            related["reviews"] = reviews
+            related["authors"] = users
+        return related
 
 
     def update_review(self, review_id, data: dict):
@@ -187,6 +693,19 @@ class HBnBFacade:
         """
         Expects: text, rating (1–5), user_id, place_id
         """
+        review = self._build_review(review_data)
+        self.review_repo.add(review)
+        self._review_added(review)
+        return review
+
+    def create_reviews(self, reviews_data):
+        """
+        Batch version of create_review: returns ((index, review) pairs created, per-item errors)
+        """
+        return self._create_many(self.review_repo, reviews_data, self._build_review,
+                                 after_add=self._review_added)
+
+    def _build_review(self, review_data: dict):
         user = self.get_user(review_data.get("user_id"))
         if not user:
             raise ValueError("Invalid user_id")
@@ -206,12 +725,7 @@ class HBnBFacade:
         if not text or not text.strip():
             raise ValueError("Review text cannot be empty")
 
-        review = Review(text=text.strip(), rating=rating, user=user, place=place)
-        self.review_repo.add(review)
-
-        place.reviews.append(review)
-
-        return review
+        return Review(text=text.strip(), rating=rating, user=user, place=place)
 
 
     def update_review(self, review_id, data: dict):
@@ -219,17 +733,32 @@ class HBnBFacade:
         if not review:
             return None
 
+        # collected and written through the repository so persistent stores see them
+        changes = {}
         if "text" in data:
             if not data["text"].strip():
                 raise ValueError("Review text cannot be empty")
-            review.text = data["text"].strip()
+            changes["text"] = data["text"].strip()
 
         if "rating" in data:
             if not isinstance(data["rating"], int) or not (1 <= data["rating"] <= 5):
                 raise ValueError("Rating must be an integer between 1 and 5")
-            review.rating = data["rating"]
-
-        review.updated_at = datetime.utcnow()
+            changes["rating"] = data["rating"]
+
+        # the old rating is read and replaced under the place's lock, so two
+        # concurrent updates can't both subtract the same old rating, and a
+        # review deleted meanwhile isn't counted again
+        with self._relation_locks(review.place.id):
+            if self.review_repo.get(review_id) is not review:
+                return None
+            if "rating" in changes:
+                review.place.change_rating(review.rating, changes["rating"])
+            review.updated_at = datetime.utcnow()
+            self.review_repo.update(review_id, changes)
+        with self._search_lock.write():
+            self.review_text.add(review.id, review.text)
+        if "rating" in changes:
+            self._touch_place(review.place)
         return review
     
     def delete_review(self, review_id):
@@ -237,9 +766,21 @@ class HBnBFacade:
         if not review:
             return False
 
-        review.place.reviews = [
-            r for r in review.place.reviews if r.id != review_id
-        ]
-        self.review_repo.delete(review_id)
+        # its rating is only taken back if the place lists it, and neither
+        # the place nor the author may attach it again afterwards
+        self._place_reviews(review.place)
+        self._user_reviews(review.user)
+        # under the lock update_review takes: an update either lands before
+        # the rating is taken back or sees the review gone
+        with self._relation_locks(review.place.id):
+            if self.review_repo.get(review_id) is not review:
+                return False
+            review.place.remove_review(review)
+            self.review_repo.delete(review_id)
+        with self._relation_locks(review.user.id):
+            review.user.remove_review(review)
+        with self._search_lock.write():
+            self.review_text.remove(review_id)
+        self._touch_place(review.place)
         return True
     
\ No newline at end of file
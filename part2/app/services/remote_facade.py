@@ -0,0 +1,303 @@
+"""
+The facade over a local IPC channel: a FacadeServer in the process that
+owns the data, RemoteFacade clients in the worker processes (see app/prefork.py)
+"""
+
+
+import io
+import pickle
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from multiprocessing.connection import Client, Listener
+
+from app.models.base_model import BaseModel
+from app.services.facade import HBnBFacade
+
+
+# most calls one message carries; more wait for the next round trip
+MAX_BATCH = 256
+# connections (so batches in flight) per worker, and threads running calls in the owner
+CONNECTIONS = 4
+OWNER_THREADS = 16
+
+
+class ModelRef:
+    """
+    Stands for a related object that wasn't sent along with a result:
+    only its id is known (enough for owner_id, place_id, amenity ids...)
+    """
+
+    __slots__ = ("model", "id")
+
+    def __init__(self, model, id):
+        self.model = model
+        self.id = id
+
+    def __getattr__(self, name):
+        raise AttributeError(f"Only the id of {self.model} {self.id} was sent; "
+                             f"fetch the object itself to read '{name}'")
+
+    def __repr__(self):
+        return f"ModelRef({self.model!r}, {self.id!r})"
+
+
+def _model_fields(obj):
+    fields = {}
+    for cls in type(obj).__mro__:
+        for name in getattr(cls, "__slots__", ()):
+            # the serialization cache is rebuilt on the other side
+            if name != "_serialized" and hasattr(obj, name):
+                fields[name] = getattr(obj, name)
+    return fields
+
+
+def _rebuild_model(cls, fields):
+    obj = cls.__new__(cls)
+    for name, value in fields.items():
+        setattr(obj, name, value)
+    obj._serialized = None
+    return obj
+
+
+def _collect_models(value, found):
+    # models a result holds directly (through lists, tuples, dicts, sets)
+    if isinstance(value, BaseModel):
+        found.add(id(value))
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        for item in value:
+            _collect_models(item, found)
+    elif isinstance(value, dict):
+        for item in value.values():
+            _collect_models(item, found)
+
+
+class _ModelPickler(pickle.Pickler):
+    """
+    Pickles the `roots` models with their own fields only: objects they
+    merely refer to (place.owner, review.user, place.reviews...) travel as
+    ModelRefs, so a message never drags the object graph behind it
+    """
+
+    def __init__(self, file, roots):
+        super().__init__(file, pickle.HIGHEST_PROTOCOL)
+        self._roots = roots
+
+    def reducer_override(self, obj):
+        if isinstance(obj, BaseModel):
+            if id(obj) in self._roots:
+                return _rebuild_model, (type(obj), _model_fields(obj))
+            return ModelRef, (type(obj).__name__, obj.id)
+        return NotImplemented
+
+
+def dumps_result(value):
+    """
+    A result: the models it holds are sent whole, see _ModelPickler
+    """
+    roots = set()
+    _collect_models(value, roots)
+    buffer = io.BytesIO()
+    _ModelPickler(buffer, roots).dump(value)
+    return buffer.getvalue()
+
+
+def dumps_call(value):
+    """
+    Call arguments: every model is sent as a ModelRef, the owner process
+    passes its own object on (a worker's copy only has refs for relations)
+    """
+    buffer = io.BytesIO()
+    _ModelPickler(buffer, set()).dump(value)
+    return buffer.getvalue()
+
+
+class FacadeServer:
+    """
+    Serves one HBnBFacade to the workers. Each message is a batch of calls
+    [(method, args, kwargs), ...] from unrelated requests, answered with
+    [(ok, result or exception), ...]. Every connection gets a thread and
+    the calls of a batch run concurrently on a shared pool of `threads`:
+    the facade is already safe to share between threads (reads don't
+    exclude each other), and as the only process holding the data it
+    keeps writes consistent.
+    """
+
+    def __init__(self, facade, address, authkey, threads=OWNER_THREADS):
+        self.facade = facade
+        self.listener = Listener(address, authkey=authkey)
+        self.address = self.listener.address
+        self._executor = ThreadPoolExecutor(threads, thread_name_prefix="hbnb-facade")
+        # close() belongs to the owner process, workers only close their channel
+        self._methods = {name for name in dir(HBnBFacade)
+                         if not name.startswith("_") and callable(getattr(HBnBFacade, name))
+                         and name != "close"}
+        self._closed = False
+        self._repos = {"User": facade.user_repo, "Amenity": facade.amenity_repo,
+                       "Place": facade.place_repo, "Review": facade.review_repo}
+
+    def serve_forever(self):
+        while not self._closed:
+            try:
+                conn = self.listener.accept()
+            except OSError:
+                if self._closed:
+                    return
+                raise
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    def start(self):
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return thread
+
+    def close(self):
+        self._closed = True
+        self.listener.close()
+        self._executor.shutdown(wait=False)
+
+    def _serve(self, conn):
+        with conn:
+            while True:
+                try:
+                    calls = pickle.loads(conn.recv_bytes())
+                except (EOFError, OSError):
+                    return
+                if len(calls) == 1:
+                    results = [self._call(*calls[0])]
+                else:
+                    results = list(self._executor.map(lambda call: self._call(*call), calls))
+                try:
+                    message = dumps_result(results)
+                except Exception as err:
+                    # report it against the calls instead of losing the connection
+                    message = dumps_result([(False, RuntimeError(f"Cannot send the result of {call[0]}: {err}"))
+                                     for call in calls])
+                conn.send_bytes(message)
+
+    def _call(self, name, args, kwargs):
+        if name not in self._methods:
+            return False, AttributeError(f"HBnBFacade has no method '{name}'")
+        try:
+            args = [self._live(arg) for arg in args]
+            kwargs = {key: self._live(value) for key, value in kwargs.items()}
+            return True, getattr(self.facade, name)(*args, **kwargs)
+        except Exception as err:
+            return False, err
+
+    def _live(self, value):
+        if isinstance(value, ModelRef):
+            obj = self._repos[value.model].get(value.id)
+            if obj is None:
+                raise ValueError(f"{value.model} {value.id} does not exist")
+            return obj
+        return value
+
+
+class RemoteFacade:
+    """
+    Drop-in HBnBFacade for a worker process. Calls from the worker's
+    request threads are queued and sent together over a pool of
+    `connections`, one dispatcher thread each: up to that many batches
+    are out at once, and the next ones fill up meanwhile, so many
+    concurrent requests share a round trip without waiting for each
+    other's. Returned models are copies; their related objects are ModelRefs.
+    """
+
+    # constants the API layer reads off the facade
+    PLACE_RELATIONS = HBnBFacade.PLACE_RELATIONS
+    # no local repositories (see instrument_facade)
+    _repos = {}
+
+    def __init__(self, address, authkey, connections=CONNECTIONS):
+        self._address = address
+        self._authkey = authkey
+        self._cond = threading.Condition()
+        self._pending = []
+        self._closed = False
+        # the first connection is opened right away, so a bad address fails here
+        first = Client(address, authkey=authkey)
+        self._dispatchers = [threading.Thread(target=self._dispatch, args=(first if i == 0 else None,),
+                                              daemon=True)
+                             for i in range(max(1, connections))]
+        for dispatcher in self._dispatchers:
+            dispatcher.start()
+
+    def _call(self, name, *args, **kwargs):
+        future = Future()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("RemoteFacade is closed")
+            self._pending.append(((name, args, kwargs), future))
+            self._cond.notify()
+        ok, value = future.result()
+        if not ok:
+            raise value
+        return value
+
+    def _dispatch(self, conn):
+        try:
+            while True:
+                with self._cond:
+                    while not self._pending and not self._closed:
+                        self._cond.wait()
+                    if self._closed and not self._pending:
+                        return
+                    batch, self._pending = self._pending[:MAX_BATCH], self._pending[MAX_BATCH:]
+                try:
+                    if conn is None:
+                        conn = Client(self._address, authkey=self._authkey)
+                    conn.send_bytes(dumps_call([call for call, _ in batch]))
+                    results = pickle.loads(conn.recv_bytes())
+                except Exception as err:
+                    # the batch may or may not have run, so it isn't resent; the
+                    # channel is dropped and the next batch opens a fresh one
+                    results = [(False, err)] * len(batch)
+                    if conn is not None:
+                        conn.close()
+                        conn = None
+                for (_, future), result in zip(batch, results):
+                    future.set_result(result)
+        finally:
+            if conn is not None:
+                conn.close()
+
+    def close(self):
+        """
+        Close this worker's channels; the data stays with the owner process
+        """
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        # calls already queued are still sent
+        for dispatcher in self._dispatchers:
+            dispatcher.join()
+
+    # generators can't cross the channel: walk the pages from here instead
+
+    def _iter_pages(self, get_page, batch_size):
+        cursor = None
+        while True:
+            page, cursor = get_page(cursor, batch_size)
+            yield from page
+            if cursor is None:
+                return
+
+    def iter_places(self, batch_size=500):
+        return self._iter_pages(self.get_places_page, batch_size)
+
+    def iter_reviews(self, batch_size=500):
+        return self._iter_pages(self.get_reviews_page, batch_size)
+
+
+def _remote(name):
+    def method(self, *args, **kwargs):
+        return self._call(name, *args, **kwargs)
+    method.__name__ = name
+    method.__doc__ = f"HBnBFacade.{name}, run by the owner process"
+    return method
+
+
+for _name in dir(HBnBFacade):
+    if (not _name.startswith("_") and callable(getattr(HBnBFacade, _name))
+            and not hasattr(RemoteFacade, _name)):
+        setattr(RemoteFacade, _name, _remote(_name))
@@ -0,0 +1,73 @@
+"""
+Compare two benchmark result files:
+
+    python -m benchmarks.compare OLD.json NEW.json [--threshold 10]
+
+Prints the change of throughput and p50/p99 per benchmark and exits with
+status 1 when any p99 got worse by more than threshold percent.
+"""
+
+
+import argparse
+import json
+import sys
+
+
+def _change(old, new):
+    if not old or new is None:
+        return None
+    return (new - old) / old * 100
+
+
+def compare(old_report, new_report):
+    """
+    One row per benchmark present in both reports:
+    (kind, name, ops/s change %, p50 change %, p99 change %)
+    """
+    old = {(r["kind"], r["name"]): r for r in old_report["results"]}
+    rows = []
+    for result in new_report["results"]:
+        before = old.get((result["kind"], result["name"]))
+        if before is None:
+            continue
+        rows.append((result["kind"], result["name"],
+                     _change(before["ops_per_sec"], result["ops_per_sec"]),
+                     _change(before["p50_ms"], result["p50_ms"]),
+                     _change(before["p99_ms"], result["p99_ms"])))
+    return rows
+
+
+def _percent(value):
+    return "     n/a" if value is None else f"{value:+7.1f}%"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files")
+    parser.add_argument("old")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float, default=10.0,
+                        help="p99 regression, in percent, that fails the comparison")
+    args = parser.parse_args(argv)
+
+    with open(args.old) as f:
+        old_report = json.load(f)
+    with open(args.new) as f:
+        new_report = json.load(f)
+    for key in ("scale", "repository"):
+        if old_report["meta"][key] != new_report["meta"][key]:
+            print(f"warning: {key} differs ({old_report['meta'][key]} vs {new_report['meta'][key]})",
+                  file=sys.stderr)
+
+    print(f"{old_report['meta']['commit']} -> {new_report['meta']['commit']}")
+    regressed = False
+    for kind, name, ops, p50, p99 in compare(old_report, new_report):
+        flag = ""
+        if p99 is not None and p99 > args.threshold:
+            regressed = True
+            flag = "  REGRESSION"
+        print(f"{kind:7} {name:48} ops/s {_percent(ops)}  p50 {_percent(p50)}  p99 {_percent(p99)}{flag}")
+    return 1 if regressed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+"""
+Deterministic synthetic datasets for the benchmarks
+"""
+
+
+import random
+
+
+# name -> how many of each entity; "tiny" is for smoke runs and the test suite
+SCALES = {
+    "tiny": {"users": 50, "amenities": 10, "places": 100, "reviews": 200},
+    "1k": {"users": 200, "amenities": 20, "places": 1_000, "reviews": 2_000},
+    "10k": {"users": 2_000, "amenities": 50, "places": 10_000, "reviews": 20_000},
+    "100k": {"users": 20_000, "amenities": 100, "places": 100_000, "reviews": 200_000},
+    "1m": {"users": 200_000, "amenities": 200, "places": 1_000_000, "reviews": 2_000_000},
+}
+
+WORDS = ("cozy", "bright", "quiet", "modern", "rustic", "sunny", "spacious", "charming",
+         "loft", "cottage", "studio", "villa", "cabin", "apartment", "house", "suite",
+         "beach", "mountain", "city", "garden", "river", "lake", "forest", "harbour")
+
+# where the places are: (latitude, longitude) of a few cities, jittered
+CITIES = ((48.857, 2.352), (51.507, -0.128), (40.713, -74.006), (35.690, 139.692),
+          (-33.869, 151.209), (-22.907, -43.173), (52.520, 13.405), (41.390, 2.154))
+
+BATCH_SIZE = 1_000
+
+
+class Dataset:
+    """
+    Ids of what was seeded, for the benchmarks to pick arguments from
+    """
+
+    def __init__(self, rng):
+        self.rng = rng
+        self.user_ids = []
+        self.user_emails = []
+        self.amenity_ids = []
+        self.place_ids = []
+        self.review_ids = []
+
+    def pick(self, ids):
+        return ids[self.rng.randrange(len(ids))]
+
+
+def _text(rng, words):
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def _batches(items):
+    for start in range(0, len(items), BATCH_SIZE):
+        yield items[start:start + BATCH_SIZE]
+
+
+def _seed_batches(create_many, items, ids):
+    for batch in _batches(items):
+        created, errors = create_many(batch)
+        if errors:
+            raise RuntimeError(f"Seeding failed: {errors[0]}")
+        ids.extend(obj.id for _, obj in created)
+
+
+def seed(facade, users, amenities, places, reviews, seed=42):
+    """
+    Fill facade through its batch create methods. The same seed always
+    gives the same content (ids are still fresh uuids).
+    """
+    rng = random.Random(seed)
+    data = Dataset(random.Random(seed + 1))
+
+    user_items = [{"first_name": f"User{i}", "last_name": "Bench", "email": f"user{i}@bench.example"}
+                  for i in range(users)]
+    _seed_batches(facade.create_users, user_items, data.user_ids)
+    data.user_emails = [item["email"] for item in user_items]
+
+    _seed_batches(facade.create_amenities,
+                  [{"name": f"Amenity {i}"} for i in range(amenities)], data.amenity_ids)
+
+    place_items, owners = [], []
+    for i in range(places):
+        latitude, longitude = rng.choice(CITIES)
+        owner_index = rng.randrange(users)
+        owners.append(owner_index)
+        place_items.append({
+            "title": _text(rng, 3).capitalize(),
+            "description": _text(rng, 12),
+            "price": rng.randrange(20, 1000),
+            "latitude": round(latitude + rng.uniform(-0.2, 0.2), 5),
+            "longitude": round(longitude + rng.uniform(-0.2, 0.2), 5),
+            "owner_id": data.user_ids[owner_index],
+            "amenity_ids": rng.sample(data.amenity_ids, min(3, len(data.amenity_ids))),
+        })
+    _seed_batches(facade.create_places, place_items, data.place_ids)
+
+    review_items = []
+    for i in range(reviews):
+        place_index = rng.randrange(places)
+        # nobody reviews their own place
+        user_index = (owners[place_index] + 1 + rng.randrange(users - 1)) % users
+        review_items.append({
+            "text": _text(rng, 8),
+            "rating": rng.randint(1, 5),
+            "user_id": data.user_ids[user_index],
+            "place_id": data.place_ids[place_index],
+        })
+    _seed_batches(facade.create_reviews, review_items, data.review_ids)
+    return data
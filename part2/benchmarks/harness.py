@@ -0,0 +1,48 @@
+"""
+Timing loop and latency statistics
+"""
+
+
+import time
+
+
+def percentile(sorted_values, fraction):
+    """
+    Nearest-rank percentile of an already sorted list
+    """
+    if not sorted_values:
+        return None
+    rank = max(0, min(len(sorted_values) - 1, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+def measure(name, kind, call, make_args, iterations, warmup=None):
+    """
+    Run call(*make_args()) `iterations` times after `warmup` untimed runs
+    (default: a tenth of iterations). Argument building is not timed.
+    Returns one result record.
+    """
+    warmup = max(1, iterations // 10) if warmup is None else warmup
+    for _ in range(warmup):
+        call(*make_args())
+
+    latencies = []
+    for _ in range(iterations):
+        args = make_args()
+        start = time.perf_counter()
+        call(*args)
+        latencies.append(time.perf_counter() - start)
+
+    latencies.sort()
+    total = sum(latencies)
+    return {
+        "name": name,
+        "kind": kind,
+        "iterations": iterations,
+        "ops_per_sec": round(iterations / total, 1) if total else None,
+        "mean_ms": round(total / iterations * 1000, 4),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 4),
+        "p90_ms": round(percentile(latencies, 0.90) * 1000, 4),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 4),
+        "max_ms": round(latencies[-1] * 1000, 4),
+    }
@@ -0,0 +1,210 @@
+"""
+Benchmark the facade methods and the /api/v1 endpoints on a synthetic
+dataset and write the results as JSON, to compare across commits:
+
+    python -m benchmarks.run --scale 10k --repository memory
+    python -m benchmarks.compare benchmarks/results/<old>.json benchmarks/results/<new>.json
+"""
+
+
+import argparse
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.dataset import SCALES, seed
+from benchmarks.harness import measure
+
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+# a point among the seeded cities (Paris), for the radius searches
+NEAR = (48.857, 2.352)
+
+
+def facade_benchmarks(facade, data):
+    """
+    (name, callable, argument maker) for each facade method
+    """
+    counter = itertools.count()
+    rng = data.rng
+    return [
+        ("get_user", facade.get_user, lambda: (data.pick(data.user_ids),)),
+        ("get_user_by_email", facade.get_user_by_email, lambda: (data.pick(data.user_emails),)),
+        ("get_place", facade.get_place, lambda: (data.pick(data.place_ids),)),
+        ("get_review", facade.get_review, lambda: (data.pick(data.review_ids),)),
+        ("get_places_page", facade.get_places_page, lambda: (None, 20)),
+        ("get_places_sorted[price]",
+         lambda low: facade.get_places_sorted("price", min_price=low, limit=20),
+         lambda: (rng.randrange(20, 900),)),
+        ("get_places_sorted[-created_at]",
+         lambda: facade.get_places_sorted("created_at", descending=True, limit=20), tuple),
+        ("filter_places[price]", facade.filter_places, lambda: (100, 150)),
+        ("search_places_near[5km]", facade.search_places_near, lambda: (*NEAR, 5)),
+        ("search_places_text", facade.search_places_text, lambda: ("cozy beach", 20)),
+        ("get_reviews_for_place", facade.get_reviews_for_place, lambda: (data.pick(data.place_ids),)),
+        ("get_place_relations",
+         lambda place_id: facade.get_place_relations(facade.get_place(place_id), facade.PLACE_RELATIONS),
+         lambda: (data.pick(data.place_ids),)),
+        ("create_user", facade.create_user,
+         lambda: ({"first_name": "New", "last_name": "User",
+                   "email": f"new{next(counter)}@bench.example"},)),
+        ("update_place", facade.update_place,
+         lambda: (data.pick(data.place_ids), {"price": rng.randrange(20, 1000)})),
+    ]
+
+
+def endpoint_benchmarks(client, data):
+    """
+    (name, callable, argument maker) for each endpoint, through the Flask test client
+    """
+    counter = itertools.count()
+
+    def get(path):
+        response = client.get(path)
+        if response.status_code != 200:
+            raise RuntimeError(f"GET {path} returned {response.status_code}")
+
+    def post(path, payload):
+        response = client.post(path, json=payload)
+        if response.status_code != 201:
+            raise RuntimeError(f"POST {path} returned {response.status_code}")
+
+    return [
+        ("GET /api/v1/users/<id>", get, lambda: (f"/api/v1/users/{data.pick(data.user_ids)}",)),
+        ("GET /api/v1/places/<id>", get, lambda: (f"/api/v1/places/{data.pick(data.place_ids)}",)),
+        ("GET /api/v1/places/<id>?expand=reviews,owner,amenities", get,
+         lambda: (f"/api/v1/places/{data.pick(data.place_ids)}?expand=reviews,owner,amenities",)),
+        ("GET /api/v1/reviews/<id>", get, lambda: (f"/api/v1/reviews/{data.pick(data.review_ids)}",)),
+        ("GET /api/v1/amenities/<id>", get,
+         lambda: (f"/api/v1/amenities/{data.pick(data.amenity_ids)}",)),
+        ("GET /api/v1/users/?limit=20", get, lambda: ("/api/v1/users/?limit=20",)),
+        ("GET /api/v1/places/?limit=20", get, lambda: ("/api/v1/places/?limit=20",)),
+        ("GET /api/v1/places/?sort=price&limit=20", get,
+         lambda: ("/api/v1/places/?sort=price&min_price=100&limit=20",)),
+        ("GET /api/v1/places/search?lat&lon&radius_km", get,
+         lambda: (f"/api/v1/places/search?lat={NEAR[0]}&lon={NEAR[1]}&radius_km=5",)),
+        ("GET /api/v1/places/search?q", get, lambda: ("/api/v1/places/search?q=cozy%20beach",)),
+        ("GET /api/v1/reviews/place/<id>", get,
+         lambda: (f"/api/v1/reviews/place/{data.pick(data.place_ids)}",)),
+        ("POST /api/v1/users/", post,
+         lambda: ("/api/v1/users/", {"first_name": "Api", "last_name": "User",
+                                     "email": f"api{next(counter)}@bench.example"})),
+    ]
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _app_facade(repository, database):
+    # the application's facade, created with the given backend through the
+    # app's own settings; os.environ is left as it was
+    settings = {"HBNB_REPOSITORY": repository}
+    if repository != "memory":
+        settings["HBNB_DATABASE"] = database or os.path.join(
+            tempfile.mkdtemp(prefix="hbnb-bench-"), "hbnb.db" if repository == "sqlite" else "journal")
+    saved = {name: os.environ.get(name) for name in settings}
+    os.environ.update(settings)
+    try:
+        from app.services import facade
+    finally:
+        for name, value in saved.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+    if facade.repository != repository:
+        raise RuntimeError(f"The facade was already created with the '{facade.repository}' repository")
+    return facade
+
+
+def run(scale="10k", repository="memory", iterations=1000, seed_value=42, only=None, database=None,
+        facade=None):
+    """
+    Seed a facade at `scale` and benchmark it; `only` restricts to "facade"
+    or "api". By default that is the application's facade, with the backend
+    picked through the app's settings (HBNB_REPOSITORY, HBNB_DATABASE), so
+    this must run before app.services is first imported with other
+    settings. Given a `facade` of its own, only the facade benchmarks can
+    run (the endpoints always use the application's).
+    """
+    if facade is None:
+        facade = _app_facade(repository, database)
+    elif only != "facade":
+        raise ValueError("The API benchmarks run on the application's facade: pass only='facade'")
+    repository = facade.repository
+
+    sizes = SCALES[scale]
+    start = time.perf_counter()
+    data = seed(facade, seed=seed_value, **sizes)
+    seed_seconds = time.perf_counter() - start
+
+    results = []
+    if only in (None, "facade"):
+        for name, call, make_args in facade_benchmarks(facade, data):
+            results.append(measure(name, "facade", call, make_args, iterations))
+    if only in (None, "api"):
+        from app import create_app
+        client = create_app().test_client()
+        for name, call, make_args in endpoint_benchmarks(client, data):
+            results.append(measure(name, "api", call, make_args, iterations))
+
+    return {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "scale": scale,
+            "sizes": sizes,
+            "repository": repository,
+            "seed": seed_value,
+            "iterations": iterations,
+        },
+        "seed_seconds": round(seed_seconds, 3),
+        "results": results,
+    }
+
+
+def write_results(report, out=None):
+    if out is None:
+        commit = (report["meta"]["commit"] or "nocommit")[:10]
+        out = os.path.join(RESULTS_DIR, f"{commit}-{report['meta']['scale']}-"
+                                        f"{report['meta']['repository']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(report, f, indent=2)
+    return out
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the HBnB facade and API")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="10k")
+    parser.add_argument("--repository", choices=("memory", "sqlite", "journal"), default="memory")
+    parser.add_argument("--database", help="SQLite file / journal directory (default: a temporary one)")
+    parser.add_argument("--iterations", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--only", choices=("facade", "api"))
+    parser.add_argument("--out", help="result file (default: benchmarks/results/<commit>-<scale>-<repository>.json)")
+    args = parser.parse_args(argv)
+
+    report = run(args.scale, args.repository, args.iterations, args.seed, args.only, args.database)
+    out = write_results(report, args.out)
+    print(f"seeded {args.scale} in {report['seed_seconds']}s", file=sys.stderr)
+    for result in report["results"]:
+        print(f"{result['kind']:7} {result['name']:48} {result['ops_per_sec']:>10} ops/s "
+              f"p50 {result['p50_ms']:8.3f}ms p99 {result['p99_ms']:8.3f}ms", file=sys.stderr)
+    print(out)
+
+
+if __name__ == "__main__":
+    main()
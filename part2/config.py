@@ -1,8 +1,28 @@
+import json
 import os
 
 class Config:
     SECRET_KEY = os.getenv('SECRET_KEY', 'default_secret_key')
     DEBUG = False
+    # "memory" keeps everything in process, "sqlite" persists to the file
+    # DATABASE, "journal" stays in memory and logs writes to the directory DATABASE
+    REPOSITORY = os.getenv('HBNB_REPOSITORY', 'memory')
+    DATABASE = os.getenv('HBNB_DATABASE', 'hbnb.db')
+    # read caches in front of repositories, by table, as JSON:
+    # {"places": {"max_size": 10000, "ttl": 30}, "users": {"max_size": 10000}}
+    CACHE = json.loads(os.getenv('HBNB_CACHE', '{}'))
+    # set in the worker processes of the multi-process mode (app/prefork.py):
+    # the facade is then a client of the owner process listening there
+    FACADE_ADDRESS = os.getenv('HBNB_FACADE_ADDRESS')
+    FACADE_AUTHKEY = os.getenv('HBNB_FACADE_AUTHKEY', '')
+    # connections from each worker to the owner, i.e. batches of calls in flight at once
+    FACADE_CONNECTIONS = int(os.getenv('HBNB_FACADE_CONNECTIONS', '4'))
+    # request instrumentation, served at /api/v1/_metrics (see app/instrumentation.py)
+    METRICS = os.getenv('HBNB_METRICS', '0') == '1'
+    # with METRICS on: profile a sample of requests, keep the ones slower than this (0 = off)
+    PROFILE_SLOW_MS = float(os.getenv('HBNB_PROFILE_SLOW_MS', '0'))
+    PROFILE_SAMPLE_RATE = float(os.getenv('HBNB_PROFILE_SAMPLE_RATE', '0.1'))
+    PROFILE_DIR = os.getenv('HBNB_PROFILE_DIR', 'profiles')
 
 class DevelopmentConfig(Config):
     DEBUG = True
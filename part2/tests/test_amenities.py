@@ -47,6 +47,24 @@ class TestAmenityEndpoints(unittest.TestCase):
         update_resp = self.client.put(f'/api/v1/amenities/{amenity_id}', json={"name": "Fitness Center"})
         self.assertEqual(update_resp.status_code, 200)
 
+    def test_get_after_update(self):
+        amenity_id = self.client.post('/api/v1/amenities/', json={"name": "Gym"}).get_json()['id']
+        # fill the cached views first
+        self.client.get(f'/api/v1/amenities/{amenity_id}')
+        self.client.get('/api/v1/amenities/')
+
+        self.client.put(f'/api/v1/amenities/{amenity_id}', json={"name": "Pool"})
+        self.assertEqual(self.client.get(f'/api/v1/amenities/{amenity_id}').get_json()['name'], "Pool")
+        self.assertEqual([a['name'] for a in self.client.get('/api/v1/amenities/').get_json()], ["Pool"])
+
+    def test_update_ignores_internal_fields(self):
+        amenity_id = self.client.post('/api/v1/amenities/', json={"name": "Gym"}).get_json()['id']
+        response = self.client.put(f'/api/v1/amenities/{amenity_id}',
+                                   json={"name": "Pool", "id": "other", "_serialized": 1, "_updated": "x"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get(f'/api/v1/amenities/{amenity_id}').get_json(),
+                         {"id": amenity_id, "name": "Pool"})
+
     def test_update_amenity_empty_name(self):
         create_resp = self.client.post('/api/v1/amenities/', json={"name": "Sauna"})
         amenity_id = create_resp.get_json()['id']
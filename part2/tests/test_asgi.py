@@ -0,0 +1,125 @@
+import asyncio
+import concurrent.futures
+import json
+import threading
+import unittest
+
+from app import create_app, instrumentation
+from app.asgi import HBnBASGI, create_asgi_app
+from app.services import facade
+from app.services.async_facade import AsyncHBnBFacade
+from config import Config
+
+
+class MetricsConfig(Config):
+    METRICS = True
+
+
+def request(app, method, path, body=None, headers=()):
+    """
+    Run one request through the ASGI app; returns (status, headers, body)
+    """
+    data = json.dumps(body).encode() if body is not None else b""
+    path, _, query = path.partition("?")
+    scope = {
+        "type": "http", "method": method, "path": path, "query_string": query.encode(),
+        "headers": [(b"content-type", b"application/json")] + [
+            (name.lower().encode(), value.encode()) for name, value in headers],
+    }
+    messages = [{"type": "http.request", "body": data, "more_body": False}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    start = sent[0]
+    return (start["status"], dict(start["headers"]),
+            b"".join(message.get("body", b"") for message in sent[1:]))
+
+
+class TestASGIApp(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_asgi_app()
+        facade.user_repo._storage.clear()
+        facade.place_repo._storage.clear()
+
+    def test_sync_handlers_and_native_reads(self):
+        status, _, body = request(self.app, "POST", "/api/v1/users/", {
+            "first_name": "Ann", "last_name": "Host", "email": "ann@example.com"})
+        self.assertEqual(status, 201)
+        owner_id = json.loads(body)["id"]
+        status, _, body = request(self.app, "POST", "/api/v1/places/", {
+            "title": "Loft", "price": 80, "owner_id": owner_id, "latitude": 1, "longitude": 2})
+        self.assertEqual(status, 201)
+        place_id = json.loads(body)["id"]
+
+        status, headers, body = request(self.app, "GET", f"/api/v1/places/{place_id}")
+        self.assertEqual(status, 200)
+        self.assertEqual(json.loads(body)["title"], "Loft")
+        status, _, body = request(self.app, "GET", f"/api/v1/places/{place_id}",
+                                  headers=[("If-None-Match", headers[b"etag"].decode())])
+        self.assertEqual((status, body), (304, b""))
+
+        # not found falls through to the Flask handler
+        status, _, body = request(self.app, "GET", "/api/v1/places/nope")
+        self.assertEqual((status, json.loads(body)), (404, {"error": "Place not found"}))
+
+        status, _, body = request(self.app, "GET", "/api/v1/places/search?lat=1&lon=2&radius_km=5")
+        self.assertEqual([p["id"] for p in json.loads(body)], [place_id])
+
+    def test_async_facade(self):
+        async def scenario():
+            async_facade = AsyncHBnBFacade(facade, offload=True)
+            user = await async_facade.create_user({"first_name": "Bob", "last_name": "Guest",
+                                                   "email": "bob@example.com"})
+            self.assertIs(await async_facade.get_user(user.id), user)
+            self.assertIs(await async_facade.get_user_by_email("BOB@example.com"), user)
+            page, cursor = await async_facade.get_users_page(limit=10)
+            self.assertEqual(([u.id for u in page], cursor), ([user.id], None))
+        asyncio.run(scenario())
+
+    def test_native_reads_are_counted(self):
+        flask_app = create_app(MetricsConfig)
+        app = HBnBASGI(flask_app, AsyncHBnBFacade(facade))
+        user = facade.create_user({"first_name": "Ann", "last_name": "Host", "email": "ann@example.com"})
+        for _ in range(2):
+            status, _, _ = request(app, "GET", f"/api/v1/users/{user.id}")
+            self.assertEqual(status, 200)
+        stats = flask_app.extensions["hbnb_metrics"].snapshot()["GET /api/v1/users/<user_id>"]
+        instrumentation.uninstall(flask_app)
+        self.assertEqual(stats["requests"], 2)
+        self.assertEqual(stats["mean_repo_ops"], {"get": 1})
+
+    def test_client_disconnect_stops_the_worker(self):
+        stopped = threading.Event()
+
+        def endless(environ, start_response):
+            start_response("200 OK", [("Content-Type", "text/plain")])
+            try:
+                while True:
+                    yield b"chunk"
+            finally:
+                stopped.set()
+
+        async def send(message):
+            if message["type"] == "http.response.body":
+                raise ConnectionResetError()
+
+        async def receive():
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        with concurrent.futures.ThreadPoolExecutor(1) as executor:
+            app = HBnBASGI(endless, AsyncHBnBFacade(facade), executor)
+            scope = {"type": "http", "method": "GET", "path": "/stream", "query_string": b"", "headers": []}
+            with self.assertRaises(ConnectionResetError):
+                asyncio.run(app(scope, receive, send))
+            # the generator was closed instead of blocking on a full queue
+            self.assertTrue(stopped.wait(5))
+
+if __name__ == '__main__':
+    unittest.main()
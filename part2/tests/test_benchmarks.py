@@ -0,0 +1,55 @@
+import json
+import os
+import tempfile
+import unittest
+
+from app.services import facade
+from app.services.facade import HBnBFacade
+from benchmarks.compare import compare
+from benchmarks.harness import percentile
+from benchmarks.run import run, write_results
+
+
+class TestBenchmarks(unittest.TestCase):
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 0.5), 50)
+        self.assertEqual(percentile(values, 0.99), 99)
+        self.assertEqual(percentile([7], 0.99), 7)
+
+    def test_run_tiny(self):
+        environ = dict(os.environ)
+        private = HBnBFacade()
+        report = run("tiny", iterations=5, only="facade", facade=private)
+        self.assertEqual(os.environ, environ)
+        self.assertEqual(report["meta"]["sizes"]["places"], 100)
+        self.assertEqual(len(private.review_repo._storage), 200)
+        self.assertEqual({result["kind"] for result in report["results"]}, {"facade"})
+        for result in report["results"]:
+            self.assertEqual(result["iterations"], 5)
+            self.assertLessEqual(result["p50_ms"], result["p99_ms"])
+
+        with tempfile.TemporaryDirectory() as tmp:
+            out = write_results(report, os.path.join(tmp, "result.json"))
+            with open(out) as f:
+                saved = json.load(f)
+        rows = compare(saved, report)
+        self.assertEqual(len(rows), len(report["results"]))
+        self.assertTrue(all(row[2] == 0 for row in rows))
+
+    @unittest.skipUnless(os.getenv("HBNB_BENCHMARK_TESTS") == "1",
+                         "seeds the application's facade; set HBNB_BENCHMARK_TESTS=1")
+    def test_run_tiny_api(self):
+        environ = dict(os.environ)
+        try:
+            report = run("tiny", iterations=5, only="api")
+            self.assertEqual(os.environ, environ)
+            self.assertEqual({result["kind"] for result in report["results"]}, {"api"})
+        finally:
+            for repo in (facade.review_repo, facade.place_repo, facade.amenity_repo, facade.user_repo):
+                repo._storage.clear()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import os
+import tempfile
+import unittest
+
+from flask import Flask
+from flask_restx import Api, Resource
+
+from app import create_app
+from app import instrumentation
+from app.services import facade
+from app.services.facade import HBnBFacade
+from config import Config
+
+
+class MetricsConfig(Config):
+    METRICS = True
+
+
+class TestMetrics(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app(MetricsConfig)
+        self.client = self.app.test_client()
+        facade.user_repo._storage.clear()
+
+    def tearDown(self):
+        instrumentation.uninstall(self.app)
+
+    def test_metrics_endpoint(self):
+        user_id = self.client.post('/api/v1/users/', json={
+            "first_name": "Ann",
+            "last_name": "Host",
+            "email": "ann@example.com"
+        }).get_json()['id']
+        for _ in range(3):
+            self.client.get(f'/api/v1/users/{user_id}')
+
+        response = self.client.get('/api/v1/_metrics')
+        self.assertEqual(response.status_code, 200)
+        endpoints = response.get_json()['endpoints']
+
+        stats = endpoints['GET /api/v1/users/<user_id>']
+        self.assertEqual(stats['requests'], 3)
+        self.assertEqual(sum(stats['histogram_ms'].values()), 3)
+        self.assertEqual(stats['mean_repo_ops'], {"get": 1.0})
+        self.assertGreater(stats['mean_phase_ms']['facade'] + stats['mean_phase_ms']['repo'], 0)
+
+        stats = endpoints['POST /api/v1/users/']
+        self.assertGreater(stats['mean_phase_ms']['validate'], 0)
+        self.assertGreater(stats['mean_phase_ms']['serialize'], 0)
+
+    def test_metrics_are_opt_in(self):
+        client = create_app().test_client()
+        self.assertEqual(client.get('/api/v1/_metrics').status_code, 404)
+
+    def test_uninstall(self):
+        self.assertEqual(Resource.validate_payload.__module__, 'flask_restx.resource')
+        private = HBnBFacade()
+        first, second = Flask(__name__), Flask(__name__)
+        for app in (first, second):
+            instrumentation.install(app, Api(app), private)
+        self.assertIn('get_user', vars(private))
+        self.assertIn('get', vars(private.user_repo))
+        instrumentation.uninstall(first)
+        self.assertEqual(first.test_client().get('/api/v1/_metrics').status_code, 404)
+        self.assertIn('get_user', vars(private))
+        # no instrumented app left: the facade and its repositories are unwrapped
+        instrumentation.uninstall(second)
+        self.assertNotIn('get_user', vars(private))
+        self.assertNotIn('get', vars(private.user_repo))
+
+    def test_one_request_profiled_at_a_time(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            class ProfileConfig(MetricsConfig):
+                PROFILE_SLOW_MS = 0.001
+                PROFILE_SAMPLE_RATE = 1
+                PROFILE_DIR = tmp
+            app = create_app(ProfileConfig)
+            client = app.test_client()
+            # another request holds the profiler: this one runs unprofiled
+            with instrumentation._profiler_lock:
+                self.assertEqual(client.get('/api/v1/users/').status_code, 200)
+            self.assertEqual(os.listdir(tmp), [])
+            self.assertEqual(client.get('/api/v1/users/').status_code, 200)
+            self.assertEqual(len(os.listdir(tmp)), 1)
+            instrumentation.uninstall(app)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,3 +1,4 @@
+import json
 import unittest
 import uuid
 
@@ -125,5 +126,361 @@ class TestPlaceEndpoints(unittest.TestCase):
         })
         self.assertEqual(response.status_code, 404)
 
+    def test_get_places_paginated(self):
+        ids = []
+        for i in range(5):
+            resp = self.client.post('/api/v1/places/', json={
+                "title": f"Place {i}",
+                "price": 50,
+                "owner_id": self.owner_id,
+                "latitude": 0,
+                "longitude": 0
+            })
+            ids.append(resp.get_json()['id'])
+
+        seen = []
+        cursor = None
+        while True:
+            url = '/api/v1/places/?limit=2' + (f'&cursor={cursor}' if cursor else '')
+            page = self.client.get(url).get_json()
+            self.assertLessEqual(len(page['items']), 2)
+            seen.extend(p['id'] for p in page['items'])
+            cursor = page['next_cursor']
+            if cursor is None:
+                break
+        self.assertEqual(seen, ids)
+
+    def test_get_places_bad_cursor(self):
+        response = self.client.get('/api/v1/places/?cursor=abc')
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get('/api/v1/places/?limit=0')
+        self.assertEqual(response.status_code, 400)
+
+    def test_search_places_near_point(self):
+        for title, lat, lon in [("Near", 48.857, 2.352), ("Far", 51.507, -0.128)]:
+            self.client.post('/api/v1/places/', json={
+                "title": title,
+                "price": 50,
+                "owner_id": self.owner_id,
+                "latitude": lat,
+                "longitude": lon
+            })
+        response = self.client.get('/api/v1/places/search?lat=48.85&lon=2.35&radius_km=10')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([p['title'] for p in response.get_json()], ["Near"])
+
+        response = self.client.get('/api/v1/places/search?min_lat=50&min_lon=-1&max_lat=52&max_lon=1')
+        self.assertEqual([p['title'] for p in response.get_json()], ["Far"])
+
+    def test_search_places_follows_update(self):
+        create_resp = self.client.post('/api/v1/places/', json={
+            "title": "Mover",
+            "price": 50,
+            "owner_id": self.owner_id,
+            "latitude": 0,
+            "longitude": 0
+        })
+        place_id = create_resp.get_json()['id']
+        self.client.put(f'/api/v1/places/{place_id}', json={"latitude": 10, "longitude": 10})
+        response = self.client.get('/api/v1/places/search?lat=10&lon=10&radius_km=1')
+        self.assertEqual([p['id'] for p in response.get_json()], [place_id])
+
+    def test_place_rating_aggregates(self):
+        place_id = self.client.post('/api/v1/places/', json={
+            "title": "Rated Place",
+            "price": 50,
+            "owner_id": self.owner_id,
+            "latitude": 0,
+            "longitude": 0
+        }).get_json()['id']
+        review_ids = []
+        for i, rating in enumerate([5, 4, 4]):
+            reviewer_id = self.client.post('/api/v1/users/', json={
+                "first_name": "Guest",
+                "last_name": "User",
+                "email": f"guest{i}@example.com"
+            }).get_json()['id']
+            review_ids.append(self.client.post('/api/v1/reviews/', json={
+                "text": "Nice stay",
+                "rating": rating,
+                "user_id": reviewer_id,
+                "place_id": place_id
+            }).get_json()['id'])
+
+        self.client.put(f'/api/v1/reviews/{review_ids[1]}', json={"rating": 2})
+        self.client.delete(f'/api/v1/reviews/{review_ids[0]}')
+
+        place = self.client.get(f'/api/v1/places/{place_id}').get_json()
+        self.assertEqual(place['rating_count'], 2)
+        self.assertEqual(place['average_rating'], 3.0)
+        self.assertEqual(place['rating_histogram'], [0, 1, 0, 1, 0])
+
+    def test_reviews_by_place_keep_order_after_delete(self):
+        place = facade.create_place({
+            "title": "Busy Place",
+            "price": 50,
+            "owner_id": self.owner_id,
+            "latitude": 0,
+            "longitude": 0
+        })
+        guest = facade.create_user({
+            "first_name": "Guest",
+            "last_name": "User",
+            "email": "busy.guest@example.com"
+        })
+        reviews = [
+            facade.create_review({"text": f"Review {i}", "rating": 4,
+                                  "user_id": guest.id, "place_id": place.id})
+            for i in range(4)
+        ]
+        facade.delete_review(reviews[1].id)
+
+        response = self.client.get(f'/api/v1/reviews/place/{place.id}')
+        self.assertEqual([r['id'] for r in response.get_json()],
+                         [reviews[0].id, reviews[2].id, reviews[3].id])
+        self.assertEqual(list(guest.reviews), [reviews[0].id, reviews[2].id, reviews[3].id])
+
+    def test_create_place_reports_every_missing_amenity(self):
+        wifi = facade.create_amenity({"name": "Wi-Fi"})
+        with self.assertRaises(ValueError) as ctx:
+            facade.create_place({
+                "title": "Amenity Place",
+                "price": 50,
+                "owner_id": self.owner_id,
+                "latitude": 0,
+                "longitude": 0,
+                "amenity_ids": [wifi.id, "missing-1", "missing-2"]
+            })
+        self.assertIn("'missing-1', 'missing-2'", str(ctx.exception))
+        facade.amenity_repo.delete(wifi.id)
+
+    def test_get_place_conditional(self):
+        place_id = self.client.post('/api/v1/places/', json={
+            "title": "Tagged Place",
+            "price": 50,
+            "owner_id": self.owner_id,
+            "latitude": 0,
+            "longitude": 0
+        }).get_json()['id']
+        first = self.client.get(f'/api/v1/places/{place_id}')
+        etag = first.headers['ETag']
+        again = self.client.get(f'/api/v1/places/{place_id}', headers={'If-None-Match': etag})
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(again.data, b'')
+
+        self.client.put(f'/api/v1/places/{place_id}', json={"title": "Renamed"})
+        changed = self.client.get(f'/api/v1/places/{place_id}', headers={'If-None-Match': etag})
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed.headers['ETag'], etag)
+
+    def test_get_places_collection_conditional(self):
+        etag = self.client.get('/api/v1/places/').headers['ETag']
+        self.assertEqual(self.client.get('/api/v1/places/', headers={'If-None-Match': etag}).status_code, 304)
+        self.client.post('/api/v1/places/', json={
+            "title": "New Place",
+            "price": 50,
+            "owner_id": self.owner_id,
+            "latitude": 0,
+            "longitude": 0
+        })
+        self.assertEqual(self.client.get('/api/v1/places/', headers={'If-None-Match': etag}).status_code, 200)
+
+    def test_get_places_ndjson(self):
+        for i in range(3):
+            self.client.post('/api/v1/places/', json={
+                "title": f"Streamed {i}",
+                "price": 50,
+                "owner_id": self.owner_id,
+                "latitude": 0,
+                "longitude": 0
+            })
+        response = self.client.get('/api/v1/places/', headers={'Accept': 'application/x-ndjson'})
+        self.assertEqual(response.mimetype, 'application/x-ndjson')
+        lines = response.data.decode().splitlines()
+        self.assertEqual([json.loads(line)['title'] for line in lines],
+                         ["Streamed 0", "Streamed 1", "Streamed 2"])
+
+        response = self.client.get('/api/v1/places/')
+        self.assertEqual([p['title'] for p in response.get_json()],
+                         ["Streamed 0", "Streamed 1", "Streamed 2"])
+
+        # one URL, two formats: each has its own ETag, and caches must key on Accept
+        self.assertEqual(response.headers['Vary'], 'Accept')
+        json_etag = response.headers['ETag']
+        response = self.client.get('/api/v1/places/', headers={
+            'Accept': 'application/x-ndjson', 'If-None-Match': json_etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'application/x-ndjson')
+        response = self.client.get('/api/v1/places/', headers={'If-None-Match': json_etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.headers['Vary'], 'Accept')
+
+    def test_filter_places_by_price_and_bbox(self):
+        ids = {}
+        for title, price, lat, lon in [("Cheap Paris", 40, 48.857, 2.352),
+                                       ("Dear Paris", 400, 48.86, 2.34),
+                                       ("Cheap London", 45, 51.507, -0.128)]:
+            ids[title] = self.client.post('/api/v1/places/', json={
+                "title": title,
+                "price": price,
+                "owner_id": self.owner_id,
+                "latitude": lat,
+                "longitude": lon
+            }).get_json()['id']
+
+        response = self.client.get('/api/v1/places/?max_price=100')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([p['title'] for p in response.get_json()], ["Cheap Paris", "Cheap London"])
+
+        response = self.client.get('/api/v1/places/?min_price=10&max_price=100&bbox=2,48,3,49')
+        self.assertEqual([p['title'] for p in response.get_json()], ["Cheap Paris"])
+
+        # the filter follows updates
+        self.client.put(f'/api/v1/places/{ids["Dear Paris"]}', json={"price": 90})
+        response = self.client.get('/api/v1/places/?max_price=100&bbox=2,48,3,49')
+        self.assertEqual([p['title'] for p in response.get_json()], ["Cheap Paris", "Dear Paris"])
+
+        # with ?limit= the filtered places come in pages
+        response = self.client.get('/api/v1/places/?max_price=100&limit=2')
+        page = response.get_json()
+        self.assertEqual([p['title'] for p in page['items']], ["Cheap Paris", "Dear Paris"])
+        response = self.client.get(f'/api/v1/places/?max_price=100&limit=2&cursor={page["next_cursor"]}')
+        page = response.get_json()
+        self.assertEqual([p['title'] for p in page['items']], ["Cheap London"])
+        self.assertIsNone(page['next_cursor'])
+
+    def test_filter_places_bad_parameters(self):
+        for query in ("bbox=1,2,3", "bbox=a,b,c,d", "bbox=0,50,1,40", "min_price=10&max_price=5"):
+            response = self.client.get(f'/api/v1/places/?{query}')
+            self.assertEqual(response.status_code, 400, query)
+
+    def test_get_places_sorted_by_price(self):
+        ids = {}
+        for title, price in [("Mid", 80), ("Cheap", 20), ("Dear", 300), ("Cheaper", 10)]:
+            ids[title] = self.client.post('/api/v1/places/', json={
+                "title": title,
+                "price": price,
+                "owner_id": self.owner_id,
+                "latitude": 0,
+                "longitude": 0
+            }).get_json()['id']
+
+        response = self.client.get('/api/v1/places/?sort=price')
+        self.assertEqual([p['title'] for p in response.get_json()], ["Cheaper", "Cheap", "Mid", "Dear"])
+
+        self.client.put(f'/api/v1/places/{ids["Dear"]}', json={"price": 15})
+        response = self.client.get('/api/v1/places/?sort=-price&min_price=12&max_price=100')
+        self.assertEqual([p['title'] for p in response.get_json()], ["Mid", "Cheap", "Dear"])
+
+        response = self.client.get('/api/v1/places/?sort=price&limit=3')
+        body = response.get_json()
+        self.assertEqual([p['title'] for p in body['items']], ["Cheaper", "Dear", "Cheap"])
+        # a place added before the cursor doesn't shift the next page
+        self.client.post('/api/v1/places/', json={
+            "title": "Cheapest", "price": 5, "owner_id": self.owner_id, "latitude": 0, "longitude": 0})
+        response = self.client.get(f'/api/v1/places/?sort=price&limit=3&cursor={body["next_cursor"]}')
+        body = response.get_json()
+        self.assertEqual([p['title'] for p in body['items']], ["Mid"])
+        self.assertIsNone(body['next_cursor'])
+
+        response = self.client.get('/api/v1/places/?sort=title')
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get('/api/v1/places/?sort=price&limit=3&cursor=12')
+        self.assertEqual(response.status_code, 400)
+
+    def test_search_places_by_keywords(self):
+        ids = {}
+        for title, description in [("Seaside Cottage", "Cottage by the sea"),
+                                   ("City Loft", "Quiet loft downtown"),
+                                   ("Mountain Cabin", "Wood cabin")]:
+            ids[title] = self.client.post('/api/v1/places/', json={
+                "title": title,
+                "description": description,
+                "price": 50,
+                "owner_id": self.owner_id,
+                "latitude": 0,
+                "longitude": 0
+            }).get_json()['id']
+        reviewer_id = self.client.post('/api/v1/users/', json={
+            "first_name": "Guest",
+            "last_name": "User",
+            "email": "guest@example.com"
+        }).get_json()['id']
+        review_id = self.client.post('/api/v1/reviews/', json={
+            "text": "Lovely cottage feel",
+            "rating": 5,
+            "user_id": reviewer_id,
+            "place_id": ids["Mountain Cabin"]
+        }).get_json()['id']
+
+        # prefix match; the place's own text ranks above a review mention
+        response = self.client.get('/api/v1/places/search?q=cott')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([p['title'] for p in response.get_json()], ["Seaside Cottage", "Mountain Cabin"])
+
+        self.client.put(f'/api/v1/places/{ids["City Loft"]}', json={"title": "City Studio"})
+        response = self.client.get('/api/v1/places/search?q=studio')
+        self.assertEqual([p['title'] for p in response.get_json()], ["City Studio"])
+
+        self.client.delete(f'/api/v1/reviews/{review_id}')
+        response = self.client.get('/api/v1/places/search?q=cottage&limit=5')
+        self.assertEqual([p['title'] for p in response.get_json()], ["Seaside Cottage"])
+
+        response = self.client.get('/api/v1/places/search?q=%20')
+        self.assertEqual(response.status_code, 400)
+
+    def test_search_places_missing_parameters(self):
+        response = self.client.get('/api/v1/places/search?lat=10')
+        self.assertEqual(response.status_code, 400)
+    def test_get_place_expanded(self):
+        amenity_id = self.client.post('/api/v1/amenities/', json={"name": f"Sauna {uuid.uuid4()}"}).get_json()['id']
+        place_id = self.client.post('/api/v1/places/', json={
+            "title": "Lake House", "price": 120, "owner_id": self.owner_id,
+            "latitude": 10.0, "longitude": 10.0, "amenity_ids": [amenity_id]
+        }).get_json()['id']
+        guest_id = self.client.post('/api/v1/users/', json={
+            "first_name": "Guest", "last_name": "One", "email": "guest@example.com"
+        }).get_json()['id']
+        facade.create_review({"text": "Lovely", "rating": 5, "user_id": guest_id, "place_id": place_id})
+
+        response = self.client.get(f'/api/v1/places/{place_id}?expand=reviews,owner,amenities')
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        self.assertEqual(data['owner']['id'], self.owner_id)
+        self.assertNotIn('email', data['owner'])
+        self.assertEqual(data['amenities'], [self.client.get(f'/api/v1/amenities/{amenity_id}').get_json()])
+        self.assertEqual(len(data['reviews']), 1)
+        self.assertEqual(data['reviews'][0]['user'], {"id": guest_id, "first_name": "Guest", "last_name": "One"})
+
+        # the ETag follows the embedded objects too
+        etag = response.headers['ETag']
+        self.assertEqual(self.client.get(f'/api/v1/places/{place_id}?expand=owner,reviews,amenities',
+                                         headers={"If-None-Match": etag}).status_code, 304)
+        self.client.put(f'/api/v1/users/{guest_id}', json={
+            "first_name": "Guest", "last_name": "Two", "email": "guest@example.com"
+        })
+        response = self.client.get(f'/api/v1/places/{place_id}?expand=reviews,owner,amenities',
+                                   headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['reviews'][0]['user']['last_name'], "Two")
+
+        self.assertNotIn('reviews', self.client.get(f'/api/v1/places/{place_id}?expand=owner').get_json())
+        self.assertEqual(self.client.get(f'/api/v1/places/{place_id}?expand=bookings').status_code, 400)
+
+    def test_expanded_place_follows_amenity_update(self):
+        amenity_id = self.client.post('/api/v1/amenities/', json={"name": f"Gym {uuid.uuid4()}"}).get_json()['id']
+        place_id = self.client.post('/api/v1/places/', json={
+            "title": "Lake House", "price": 120, "owner_id": self.owner_id,
+            "latitude": 10.0, "longitude": 10.0, "amenity_ids": [amenity_id]
+        }).get_json()['id']
+        url = f'/api/v1/places/{place_id}?expand=amenities'
+        etag = self.client.get(url).headers['ETag']
+
+        name = f"Pool {uuid.uuid4()}"
+        self.assertEqual(self.client.put(f'/api/v1/amenities/{amenity_id}', json={"name": name}).status_code, 200)
+        response = self.client.get(url, headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['amenities'][0]['name'], name)
+
 if __name__ == '__main__':
     unittest.main()
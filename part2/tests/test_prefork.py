@@ -0,0 +1,167 @@
+import json
+import os
+import re
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import unittest
+import urllib.request
+from unittest import mock
+
+from app.services import remote_facade
+from app.services.facade import HBnBFacade
+from app.services.remote_facade import FacadeServer, ModelRef, RemoteFacade
+
+
+class BrokenConnection:
+
+    def send_bytes(self, data):
+        raise BrokenPipeError("owner went away")
+
+    def close(self):
+        pass
+
+
+class TestRemoteFacade(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.facade = HBnBFacade()
+        self.server = FacadeServer(self.facade, os.path.join(self.tmpdir.name, 'facade.sock'), b'secret')
+        self.server.start()
+        self.remote = RemoteFacade(self.server.address, b'secret')
+
+    def tearDown(self):
+        self.remote.close()
+        self.server.close()
+        self.tmpdir.cleanup()
+
+    def test_calls_run_in_the_owner(self):
+        owner = self.remote.create_user({"first_name": "Ann", "last_name": "Owner", "email": "ann@example.com"})
+        guest = self.remote.create_user({"first_name": "Bob", "last_name": "Guest", "email": "bob@example.com"})
+        self.assertIsNotNone(self.facade.get_user(owner.id))
+        with self.assertRaises(ValueError):
+            self.remote.create_user({"first_name": "A", "last_name": "B", "email": "ANN@example.com"})
+
+        place = self.remote.create_place({"title": "Loft", "price": 80, "latitude": 1.0, "longitude": 2.0,
+                                          "owner_id": owner.id})
+        self.remote.create_review({"text": "Great", "rating": 4, "user_id": guest.id, "place_id": place.id})
+
+        place = self.remote.get_place(place.id)
+        # related objects come as refs, the place's own fields in full
+        self.assertIsInstance(place.owner, ModelRef)
+        self.assertEqual(place.to_dict()["owner_id"], owner.id)
+        self.assertEqual(place.average_rating, 4)
+
+        related = self.remote.get_place_relations(place, ("owner", "reviews"))
+        self.assertEqual(related["owner"].email, "ann@example.com")
+        self.assertEqual([review.text for review in related["reviews"]], ["Great"])
+        self.assertEqual(related["authors"][guest.id].first_name, "Bob")
+        self.assertEqual([p.id for p in self.remote.iter_places(batch_size=1)], [place.id])
+
+    def test_concurrent_calls_are_batched(self):
+        errors = []
+
+        def create(i):
+            try:
+                self.remote.create_user({"first_name": "U", "last_name": str(i), "email": f"u{i}@example.com"})
+            except Exception as err:
+                errors.append(err)
+        threads = [threading.Thread(target=create, args=(i,)) for i in range(50)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(len(self.facade.get_all_users()), 50)
+
+    def test_reconnects_after_a_broken_channel(self):
+        client = remote_facade.Client
+        connections = [BrokenConnection()]
+
+        def connect(*args, **kwargs):
+            return connections.pop() if connections else client(*args, **kwargs)
+        with mock.patch.object(remote_facade, "Client", side_effect=connect):
+            remote = RemoteFacade(self.server.address, b'secret', connections=1)
+            try:
+                with self.assertRaises(BrokenPipeError):
+                    remote.get_all_users()
+                # the dead channel was dropped and the next call opens a new one
+                self.assertEqual(remote.get_all_users(), [])
+            finally:
+                remote.close()
+
+
+class TestPreforkServer(unittest.TestCase):
+
+    def setUp(self):
+        self.process = subprocess.Popen(
+            [sys.executable, '-m', 'app.prefork', '--workers', '2', '--port', '0'],
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+        port = re.search(r':(\d+) ', self.process.stdout.readline()).group(1)
+        self.base = f'http://127.0.0.1:{port}/api/v1'
+
+    def tearDown(self):
+        self.process.terminate()
+        self.process.wait(10)
+        self.process.stdout.close()
+
+    def create_user(self):
+        request = urllib.request.Request(
+            f'{self.base}/users/', method='POST', headers={'Content-Type': 'application/json'},
+            data=json.dumps({"first_name": "Ann", "last_name": "Host", "email": "ann@example.com"}).encode())
+        return self._open(request)['id']
+
+    def test_workers_share_the_data(self):
+        user_id = self.create_user()
+        # whichever worker answers, it sees the write
+        for _ in range(6):
+            self.assertEqual(self._open(f'{self.base}/users/{user_id}')['email'], "ann@example.com")
+
+    @unittest.skipUnless(os.path.isdir('/proc'), "lists the workers through /proc")
+    def test_dead_workers_are_replaced(self):
+        user_id = self.create_user()
+        # past the startup window, where a dying worker stops the server instead
+        time.sleep(1)
+        workers = self._workers(self.process.pid)
+        self.assertEqual(len(workers), 2)
+        for pid in workers:
+            os.kill(pid, signal.SIGKILL)
+        self.assertEqual(self._open(f'{self.base}/users/{user_id}')['email'], "ann@example.com")
+        self.assertEqual(len(self._workers(self.process.pid)), 2)
+
+    @staticmethod
+    def _workers(parent):
+        pids = []
+        for pid in filter(str.isdigit, os.listdir('/proc')):
+            try:
+                with open(f'/proc/{pid}/stat') as f:
+                    ppid = int(f.read().rsplit(')', 1)[1].split()[1])
+                with open(f'/proc/{pid}/cmdline') as f:
+                    cmdline = f.read()
+            except OSError:
+                continue
+            if ppid == parent and 'spawn_main' in cmdline:
+                pids.append(int(pid))
+        return pids
+
+    @staticmethod
+    def _open(request):
+        deadline = time.monotonic() + 15
+        while True:
+            try:
+                with urllib.request.urlopen(request, timeout=5) as response:
+                    return json.loads(response.read())
+            except (ConnectionError, urllib.error.URLError):
+                # workers still starting
+                if time.monotonic() > deadline:
+                    raise
+                time.sleep(0.1)
+
+
+if __name__ == '__main__':
+    unittest.main()
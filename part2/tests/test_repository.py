@@ -0,0 +1,554 @@
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+from app.models.amenity import Amenity
+from app.persistence.repository import InMemoryRepository, DuplicateKeyError
+from app.persistence.cached_repository import CachedRepository
+from app.persistence.journal import Journal
+from app.persistence.mmap_snapshot import MmapSnapshot, SnapshotRow, write_snapshot
+from app.persistence.schema import AMENITY_SCHEMA, PLACE_SCHEMA
+from app.services.facade import HBnBFacade
+
+class TestInMemoryRepository(unittest.TestCase):
+
+    def setUp(self):
+        self.repo = InMemoryRepository()
+        self.repo.add_index('name', unique=True)
+
+    def test_get_by_indexed_attribute(self):
+        pool = Amenity(name="Pool")
+        self.repo.add(pool)
+        self.assertIs(self.repo.get_by_attribute('name', "Pool"), pool)
+        self.assertIsNone(self.repo.get_by_attribute('name', "Gym"))
+
+    def test_index_follows_update(self):
+        pool = Amenity(name="Pool")
+        self.repo.add(pool)
+        self.repo.update(pool.id, {'name': "Hot Tub"})
+        self.assertIsNone(self.repo.get_by_attribute('name', "Pool"))
+        self.assertIs(self.repo.get_by_attribute('name', "Hot Tub"), pool)
+
+    def test_index_follows_failed_update(self):
+        class Checked(Amenity):
+            __slots__ = ()
+            EDITABLE_FIELDS = ("name", "capacity")
+
+            @property
+            def capacity(self):
+                return 0
+
+            @capacity.setter
+            def capacity(self, value):
+                raise ValueError("Capacity must be positive")
+
+        pool = Checked(name="Pool")
+        self.repo.add(pool)
+        with self.assertRaises(ValueError):
+            self.repo.update(pool.id, {'name': "Hot Tub", 'capacity': -1})
+        self.assertEqual(pool.name, "Hot Tub")
+        self.assertIsNone(self.repo.get_by_attribute('name', "Pool"))
+        self.assertIs(self.repo.get_by_attribute('name', "Hot Tub"), pool)
+
+    def test_index_follows_delete(self):
+        pool = Amenity(name="Pool")
+        self.repo.add(pool)
+        self.repo.delete(pool.id)
+        self.assertIsNone(self.repo.get_by_attribute('name', "Pool"))
+
+    def test_unique_index_rejects_duplicates(self):
+        self.repo.add(Amenity(name="Pool"))
+        with self.assertRaises(DuplicateKeyError):
+            self.repo.add(Amenity(name="Pool"))
+
+        gym = Amenity(name="Gym")
+        self.repo.add(gym)
+        with self.assertRaises(DuplicateKeyError):
+            self.repo.update(gym.id, {'name': "Pool"})
+        self.assertEqual(gym.name, "Gym")
+
+    def test_non_unique_index(self):
+        self.repo.add_index('description')
+        first = Amenity(name="Pool", description="outdoor")
+        second = Amenity(name="Tennis", description="outdoor")
+        self.repo.add(first)
+        self.repo.add(second)
+        self.assertEqual(self.repo.get_all_by_attribute('description', "outdoor"), [first, second])
+
+    def test_journal_operations_need_a_journal(self):
+        with self.assertRaisesRegex(RuntimeError, "no journal"):
+            self.repo.snapshot()
+        with self.assertRaisesRegex(RuntimeError, "no journal"):
+            self.repo.replay(lambda table, obj_id: None)
+
+    def test_deleted_slots_are_compacted(self):
+        self.repo.add_sorted_index('name')
+        amenities = [Amenity(name=f"A{i:03}") for i in range(200)]
+        self.repo.add_many(amenities)
+        page, cursor = self.repo.get_page(None, 150)
+        for amenity in amenities[:140]:
+            self.repo.delete(amenity.id)
+        # the deleted ids no longer take a slot each
+        self.assertLess(len(self.repo._order), 200)
+        # positions were kept: the cursor still points at the 151st amenity
+        page, cursor = self.repo.get_page(cursor, 100)
+        self.assertEqual(page, amenities[150:])
+        self.assertIsNone(cursor)
+        self.assertEqual(list(self.repo.iter_sorted('name', "A195")), amenities[195:])
+
+    def test_update_with_compact_models(self):
+        pool = Amenity(name="Pool")
+        self.assertFalse(hasattr(pool, '__dict__'))
+        created = pool.updated_at
+        self.repo.add(pool)
+        self.repo.update(pool.id, {'name': "Lap Pool", 'not_a_field': 1})
+        self.assertEqual(pool.name, "Lap Pool")
+        self.assertFalse(hasattr(pool, 'not_a_field'))
+        self.assertGreaterEqual(pool.updated_at, created)
+
+    def test_get_page_survives_deletes(self):
+        amenities = [Amenity(name=f"Amenity {i}") for i in range(5)]
+        for amenity in amenities:
+            self.repo.add(amenity)
+
+        page, cursor = self.repo.get_page(limit=2)
+        self.assertEqual(page, amenities[:2])
+        self.repo.delete(amenities[2].id)
+        page, cursor = self.repo.get_page(cursor, limit=2)
+        self.assertEqual(page, amenities[3:5])
+        self.assertIsNone(cursor)
+
+    def test_sorted_index_ranges(self):
+        self.repo.add_sorted_index('name')
+        amenities = {name: Amenity(name=name) for name in ("Sauna", "Bar", "Pool", "Gym")}
+        for amenity in amenities.values():
+            self.repo.add(amenity)
+        self.repo.update(amenities["Bar"].id, {'name': "Spa"})
+        self.repo.delete(amenities["Pool"].id)
+
+        names = [a.name for a in self.repo.iter_sorted('name')]
+        self.assertEqual(names, ["Gym", "Sauna", "Spa"])
+        names = [a.name for a in self.repo.iter_sorted('name', low="H", high="Spa", reverse=True)]
+        self.assertEqual(names, ["Spa", "Sauna"])
+
+    def test_concurrent_writers_and_snapshot_readers(self):
+        errors = []
+
+        def write(worker):
+            try:
+                for i in range(200):
+                    amenity = Amenity(name=f"{worker}-{i}")
+                    self.repo.add(amenity)
+                    if i % 2:
+                        self.repo.delete(amenity.id)
+            except Exception as err:
+                errors.append(err)
+
+        def read():
+            try:
+                for _ in range(200):
+                    self.repo.get_all()
+                    self.repo.get_page(limit=50)
+            except Exception as err:
+                errors.append(err)
+
+        threads = ([threading.Thread(target=write, args=(w,)) for w in range(4)]
+                   + [threading.Thread(target=read) for _ in range(4)])
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(len(self.repo.get_all()), 400)
+        self.assertEqual(self.repo.get_version(), 1200)
+
+    def test_concurrent_reviews_keep_aggregates(self):
+        facade = HBnBFacade()
+        owner = facade.create_user({"first_name": "O", "last_name": "W", "email": "owner@example.com"})
+        place = facade.create_place({"title": "Busy", "price": 10, "owner_id": owner.id,
+                                     "latitude": 0, "longitude": 0})
+        guests = [facade.create_user({"first_name": "G", "last_name": str(i),
+                                      "email": f"guest{i}@example.com"}) for i in range(8)]
+
+        def review(guest):
+            for i in range(50):
+                created = facade.create_review({"text": "ok", "rating": 1 + i % 5,
+                                                "user_id": guest.id, "place_id": place.id})
+                facade.update_review(created.id, {"rating": 5})
+                if i % 2:
+                    facade.delete_review(created.id)
+
+        threads = [threading.Thread(target=review, args=(guest,)) for guest in guests]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(place.reviews), 200)
+        self.assertEqual(place.rating_count, 200)
+        self.assertEqual(place.rating_sum, 1000)
+        self.assertEqual(place.rating_histogram, [0, 0, 0, 0, 200])
+
+    def test_review_deleted_during_update_or_delete(self):
+        facade = HBnBFacade()
+        owner = facade.create_user({"first_name": "O", "last_name": "W", "email": "owner@example.com"})
+        place = facade.create_place({"title": "Busy", "price": 10, "owner_id": owner.id,
+                                     "latitude": 0, "longitude": 0})
+        guest = facade.create_user({"first_name": "G", "last_name": "0", "email": "guest@example.com"})
+        repo = facade.review_repo
+
+        def deleted_after_lookup(obj_id):
+            # another request deletes the review right after this one looked it up
+            del repo.get
+            review = repo.get(obj_id)
+            facade.delete_review(obj_id)
+            return review
+
+        for call in (lambda review_id: facade.update_review(review_id, {"rating": 5}),
+                     facade.delete_review):
+            review = facade.create_review({"text": "ok", "rating": 1, "user_id": guest.id,
+                                           "place_id": place.id})
+            repo.get = deleted_after_lookup
+            self.assertFalse(call(review.id))
+            self.assertEqual(place.reviews, {})
+            self.assertEqual(place.rating_count, 0)
+            self.assertEqual(place.rating_sum, 0)
+            self.assertEqual(place.rating_histogram, [0, 0, 0, 0, 0])
+
+class TestSQLiteRepository(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.database = os.path.join(self.tmpdir.name, 'hbnb.db')
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def _facade(self):
+        return HBnBFacade(repository='sqlite', database=self.database)
+
+    def test_failed_place_write_leaves_place_unchanged(self):
+        facade = self._facade()
+        owner = facade.create_user({"first_name": "Ann", "last_name": "Owner", "email": "ann@example.com"})
+        place = facade.create_place({"title": "Loft", "price": 80, "latitude": 1.0, "longitude": 2.0,
+                                     "owner_id": owner.id})
+        updated_at = place.updated_at
+        with mock.patch.object(facade.place_repo, "_write", side_effect=sqlite3.OperationalError("disk I/O error")):
+            with self.assertRaises(sqlite3.OperationalError):
+                facade.update_place(place.id, {"title": "Penthouse", "price": 500})
+        self.assertEqual((place.title, place.price, place.updated_at), ("Loft", 80, updated_at))
+
+    def test_data_survives_restart(self):
+        facade = self._facade()
+        owner = facade.create_user({"first_name": "Ann", "last_name": "Owner", "email": "ann@example.com"})
+        guest = facade.create_user({"first_name": "Bob", "last_name": "Guest", "email": "bob@example.com"})
+        wifi = facade.create_amenity({"name": "Wi-Fi"})
+        place = facade.create_place({"title": "Loft", "price": 80, "latitude": 1.0, "longitude": 2.0,
+                                     "owner_id": owner.id, "amenity_ids": [wifi.id]})
+        review = facade.create_review({"text": "Great", "rating": 4, "user_id": guest.id, "place_id": place.id})
+        facade.update_review(review.id, {"rating": 2})
+
+        facade = self._facade()
+        place = facade.get_place(place.id)
+        self.assertEqual(place.title, "Loft")
+        self.assertIs(place.owner, facade.get_user(owner.id))
+        self.assertEqual([a.name for a in place.amenities], ["Wi-Fi"])
+        self.assertEqual(list(place.reviews), [review.id])
+        self.assertEqual(place.rating_sum, 2)
+        self.assertIs(facade.get_user_by_email(" BOB@example.com"), facade.get_user(guest.id))
+        self.assertEqual([p.id for p, _ in facade.search_places_near(1.0, 2.0, 1)], [place.id])
+
+    def test_unique_email_and_pages(self):
+        facade = self._facade()
+        ids = [facade.create_user({"first_name": "U", "last_name": str(i),
+                                   "email": f"user{i}@example.com"}).id for i in range(3)]
+        with self.assertRaises(ValueError):
+            facade.create_user({"first_name": "U", "last_name": "X", "email": "USER0@example.com"})
+        with self.assertRaises(ValueError):
+            facade.update_user(ids[1], {"email": "user2@example.com"})
+
+        created, errors = facade.create_users([
+            {"first_name": "U", "last_name": "Y", "email": "batch@example.com"},
+            {"first_name": "U", "last_name": "Z", "email": "Batch@example.com"},
+        ])
+        self.assertEqual([index for index, _ in created], [0])
+        self.assertEqual([error['index'] for error in errors], [1])
+        ids.append(created[0][1].id)
+
+        page, cursor = facade.get_users_page(limit=2)
+        self.assertEqual([u.id for u in page], ids[:2])
+        page, cursor = facade.get_users_page(cursor, limit=2)
+        self.assertEqual([u.id for u in page], ids[2:4])
+        self.assertIsNone(cursor)
+
+    def test_failed_write_leaves_object_unchanged(self):
+        facade = self._facade()
+        user = facade.create_user({"first_name": "Ann", "last_name": "Owner", "email": "ann@example.com"})
+
+        def locked(sql, params):
+            raise sqlite3.OperationalError("database is locked")
+        facade.user_repo._write = locked
+        with self.assertRaises(sqlite3.OperationalError):
+            facade.update_user(user.id, {"first_name": "Anne"})
+        self.assertEqual(user.first_name, "Ann")
+
+    def test_one_process_per_database(self):
+        self._facade()
+        result = subprocess.run(
+            [sys.executable, '-c', 'import sys; from app.services.facade import HBnBFacade; '
+                                   'HBnBFacade(repository="sqlite", database=sys.argv[1])', self.database],
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+            capture_output=True, text=True)
+        self.assertNotEqual(result.returncode, 0)
+        self.assertIn("already used by another process", result.stderr)
+
+    def test_close_releases_every_connection(self):
+        facade = self._facade()
+        thread = threading.Thread(target=facade.user_repo.get_all)
+        thread.start()
+        thread.join()
+        connections = list(facade.user_repo._connections)
+        self.assertEqual(len(connections), 2)
+        facade.close()
+        for conn in connections:
+            with self.assertRaises(sqlite3.ProgrammingError):
+                conn.execute("SELECT 1")
+        # the database can be opened by another process now
+        result = subprocess.run(
+            [sys.executable, '-c', 'import sys; from app.services.facade import HBnBFacade; '
+                                   'HBnBFacade(repository="sqlite", database=sys.argv[1]).close()', self.database],
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+            capture_output=True, text=True)
+        self.assertEqual(result.returncode, 0, result.stderr)
+
+    def test_places_sorted_by_price(self):
+        facade = self._facade()
+        owner = facade.create_user({"first_name": "A", "last_name": "B", "email": "a@example.com"})
+        for price in (30, 10, 20):
+            facade.create_place({"title": f"P{price}", "price": price, "owner_id": owner.id,
+                                 "latitude": 0, "longitude": 0})
+
+        facade = self._facade()
+        places, cursor = facade.get_places_sorted("price", min_price=15, limit=1)
+        self.assertEqual([p.title for p in places], ["P20"])
+        places, cursor = facade.get_places_sorted("price", min_price=15, cursor=cursor, limit=1)
+        self.assertEqual([p.title for p in places], ["P30"])
+        self.assertIsNone(cursor)
+        places, _ = facade.get_places_sorted("created_at", descending=True)
+        self.assertEqual([p.title for p in places], ["P20", "P10", "P30"])
+
+        # the cursor names a place, so pages stay right around writes; ties
+        # are in creation order, reversed when descending
+        tie = facade.create_place({"title": "T20", "price": 20, "owner_id": owner.id,
+                                   "latitude": 0, "longitude": 0})
+        places, cursor = facade.get_places_sorted("price", descending=True, limit=2)
+        self.assertEqual([p.title for p in places], ["P30", "T20"])
+        facade.create_place({"title": "P40", "price": 40, "owner_id": owner.id, "latitude": 0, "longitude": 0})
+        facade.place_repo.delete(tie.id)
+        places, cursor = facade.get_places_sorted("price", descending=True, cursor=cursor, limit=2)
+        self.assertEqual([p.title for p in places], ["P20", "P10"])
+        with self.assertRaises(ValueError):
+            facade.get_places_sorted("price", cursor="not-a-cursor")
+
+class TestJournaledRepository(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def _facade(self):
+        return HBnBFacade(repository='journal', database=self.tmpdir.name)
+
+    def test_replay_and_snapshot(self):
+        facade = self._facade()
+        owner = facade.create_user({"first_name": "Ann", "last_name": "Host", "email": "ann@example.com"})
+        guest = facade.create_user({"first_name": "Bob", "last_name": "Guest", "email": "bob@example.com"})
+        place = facade.create_place({"title": "Loft", "price": 80, "owner_id": owner.id,
+                                     "latitude": 1.0, "longitude": 2.0})
+        review = facade.create_review({"text": "Great", "rating": 4,
+                                       "user_id": guest.id, "place_id": place.id})
+        facade.update_place(place.id, {"title": "Big Loft"})
+        facade.close()
+
+        facade = self._facade()
+        place = facade.get_place(place.id)
+        self.assertEqual(place.title, "Big Loft")
+        self.assertIs(place.owner, facade.get_user(owner.id))
+        self.assertEqual(list(place.reviews), [review.id])
+        self.assertEqual(place.rating_sum, 4)
+
+        # snapshot, then more writes on top of it
+        facade.place_repo.snapshot()
+        facade.delete_review(review.id)
+        facade.update_place(place.id, {"price": 95})
+        facade.close()
+        files = sorted(os.listdir(self.tmpdir.name))
+        self.assertIn("places.1.snap", files)
+        self.assertNotIn("places.0.log", files)
+
+        facade = self._facade()
+        place = facade.get_place(place.id)
+        self.assertEqual((place.title, place.price), ("Big Loft", 95))
+        self.assertEqual(place.reviews, {})
+        self.assertIsNone(facade.get_review(review.id))
+        self.assertIs(facade.get_user_by_email("ANN@example.com"), facade.get_user(owner.id))
+        facade.close()
+
+    def test_tables_share_one_flusher_and_snapshot_in_the_background(self):
+        facade = self._facade()
+        flushers = [thread.name for thread in threading.enumerate()
+                    if thread.name.startswith("journal") and not thread.name.endswith("-snapshot")]
+        self.assertEqual(flushers, ["journal-flusher"])
+
+        journal = Journal(os.path.join(self.tmpdir.name, "small"), AMENITY_SCHEMA, snapshot_every=3)
+        repo = InMemoryRepository(journal=journal)
+        repo.add_many([Amenity(name=f"A{i}") for i in range(3)])
+        journal.sync()
+        deadline = time.monotonic() + 5
+        while "amenities.1.snap" not in os.listdir(journal.directory):
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.01)
+        repo.close()
+        facade.close()
+
+    def test_mmap_snapshot_round_trip(self):
+        facade = HBnBFacade()
+        owner = facade.create_user({"first_name": "Ann", "last_name": "Host", "email": "ann@example.com"})
+        wifi = facade.create_amenity({"name": "Wi-Fi"})
+        place = facade.create_place({"title": "Café", "description": None, "price": 80,
+                                     "owner_id": owner.id, "latitude": 1.5, "longitude": -2.0,
+                                     "amenity_ids": [wifi.id]})
+        path = os.path.join(self.tmpdir.name, "places.snap")
+        write_snapshot(path, PLACE_SCHEMA, [place])
+
+        snapshot = MmapSnapshot(path)
+        self.assertEqual(len(snapshot), 1)
+        record = snapshot.record(0)
+        self.assertEqual((record["title"], record["description"], record["price"]), ("Café", None, 80))
+        self.assertEqual((record["latitude"], record["owner_id"], record["amenity_ids"]),
+                         (1.5, owner.id, [wifi.id]))
+        self.assertEqual(record["created_at"], place._created)
+        snapshot.close()
+
+    def test_snapshot_rows_are_built_on_first_access(self):
+        facade = self._facade()
+        users = [facade.create_user({"first_name": "U", "last_name": str(i),
+                                     "email": f"user{i}@example.com"}) for i in range(3)]
+        facade.user_repo.snapshot()
+        facade.close()
+
+        facade = self._facade()
+        self.assertTrue(all(isinstance(obj, SnapshotRow) for obj in facade.user_repo._storage.values()))
+        # the email index was filled from the mapped rows
+        user = facade.get_user_by_email("USER1@example.com")
+        self.assertEqual((user.id, user.last_name), (users[1].id, "1"))
+        self.assertIs(facade.get_user(users[1].id), user)
+        self.assertIsInstance(facade.user_repo._storage[users[0].id], SnapshotRow)
+        self.assertEqual([u.id for u in facade.get_all_users()], [u.id for u in users])
+        facade.close()
+
+    def test_reviews_and_places_stay_unbuilt_at_startup(self):
+        facade = self._facade()
+        owner = facade.create_user({"first_name": "Ann", "last_name": "Host", "email": "ann@example.com"})
+        guest = facade.create_user({"first_name": "Bob", "last_name": "Guest", "email": "bob@example.com"})
+        place = facade.create_place({"title": "Seaside Loft", "price": 80, "owner_id": owner.id,
+                                     "latitude": 1.0, "longitude": 2.0})
+        reviews = [facade.create_review({"text": f"Lovely stay {i}", "rating": rating, "user_id": guest.id,
+                                         "place_id": place.id}) for i, rating in enumerate((5, 3, 4))]
+        for repo in (facade.user_repo, facade.place_repo, facade.review_repo):
+            repo.snapshot()
+        facade.close()
+
+        facade = self._facade()
+        self.assertIsInstance(facade.place_repo._storage[place.id], SnapshotRow)
+        self.assertIsInstance(facade.review_repo._storage[reviews[0].id], SnapshotRow)
+        # indexed from the mapped rows
+        self.assertEqual([p.id for p, _ in facade.search_places_text("seaside")], [place.id])
+        self.assertEqual([p.id for p, _ in facade.search_places_near(1.0, 2.0, 1)], [place.id])
+        # the author lists them before the place is touched
+        self.assertEqual([r.id for r in facade.get_reviews_by_user(guest.id)],
+                         [review.id for review in reviews])
+
+        loaded = facade.get_place(place.id)
+        self.assertEqual((loaded.rating_count, loaded.rating_sum), (3, 12))
+        self.assertEqual([r.id for r in facade.get_reviews_for_place(place.id)],
+                         [review.id for review in reviews])
+        facade.delete_review(reviews[0].id)
+        self.assertEqual((loaded.rating_count, loaded.rating_histogram), (2, [0, 0, 1, 1, 0]))
+        self.assertEqual([r.id for r in facade.get_reviews_by_user(guest.id)],
+                         [review.id for review in reviews[1:]])
+
+        # a new snapshot takes over the rows still unbuilt
+        old = facade.review_repo._mapped
+        facade.review_repo.snapshot()
+        self.assertTrue(old._map.closed)
+        self.assertEqual(facade.get_review(reviews[1].id).text, "Lovely stay 1")
+        facade.close()
+
+class TestCachedRepository(unittest.TestCase):
+
+    def setUp(self):
+        self.backend = InMemoryRepository()
+        self.backend.add_index('name', unique=True)
+        self.now = 0.0
+        self.repo = CachedRepository(self.backend, max_size=2, ttl=10, clock=lambda: self.now)
+
+    def test_hits_misses_and_lru_eviction(self):
+        pool, gym, spa = Amenity(name="Pool"), Amenity(name="Gym"), Amenity(name="Spa")
+        self.repo.add_many([pool, gym, spa])
+        self.assertIs(self.repo.get(pool.id), pool)
+        self.assertIs(self.repo.get(pool.id), pool)
+        self.repo.get(gym.id)
+        self.repo.get(pool.id)
+        self.repo.get(spa.id)  # evicts gym, the least recently used
+        stats = self.repo.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['evictions'], stats['size']), (2, 3, 1, 2))
+
+        self.backend._storage.pop(pool.id)
+        self.backend._storage.pop(gym.id)
+        self.assertIs(self.repo.get(pool.id), pool)  # still cached
+        self.assertIsNone(self.repo.get(gym.id))  # evicted, so read from the backend
+
+    def test_ttl_expiry(self):
+        pool = Amenity(name="Pool")
+        self.repo.add(pool)
+        self.repo.get(pool.id)
+        self.backend._storage.pop(pool.id)
+        self.now = 11
+        self.assertIsNone(self.repo.get(pool.id))
+
+    def test_writes_invalidate(self):
+        pool = Amenity(name="Pool")
+        self.repo.add(pool)
+        self.assertIs(self.repo.get_by_attribute('name', "Pool"), pool)
+        self.repo.update(pool.id, {'name': "Hot Tub"})
+        self.assertIsNone(self.repo.get_by_attribute('name', "Pool"))
+        self.assertEqual(self.repo.get_many([pool.id, "missing"]), {pool.id: pool})
+        self.repo.delete(pool.id)
+        self.assertIsNone(self.repo.get(pool.id))
+        self.assertEqual(self.repo.get_many([pool.id]), {})
+
+    def test_facade_caches_configured_tables(self):
+        facade = HBnBFacade(cache={"users": {"max_size": 100}})
+        self.assertIsInstance(facade.user_repo, CachedRepository)
+        self.assertNotIsInstance(facade.place_repo, CachedRepository)
+        user = facade.create_user({"first_name": "Ann", "last_name": "Host", "email": "ann@example.com"})
+        facade.get_user(user.id)
+        facade.update_user(user.id, {"first_name": "Anne"})
+        self.assertEqual(facade.get_user(user.id).first_name, "Anne")
+        self.assertEqual(facade.cache_stats()["users"]["misses"], 2)
+        with self.assertRaises(ValueError):
+            HBnBFacade(cache={"bookings": {}})
+
+
+if __name__ == '__main__':
+    unittest.main()
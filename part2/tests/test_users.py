@@ -36,6 +36,72 @@ class TestUserEndpoints(unittest.TestCase):
         })
         self.assertEqual(response.status_code, 400)
 
+    def test_create_user_duplicate_email_case_insensitive(self):
+        self.client.post('/api/v1/users/', json={
+            "first_name": "Alice",
+            "last_name": "Wonder",
+            "email": "alice@example.com"
+        })
+        response = self.client.post('/api/v1/users/', json={
+            "first_name": "Alice",
+            "last_name": "Again",
+            "email": "  ALICE@Example.com "
+        })
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.get_json()['error'], "Email already registered")
+
+    def test_create_users_batch(self):
+        self.client.post('/api/v1/users/', json={
+            "first_name": "Taken",
+            "last_name": "Email",
+            "email": "taken@example.com"
+        })
+        response = self.client.post('/api/v1/users/batch', json=[
+            {"first_name": "One", "last_name": "Ok", "email": "one@example.com"},
+            {"first_name": "Two", "last_name": "Dup", "email": "TAKEN@example.com"},
+            {"first_name": "", "last_name": "Bad", "email": "bad@example.com"},
+            {"first_name": "Three", "last_name": "Ok", "email": "three@example.com"},
+        ])
+        self.assertEqual(response.status_code, 207)
+        body = response.get_json()
+        self.assertEqual([c['index'] for c in body['created']], [0, 3])
+        self.assertEqual([e['index'] for e in body['errors']], [1, 2])
+        self.assertEqual(body['errors'][0]['error'], "Email already registered")
+        self.assertEqual(len(self.client.get('/api/v1/users/').get_json()), 3)
+
+    def test_update_user_ignores_other_fields(self):
+        user_id = self.client.post('/api/v1/users/', json={
+            "first_name": "Rita", "last_name": "Writer", "email": "rita@example.com"
+        }).get_json()['id']
+        response = self.client.put(f'/api/v1/users/{user_id}', json={
+            "first_name": "Rita", "last_name": "Writer", "email": "rita@example.com",
+            "reviews": "oops", "is_admin": True
+        })
+        self.assertEqual(response.status_code, 200)
+        user = facade.get_user(user_id)
+        self.assertEqual(user.reviews, {})
+        self.assertFalse(user.is_admin)
+
+    def test_create_users_batch_validates_items(self):
+        response = self.client.post('/api/v1/users/batch', json=[
+            {"first_name": "One", "last_name": "Ok", "email": "one@example.com"},
+            {"first_name": "No", "last_name": "Email"},
+            {"first_name": "One", "last_name": "Again", "email": "one@example.com"},
+            {"first_name": 2, "last_name": "Typed", "email": "two@example.com"},
+        ])
+        self.assertEqual(response.status_code, 207)
+        body = response.get_json()
+        self.assertEqual([c['index'] for c in body['created']], [0])
+        self.assertEqual([e['index'] for e in body['errors']], [1, 2, 3])
+        self.assertEqual(body['errors'][0]['error'], "Input payload validation failed")
+        self.assertIn('email', body['errors'][0]['errors'])
+        self.assertEqual(body['errors'][1]['error'], "Email already registered")
+        self.assertIn('first_name', body['errors'][2]['errors'])
+
+    def test_create_users_batch_not_a_list(self):
+        response = self.client.post('/api/v1/users/batch', json={"first_name": "Solo"})
+        self.assertEqual(response.status_code, 400)
+
     def test_get_user_not_found(self):
         response = self.client.get('/api/v1/users/nonexistent-id')
         self.assertEqual(response.status_code, 404)
@@ -54,6 +120,21 @@ class TestUserEndpoints(unittest.TestCase):
         })
         self.assertEqual(update_resp.status_code, 200)
 
+    def test_list_reflects_update(self):
+        user_id = self.client.post('/api/v1/users/', json={
+            "first_name": "Old",
+            "last_name": "Name",
+            "email": "old.name@example.com"
+        }).get_json()['id']
+        self.assertEqual(self.client.get('/api/v1/users/').get_json()[0]['first_name'], "Old")
+        self.client.put(f'/api/v1/users/{user_id}', json={
+            "first_name": "New",
+            "last_name": "Name",
+            "email": "old.name@example.com"
+        })
+        self.assertEqual(self.client.get('/api/v1/users/').get_json()[0]['first_name'], "New")
+        self.assertEqual(self.client.get(f'/api/v1/users/{user_id}').get_json()['first_name'], "New")
+
     def test_update_user_duplicate_email(self):
         resp1 = self.client.post('/api/v1/users/', json={
             "first_name": "User1",